@@ -0,0 +1,74 @@
+"""orjson-backed JSON renderer and parser for DRF.
+
+Drop-in subclasses of DRF's ``JSONRenderer``/``JSONParser``: output is the
+same compact UTF-8 JSON (``U+2028``/``U+2029`` escaped, datetimes in DRF's
+format, ``Decimal`` as a number, lazy translation strings forced to ``str``),
+only produced by orjson instead of the stdlib encoder. When orjson is not
+installed, or a request needs something it cannot do (``indent=``, a
+non-UTF-8 charset, integers beyond 64 bits), the stock implementation runs.
+
+One difference is left on purpose: orjson writes ``NaN``/``Infinity`` as
+``null`` where the strict stdlib encoder raises.
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder: "Z" suffix instead of "+00:00"
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_default = JSONEncoder().default
+
+# orjson leaves these line separators unescaped; DRF escapes them so the
+# output stays a strict JavaScript subset
+_ESCAPES = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+UTF8 = {"utf-8", "utf8"}
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` producing the same bytes through orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits: let the stdlib encoder decide
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in _ESCAPES:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` decoding UTF-8 request bodies with orjson."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,113 @@
+"""``Idempotency-Key`` support for non-idempotent write actions.
+
+Clients on flaky networks retry writes whose response they never saw. With
+an ``Idempotency-Key`` header, the first successful response is kept in the
+shared cache for ``IDEMPOTENCY_TTL`` seconds under the user and key, and a
+retry gets it back (``Idempotent-Replayed: true``) without the view running
+again, so no row is touched twice.
+
+- A retry arriving while the first request is in flight gets ``409`` with
+  ``Retry-After``; the in-flight marker expires after
+  ``IDEMPOTENCY_LOCK_TTL`` if its worker dies.
+- The same key with a different method, path or body gets ``422``.
+- Error responses are not stored: the write was rolled back, so a retry
+  runs again.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+CACHE_KEY = "idempotency:{user_id}:{digest}"
+
+
+def _fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):
+        # QueryDict of form posts
+        data = sorted(data.lists())
+    payload = json.dumps(
+        [request.method, request.get_full_path(), data], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _replay(stored) -> Response:
+    response = Response(stored["data"], status=stored["status"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _error(detail, status) -> Response:
+    return Response({"detail": detail}, status=status)
+
+
+def _in_progress() -> Response:
+    response = _error("A request with this key is in progress", 409)
+    response["Retry-After"] = "1"
+    return response
+
+
+def _claim(cache_key, fingerprint) -> bool:
+    """Mark the key as in flight; False if it is already taken."""
+    pending = {"fingerprint": fingerprint, "status": None}
+    return cache.add(cache_key, pending, timeout=settings.IDEMPOTENCY_LOCK_TTL)
+
+
+def idempotent(method):
+    """Honour ``Idempotency-Key`` on a viewset handler or action.
+
+    Wraps the handler from the outside (above ``transaction.atomic``), so
+    the response is stored only after the write has been committed.
+    Requests without the header, or from anonymous users, are not affected.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        user = request.user
+        if not key or not user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"{HEADER} is too long", 400)
+
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        cache_key = CACHE_KEY.format(user_id=user.pk, digest=digest)
+        fingerprint = _fingerprint(request)
+        if not _claim(cache_key, fingerprint):
+            stored = cache.get(cache_key)
+            if stored is None:
+                # Expired between add() and get()
+                if not _claim(cache_key, fingerprint):
+                    return _in_progress()
+            elif stored["status"] is None:
+                return _in_progress()
+            elif stored["fingerprint"] != fingerprint:
+                return _error(f"{HEADER} was used for a different request", 422)
+            else:
+                return _replay(stored)
+
+        try:
+            response = method(self, request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+        if response.status_code < 400 and isinstance(response, Response):
+            stored = {
+                "fingerprint": fingerprint,
+                "status": response.status_code,
+                "data": response.data,
+            }
+            cache.set(cache_key, stored, timeout=settings.IDEMPOTENCY_TTL)
+        else:
+            cache.delete(cache_key)
+        return response
+
+    return wrapper
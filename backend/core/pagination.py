@@ -0,0 +1,122 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Pages are cut with ``WHERE (a, b, id) > (cursor)`` on the view's
+``keyset_ordering`` instead of ``OFFSET``, and no ``COUNT(*)`` is issued, so
+every page costs the same index range scan however deep the client is.
+The cursor is the opaque ordering key of the last row of the previous page.
+
+While ``API_PAGINATION_COMPAT`` is on, requests without ``cursor`` or
+``page_size`` get the old unpaginated list, so existing clients keep working.
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only cursor pagination on a unique ordering of plain columns.
+
+    Views set ``keyset_ordering`` to ascending attribute names ending with a
+    unique one, e.g. ``("mission_id", "order", "id")``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def _requested(self, request) -> bool:
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.API_PAGE_SIZE
+        return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+    def decode_cursor(self, request, ordering, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Each value must be valid for its column, or the filter fails with a 500
+        try:
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, values) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def after(ordering, values) -> Q:
+        """Rows after ``values``: ``(a > x) | (a = x & b > y) | …``."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            equal = dict(zip(ordering[:i], values[:i]))
+            condition |= Q(**equal, **{f"{field}__gt": values[i]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if settings.API_PAGINATION_COMPAT and not self._requested(request):
+            return None
+        ordering = tuple(view.keyset_ordering)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*ordering)
+        values = self.decode_cursor(request, ordering, queryset.model)
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+        # One extra row tells whether there is a next page, without COUNT(*)
+        rows = list(queryset[: self.page_size + 1])
+        page = rows[: self.page_size]
+        self.next_values = None
+        if len(rows) > self.page_size:
+            last = page[-1]
+            if isinstance(last, dict):
+                # .values() rows of the values-based read path
+                self.next_values = [last[field] for field in ordering]
+            else:
+                self.next_values = [getattr(last, field) for field in ordering]
+        return page
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_values)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
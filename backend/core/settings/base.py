@@ -4,6 +4,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-secret")
@@ -91,6 +93,21 @@ if DEBUG:
 else:
     STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# orjson-backed JSON renderer/parser (core/fastjson.py); they fall back to the
+# stdlib encoder when orjson is not installed
+API_FAST_JSON = os.getenv("API_FAST_JSON", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+if API_FAST_JSON:
+    JSON_RENDERER = "core.fastjson.FastJSONRenderer"
+    JSON_PARSER = "core.fastjson.FastJSONParser"
+else:
+    JSON_RENDERER = "rest_framework.renderers.JSONRenderer"
+    JSON_PARSER = "rest_framework.parsers.JSONParser"
+
 REST_FRAMEWORK = {
     # JWT auth for API
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -99,20 +116,36 @@ REST_FRAMEWORK = {
     # Always return JSON for API (avoid HTML browsable API in load tests)
     "DEFAULT_RENDERER_CLASSES": (
         [
-            "rest_framework.renderers.JSONRenderer",
+            JSON_RENDERER,
             "rest_framework.renderers.BrowsableAPIRenderer",
         ]
         if DEBUG
-        else ["rest_framework.renderers.JSONRenderer"]
+        else [JSON_RENDERER]
     ),
     # Accept JSON and form-encoded payloads by default
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        JSON_PARSER,
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ],
 }
 
+# Keyset pagination of list endpoints (core/pagination.py). With the compat
+# mode on, only requests passing ?cursor= or ?page_size= are paginated
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+API_PAGINATION_COMPAT = os.getenv("API_PAGINATION_COMPAT", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+# Idempotency-Key (core/idempotency.py): how long a successful response is
+# replayed, and how long an in-flight request blocks its retries
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "60"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -121,10 +154,130 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+# Shared cache (runner jobs/results), same Redis as Celery by default
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv(
+            "CACHE_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        ),
+    }
+}
+
+# Code runner sandbox (game/runner.py)
+# Sandbox backend: "docker", "local" (subprocess with rlimits) or a class path
+RUNNER_BACKEND = os.getenv("RUNNER_BACKEND", "docker")
+RUNNER_IMAGE = os.getenv("RUNNER_IMAGE", "python:3.11-alpine")
+RUNNER_MEM_LIMIT = os.getenv("RUNNER_MEM_LIMIT", "128m")
+# Shared Docker client: pin the API version to skip negotiation ("" = auto)
+RUNNER_DOCKER_API_VERSION = os.getenv("RUNNER_DOCKER_API_VERSION", "")
+RUNNER_DOCKER_MAX_POOL_SIZE = int(os.getenv("RUNNER_DOCKER_MAX_POOL_SIZE", "10"))
+RUNNER_DOCKER_HEALTHCHECK_INTERVAL = int(
+    os.getenv("RUNNER_DOCKER_HEALTHCHECK_INTERVAL", "30")
+)
+# Local backend (game/runner_local.py): "" runs the server's own interpreter
+RUNNER_LOCAL_PYTHON = os.getenv("RUNNER_LOCAL_PYTHON", "")
+RUNNER_LOCAL_FILE_SIZE = os.getenv("RUNNER_LOCAL_FILE_SIZE", "1m")
+# RLIMIT_NPROC counts every process of the sandbox uid, not just one run
+RUNNER_LOCAL_MAX_PROCESSES = int(os.getenv("RUNNER_LOCAL_MAX_PROCESSES", "32"))
+# uid the sandbox drops to when the server runs as root (nobody; 0 keeps root)
+RUNNER_LOCAL_UID = int(os.getenv("RUNNER_LOCAL_UID", "65534"))
+RUNNER_LOCAL_ISOLATE_NETWORK = os.getenv(
+    "RUNNER_LOCAL_ISOLATE_NETWORK", "True"
+).lower() in {"1", "true", "yes", "on"}
+# Zygote mode (RUNNER_BACKEND=zygote): modules imported once before forking
+RUNNER_ZYGOTE_PRELOAD = os.getenv(
+    "RUNNER_ZYGOTE_PRELOAD",
+    "collections,datetime,decimal,fractions,functools,heapq,itertools,json,"
+    "math,random,re,statistics,string,traceback",
+)
+# Warm container pool: containers are pre-started and reused via exec
+RUNNER_POOL_ENABLED = os.getenv("RUNNER_POOL_ENABLED", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+# Per process: every gunicorn and Celery worker keeps this many idle
+# containers (0 = start containers on demand only)
+RUNNER_POOL_SIZE = int(os.getenv("RUNNER_POOL_SIZE", "4"))
+# 1 = recycle a container after every run; >1 reuses it while no state leaks
+RUNNER_POOL_MAX_REUSE = int(os.getenv("RUNNER_POOL_MAX_REUSE", "1"))
+RUNNER_POOL_IDLE_TIMEOUT = int(os.getenv("RUNNER_POOL_IDLE_TIMEOUT", "300"))
+# Content-addressed result cache for identical submissions
+RUNNER_CACHE_ENABLED = os.getenv("RUNNER_CACHE_ENABLED", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+RUNNER_CACHE_TTL = int(os.getenv("RUNNER_CACHE_TTL", "600"))
+# Code importing any of these modules is never cached or coalesced
+RUNNER_CACHE_NONDETERMINISTIC_MODULES = os.getenv(
+    "RUNNER_CACHE_NONDETERMINISTIC_MODULES",
+    "random,secrets,time,datetime,uuid,os,threading,asyncio",
+)
+# Per-process LRU size; the shared cache relies on its own eviction policy
+RUNNER_CACHE_MAX_ENTRIES = int(os.getenv("RUNNER_CACHE_MAX_ENTRIES", "1024"))
+# Coalesce identical in-flight submissions (in-process and across workers)
+RUNNER_SINGLEFLIGHT_ENABLED = os.getenv(
+    "RUNNER_SINGLEFLIGHT_ENABLED", "True"
+).lower() in {"1", "true", "yes", "on"}
+RUNNER_SINGLEFLIGHT_POLL_INTERVAL = float(
+    os.getenv("RUNNER_SINGLEFLIGHT_POLL_INTERVAL", "0.05")
+)
+# Static precheck before the sandbox: size limits (bytes), syntax and
+# comma-separated banned imports / attribute names ("os.system" bans the
+# attribute of that module only, "__globals__" bans it on any object)
+RUNNER_PRECHECK_ENABLED = os.getenv("RUNNER_PRECHECK_ENABLED", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+RUNNER_MAX_CODE_SIZE = int(os.getenv("RUNNER_MAX_CODE_SIZE", str(64 * 1024)))
+RUNNER_MAX_STDIN_SIZE = int(os.getenv("RUNNER_MAX_STDIN_SIZE", str(1024 * 1024)))
+RUNNER_BANNED_IMPORTS = os.getenv(
+    "RUNNER_BANNED_IMPORTS", "ctypes,multiprocessing,socket,subprocess"
+)
+RUNNER_BANNED_ATTRIBUTES = os.getenv(
+    "RUNNER_BANNED_ATTRIBUTES",
+    "__subclasses__,__globals__,__code__,os.system,os.popen,os.fork",
+)
+# Admission control: global sandbox concurrency, bounded wait queue and
+# per-user in-flight limit (503/429 with Retry-After when exceeded)
+RUNNER_MAX_CONCURRENCY = int(os.getenv("RUNNER_MAX_CONCURRENCY", "8"))
+RUNNER_MAX_QUEUE = int(os.getenv("RUNNER_MAX_QUEUE", "32"))
+RUNNER_QUEUE_TIMEOUT = int(os.getenv("RUNNER_QUEUE_TIMEOUT", "10"))
+RUNNER_MAX_PER_USER = int(os.getenv("RUNNER_MAX_PER_USER", "2"))
+RUNNER_ADMISSION_LEASE_TTL = int(os.getenv("RUNNER_ADMISSION_LEASE_TTL", "120"))
+RUNNER_ADMISSION_RETRY_AFTER = int(os.getenv("RUNNER_ADMISSION_RETRY_AFTER", "5"))
+RUNNER_ADMISSION_POLL_INTERVAL = float(
+    os.getenv("RUNNER_ADMISSION_POLL_INTERVAL", "0.05")
+)
+# User slot lease of an async job while it waits in the Celery queue; renewed
+# to RUNNER_ADMISSION_LEASE_TTL when the job starts
+RUNNER_JOB_LEASE_TTL = int(os.getenv("RUNNER_JOB_LEASE_TTL", "900"))
+# How long async job status/results stay available for polling (seconds)
+RUNNER_JOB_TTL = int(os.getenv("RUNNER_JOB_TTL", "3600"))
+
+# Serve catalog reads (tracks, locations, missions, ranks) from per-process
+# snapshots invalidated by content edits (game/catalog.py)
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT_ENABLED", "True").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+# max-age of anonymous catalog responses for browsers and reverse proxies;
+# they revalidate with If-None-Match against the catalog ETag afterwards
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+
 # Email for dev (console) - change in production
 EMAIL_BACKEND = os.getenv(
     "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
@@ -35,6 +35,13 @@ LOGGING = {
     "disable_existing_loggers": True,
 }
 
+# Process-local cache instead of Redis
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 # Run Celery tasks eagerly in tests (no broker/worker needed)
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
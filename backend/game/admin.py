@@ -1,5 +1,6 @@
 """Admin registrations for game models."""
 
+from django import forms
 from django.contrib import admin
 
 from .models import (
@@ -13,6 +14,7 @@ from .models import (
     TaskProgress,
     Track,
 )
+from .prerequisites import validate_links
 
 
 @admin.register(ClassRole)
@@ -54,11 +56,26 @@ class MissionTaskInline(admin.TabularInline):
     )
 
 
+class MissionAdminForm(forms.ModelForm):
+    class Meta:
+        model = Mission
+        fields = "__all__"
+
+    def clean_prerequisites(self):
+        # Цикл в требованиях навсегда закрыл бы миссии — показываем ошибку поля
+        prerequisites = self.cleaned_data["prerequisites"]
+        if self.instance.pk:
+            validate_links([self.instance.pk], [m.pk for m in prerequisites])
+        return prerequisites
+
+
 @admin.register(Mission)
 class MissionAdmin(admin.ModelAdmin):
     """Admin for Mission model."""
 
-    list_display = ("id", "title", "location", "xp_reward", "is_active")
+    form = MissionAdminForm
+    list_display = ("id", "title", "location", "xp_reward", "is_active", "depth")
+    readonly_fields = ("depth",)
     inlines = [MissionTaskInline]
 
 
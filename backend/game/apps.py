@@ -8,3 +8,9 @@ class GameConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "game"
+
+    def ready(self):
+        from . import catalog, prerequisites
+
+        catalog.connect_signals()
+        prerequisites.connect_signals()
@@ -0,0 +1,225 @@
+"""In-memory snapshots of the content catalog.
+
+Tracks, locations, missions, tasks and ranks change only when admins edit
+them, yet every read used to rebuild the nested structure from the database.
+Each worker now keeps the serialized catalog per language and reuses it until
+the content version moves, so catalog reads become dictionary lookups.
+
+The version is a token in the shared cache, replaced on ``post_save``,
+``post_delete`` and prerequisite ``m2m_changed`` of the content models, so an
+edit in one process invalidates the snapshots of all the others.
+``bulk_create()`` and ``QuerySet.update()`` send no signals; call
+:func:`bump_version` after them.
+
+Snapshots hold the anonymous rendering and must be treated as read-only.
+Per-user fields (``available``, ``user_progress``) are overlaid on copies by
+:func:`personalize`.
+
+The same version, together with the language and a per-user progress version
+(moved by ``Progress`` and ``Profile`` saves), makes up the catalog ETag, so a
+client revalidating an unchanged catalog gets a 304 before anything is
+serialized.
+"""
+
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.module_loading import import_string
+
+from .serializers import EMPTY_USER_PROGRESS
+
+VERSION_KEY = "catalog:version"
+USER_VERSION_KEY = "catalog:user:{user_id}"
+
+CONTENT_MODELS = ("Track", "Location", "Mission", "MissionTask", "Rank")
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def _get_token(key: str) -> str:
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        token = cache.get(key)
+    return token
+
+
+def get_version() -> str:
+    """Current content version, created on first use."""
+    return _get_token(VERSION_KEY)
+
+
+def _new_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_user_version(user_id: int) -> str:
+    """Version of the user's progress and level as seen by the catalog."""
+    return _get_token(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_user_version(user_id: int):
+    """Invalidate the user's catalog ETags (progress or level changed)."""
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None))
+
+
+def etag(*parts, user_id: int | None = None) -> str:
+    """Strong ETag of a catalog response.
+
+    ``parts`` identify the rendering (kind, language, media type); the
+    content version and, for signed-in users, their progress version are
+    mixed in, so any edit that could change the body changes the tag.
+    """
+    versions = [get_version()]
+    if user_id is not None:
+        versions.append(get_user_version(user_id))
+    digest = hashlib.sha256(":".join(map(str, (*versions, *parts))).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def bump_version():
+    """Invalidate every worker's snapshots.
+
+    Inside a transaction the version moves twice: now, and again on commit,
+    so a snapshot rebuilt from not-yet-committed data in between is dropped.
+    """
+    _new_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_new_version)
+
+
+class CatalogSnapshot:
+    """Serialized catalog for one language at one content version.
+
+    Each kind (``tracks``, ``missions``...) is built on first use by the
+    caller-supplied ``build(language)`` and never changes afterwards.
+    """
+
+    def __init__(self, version: str, language: str):
+        self.version = version
+        self.language = language
+        self._data = {}
+        self._indexes = {}
+        self._json = {}
+        # Reentrant: building an index or JSON builds the list first
+        self._lock = threading.RLock()
+
+    def _get(self, store, kind, make):
+        value = store.get(kind)
+        if value is None:
+            with self._lock:
+                value = store.get(kind)
+                if value is None:
+                    value = store[kind] = make()
+        return value
+
+    def list(self, kind: str, build) -> list:
+        return self._get(self._data, kind, lambda: build(self.language))
+
+    def get(self, kind: str, pk: int, build):
+        """One item of ``kind`` by id, or ``None``."""
+        index = self._get(
+            self._indexes,
+            kind,
+            lambda: {item["id"]: item for item in self.list(kind, build)},
+        )
+        return index.get(pk)
+
+    def json(self, kind: str, build) -> bytes:
+        """The list pre-rendered by the API's JSON renderer."""
+        return self._get(self._json, kind, lambda: self._render(self.list(kind, build)))
+
+    @staticmethod
+    def _render(data) -> bytes:
+        return import_string(settings.JSON_RENDERER)().render(data)
+
+
+def get_snapshot(language: str) -> CatalogSnapshot:
+    """This process's snapshot for ``language``, replaced when the version moves."""
+    version = get_version()
+    snapshot = _snapshots.get(language)
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshots.get(language)
+            if snapshot is None or snapshot.version != version:
+                snapshot = _snapshots[language] = CatalogSnapshot(version, language)
+    return snapshot
+
+
+def _personalize_mission(mission, state):
+    return {
+        **mission,
+        "available": state.is_available(
+            mission["id"], mission["is_active"], mission["min_level"]
+        ),
+        "user_progress": state.progress.get(mission["id"]) or dict(EMPTY_USER_PROGRESS),
+    }
+
+
+def _personalize_location(location, state):
+    missions = [_personalize_mission(m, state) for m in location["missions"]]
+    return {**location, "missions": missions}
+
+
+def _personalize_track(track, state):
+    worlds = [_personalize_location(w, state) for w in track["worlds"]]
+    return {**track, "worlds": worlds}
+
+
+PERSONALIZERS = {
+    "missions": _personalize_mission,
+    "locations": _personalize_location,
+    "tracks": _personalize_track,
+}
+
+
+def personalize(kind: str, item, state):
+    """Copy of a snapshot item with the user's availability and progress.
+
+    ``state`` is a :class:`game.serializers.UserProgressState`; kinds without
+    per-user fields are returned as they are.
+    """
+    personalizer = PERSONALIZERS.get(kind)
+    if personalizer is None or state is None:
+        return item
+    return personalizer(item, state)
+
+
+def _content_changed(sender, **kwargs):
+    bump_version()
+
+
+def _user_state_changed(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+def connect_signals():
+    from django.apps import apps
+
+    for name in CONTENT_MODELS:
+        model = apps.get_model("game", name)
+        for signal in (post_save, post_delete):
+            signal.connect(
+                _content_changed, sender=model, dispatch_uid=f"catalog:{name}"
+            )
+    m2m_changed.connect(
+        _content_changed,
+        sender=apps.get_model("game", "Mission").prerequisites.through,
+        dispatch_uid="catalog:prerequisites",
+    )
+    for label, name in (("game", "Progress"), ("users", "Profile")):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                _user_state_changed,
+                sender=apps.get_model(label, name),
+                dispatch_uid=f"catalog:user:{name}",
+            )
@@ -0,0 +1,329 @@
+"""Server-side grading of ``code`` mission tasks.
+
+A code task declares its test cases in ``MissionTask.data``::
+
+    {
+        "time_limit": 2,
+        "tests": [
+            {"name": "sum", "stdin": "2 3\n", "expected_output": "5"},
+            {"name": "add()", "assert": "add(2, 3) == 5"},
+        ],
+    }
+
+All cases are run in a single sandbox: the harness below receives the
+learner's code and the cases (without expected outputs) over stdin, runs
+every case in its own child interpreter under a different uid and in a fresh
+empty directory, and prints one JSON report line with each case's exit code
+and stdout. The verdicts are decided here, so nothing inside the sandbox
+knows the expected answers. The report line is prefixed with a marker derived
+from ``SECRET_KEY`` so that the learner's own output can never be mistaken
+for it; the learner cannot read the marker because it never shares the
+harness' uid.
+"""
+
+import hashlib
+import hmac
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import TaskProgress
+from .runner import MAX_OUTPUT_SIZE, execute_python_code
+from .runner_cache import is_deterministic
+from .runner_precheck import check_code
+
+# Upper bounds that keep one grading run within a sane sandbox budget
+MAX_TEST_CASES = 50
+DEFAULT_CASE_TIME_LIMIT = 2
+MAX_TOTAL_TIMEOUT = 30
+# Seconds of the sandbox budget reserved for starting the harness itself
+HARNESS_OVERHEAD = 3
+# Stdout kept per case on top of the expected output's length, and stderr kept
+OUTPUT_SLACK = 256
+ERROR_LIMIT = 500
+
+HARNESS = r'''
+import json, os, shutil, signal, subprocess, sys, tempfile, time
+
+LEARNER_UID = 65534
+
+payload = json.loads(sys.stdin.read())
+
+
+def report(data):
+    sys.stdout.write(payload["marker"] + json.dumps(data, ensure_ascii=False) + "\n")
+    sys.exit(0)
+
+
+# Learner code running under the harness' uid could read the marker or write
+# into the harness' stdout, so grading needs root to switch uids.
+if os.getuid() != 0:
+    report({"error": "The sandbox cannot run learner code under a separate uid."})
+
+DRIVER = """
+import sys
+ns = {"__name__": "__main__"}
+try:
+    exec(compile(sys.argv[1], "<solution>", "exec"), ns)
+except SystemExit as exc:
+    if exc.code not in (None, 0):
+        raise
+if len(sys.argv) > 2 and not eval(compile(sys.argv[2], "<test>", "eval"), ns):
+    sys.exit(3)
+"""
+
+
+def demote():
+    os.setgroups([])
+    os.setgid(LEARNER_UID)
+    os.setuid(LEARNER_UID)
+
+
+def kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def run_case(case, workdir, timeout):
+    argv = [sys.executable, "-c", DRIVER, payload["code"]]
+    if "assert" in case:
+        argv.append(case["assert"])
+    try:
+        proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=workdir,
+            env={"PATH": os.environ.get("PATH", ""), "HOME": workdir},
+            preexec_fn=demote,
+            start_new_session=True,
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        return None, "", "Harness error: " + str(exc)
+    try:
+        stdout, stderr = proc.communicate(case.get("stdin", ""), timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_group(proc)
+        proc.communicate()
+        return None, "", "Timeout"
+    finally:
+        # Background processes must not outlive their case
+        kill_group(proc)
+    error = stderr.strip()
+    if proc.returncode == 3 and "assert" in case and not error:
+        error = "Assertion failed: " + case["assert"]
+    return proc.returncode, stdout, error
+
+
+deadline = time.monotonic() + payload["deadline"]
+results = []
+for case in payload["cases"]:
+    started = time.perf_counter()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        exit_code, stdout, error = None, "", "Timeout: grading time budget exhausted"
+    else:
+        # Every case starts in its own empty directory owned by the learner
+        workdir = tempfile.mkdtemp(prefix="case-")
+        os.chown(workdir, LEARNER_UID, LEARNER_UID)
+        try:
+            exit_code, stdout, error = run_case(
+                case, workdir, min(payload["time_limit"], remaining)
+            )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    results.append(
+        {
+            "name": case["name"],
+            "exit_code": exit_code,
+            "time_ms": round((time.perf_counter() - started) * 1000, 2),
+            "stdout": stdout[: case["output_limit"]],
+            "error": error[-payload["error_limit"] :],
+        }
+    )
+
+report({"cases": results})
+'''
+
+
+class GradingError(Exception):
+    """Raised when a task cannot be graded or the sandbox gave no report."""
+
+
+def get_time_limit(task) -> int:
+    """Per-case time limit in seconds declared in ``task.data``."""
+    value = (task.data or {}).get("time_limit")
+    if value in (None, ""):
+        return DEFAULT_CASE_TIME_LIMIT
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise GradingError("time_limit must be a whole number of seconds.")
+    if not 1 <= value <= MAX_TOTAL_TIMEOUT - HARNESS_OVERHEAD:
+        raise GradingError(
+            f"time_limit must be between 1 and {MAX_TOTAL_TIMEOUT - HARNESS_OVERHEAD}."
+        )
+    return value
+
+
+def get_test_cases(task) -> list:
+    """Validate and normalize the test cases declared in ``task.data``."""
+    if task.task_type != "code":
+        raise GradingError("Only code tasks can be graded.")
+    tests = (task.data or {}).get("tests") or []
+    if not isinstance(tests, list) or not tests:
+        raise GradingError("Task has no test cases.")
+    if len(tests) > MAX_TEST_CASES:
+        raise GradingError(f"Task declares more than {MAX_TEST_CASES} test cases.")
+
+    cases = []
+    for index, test in enumerate(tests, start=1):
+        if not isinstance(test, dict) or not (
+            "assert" in test or "expected_output" in test
+        ):
+            raise GradingError(f"Test case #{index} needs expected_output or assert.")
+        case = {"name": str(test.get("name") or f"test {index}")}
+        if "assert" in test:
+            case["assert"] = str(test["assert"])
+        else:
+            case["expected_output"] = str(test["expected_output"])
+        case["stdin"] = str(test.get("stdin", ""))
+        cases.append(case)
+
+    # The whole report has to fit into the sandbox output
+    report_size = sum(_output_limit(case) + ERROR_LIMIT + 100 for case in cases)
+    if report_size > MAX_OUTPUT_SIZE:
+        raise GradingError("Expected outputs are too large to grade in one run.")
+    return cases
+
+
+def _output_limit(case: dict) -> int:
+    # Enough of the learner's stdout to compare it with the expected output
+    return len(case.get("expected_output", "")) + OUTPUT_SLACK
+
+
+def _normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+def _verdict(case: dict, result: dict) -> dict:
+    passed = result["exit_code"] == 0
+    if passed and "expected_output" in case:
+        passed = _normalize(result["stdout"]) == _normalize(case["expected_output"])
+    return {
+        "name": case["name"],
+        "passed": passed,
+        "time_ms": result["time_ms"],
+        "output": result["stdout"][-500:],
+        "error": result["error"],
+    }
+
+
+def _report_marker(code: str, cases: list) -> str:
+    # Deterministic per submission so identical submissions still hit the
+    # runner cache, but unknowable to the learner without SECRET_KEY.
+    message = json.dumps([code, cases], sort_keys=True).encode("utf-8")
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256)
+    return f"@@grader:{digest.hexdigest()}@@"
+
+
+def _parse_report(output: str, marker: str) -> dict | None:
+    for line in reversed(output.splitlines()):
+        if line.startswith(marker):
+            try:
+                return json.loads(line[len(marker) :])
+            except ValueError:
+                return None
+    return None
+
+
+def run_test_cases(code: str, cases: list, time_limit: int) -> list:
+    """Run ``code`` against all ``cases`` in one sandbox invocation.
+
+    Code that fails the static precheck fails every case without a sandbox run.
+    Cases that do not fit into ``MAX_TOTAL_TIMEOUT`` fail as timed out.
+    """
+    if settings.RUNNER_PRECHECK_ENABLED:
+        problem = check_code(code)
+        if problem is not None:
+            return [
+                {
+                    "name": case["name"],
+                    "passed": False,
+                    "time_ms": 0,
+                    "output": "",
+                    "error": problem["message"].strip()[-ERROR_LIMIT:],
+                }
+                for case in cases
+            ]
+
+    # Expected outputs never enter the sandbox
+    sandbox_cases = [
+        {
+            "name": case["name"],
+            "stdin": case["stdin"],
+            "output_limit": _output_limit(case),
+            **({"assert": case["assert"]} if "assert" in case else {}),
+        }
+        for case in cases
+    ]
+    marker = _report_marker(code, sandbox_cases)
+    timeout = min(time_limit * len(cases) + HARNESS_OVERHEAD, MAX_TOTAL_TIMEOUT)
+    payload = {
+        "code": code,
+        "cases": sandbox_cases,
+        "time_limit": time_limit,
+        # The harness stops starting cases in time to deliver its report
+        "deadline": timeout - HARNESS_OVERHEAD,
+        "error_limit": ERROR_LIMIT,
+        "marker": marker,
+    }
+    # The harness itself uses subprocess and time, so the precheck (above)
+    # and the cacheability check look at the learner's code only.
+    run = execute_python_code(
+        HARNESS,
+        timeout=timeout,
+        stdin=json.dumps(payload),
+        precheck=False,
+        deterministic=is_deterministic(code),
+    )
+    report = _parse_report(run.get("output", ""), marker)
+    if report is None:
+        raise GradingError(run.get("output") or "Sandbox returned no report.")
+    if "error" in report:
+        raise GradingError(report["error"])
+    return [_verdict(case, result) for case, result in zip(cases, report["cases"])]
+
+
+def grade_submission(user, task, code: str) -> dict:
+    """Grade ``code`` for ``task`` and record the attempt in ``TaskProgress``."""
+    cases = get_test_cases(task)
+    time_limit = get_time_limit(task)
+    results = run_test_cases(code, cases, time_limit)
+
+    passed = sum(1 for result in results if result["passed"])
+    score = passed * 100 // len(results)
+    completed = passed == len(results)
+
+    # The sandbox run happens outside the transaction; only the write is
+    # serialized per (user, task) row.
+    with transaction.atomic():
+        progress, _ = TaskProgress.objects.select_for_update().get_or_create(
+            user=user, task=task
+        )
+        progress.answer = {"code": code, "passed": passed, "total": len(results)}
+        progress.mark_attempt(score=score, completed=completed)
+
+    return {
+        "passed": passed,
+        "total": len(results),
+        "score": score,
+        "completed": completed,
+        "cases": results,
+        "progress": progress,
+    }
@@ -0,0 +1,82 @@
+"""Shared localization of content fields and request languages.
+
+Content models keep a base value (``title``) and per-language copies
+(``title_en``, ``title_ru``). The effective value for a language is resolved
+by one function for model instances and ``.values()`` rows alike, instead of
+a copy of the fallback chain in every model.
+
+Resolved catalog strings are not recomputed per request: catalog snapshots
+and the values readers render each language once per content version (see
+``game/catalog.py``).
+"""
+
+LANGUAGES = ("ru", "en")
+DEFAULT_LANGUAGE = "ru"
+
+# Set on the request by resolve_language()
+REQUEST_ATTR = "_resolved_language"
+
+
+def normalize_language(lang) -> str:
+    """``lang`` lower-cased if supported, otherwise the default language."""
+    lang = (lang or DEFAULT_LANGUAGE).lower()
+    return lang if lang in LANGUAGES else DEFAULT_LANGUAGE
+
+
+def localized_value(get, field: str, lang: str) -> str:
+    """Effective ``field`` for ``lang``; ``get(name)`` reads a raw value.
+
+    Order: the language's own copy, the base value, the other language's
+    copy. Blank strings count as missing.
+    """
+    lang = normalize_language(lang)
+    value = get(f"{field}_{lang}") or ""
+    if value.strip():
+        return value
+    fallback = get(field) or ""
+    if fallback.strip():
+        return fallback
+    other_lang = "en" if lang == "ru" else "ru"
+    return get(f"{field}_{other_lang}") or ""
+
+
+def localized_row(row, field: str, lang: str, prefix: str = "") -> str:
+    """:func:`localized_value` on a ``.values()`` row, columns under ``prefix``."""
+    return localized_value(lambda name: row.get(prefix + name), field, lang)
+
+
+def resolve_language(request, default=DEFAULT_LANGUAGE) -> str:
+    """Preferred language from ``?lang=`` or ``Accept-Language``.
+
+    Serializers ask for it per object and field, so the result is memoized
+    on the request.
+    """
+    if not request:
+        return default
+    cached = getattr(request, REQUEST_ATTR, None)
+    if cached is not None and cached[0] == default:
+        return cached[1]
+    lang = (
+        request.query_params.get("lang")
+        or request.headers.get("Accept-Language")
+        or default
+    )
+    lang = lang.split(",")[0].split("-")[0].strip().lower()
+    lang = lang if lang in LANGUAGES else default
+    setattr(request, REQUEST_ATTR, (default, lang))
+    return lang
+
+
+class LocalizedModelMixin:
+    """``get_localized_<field>()`` accessors for models with per-language copies."""
+
+    def _get_localized_value(self, field_name: str, lang: str = "ru") -> str:
+        return localized_value(lambda name: getattr(self, name, ""), field_name, lang)
+
+    def get_localized_title(self, lang: str = "ru") -> str:
+        """Return title for requested language with sensible fallbacks."""
+        return self._get_localized_value("title", lang)
+
+    def get_localized_description(self, lang: str = "ru") -> str:
+        """Return description for requested language with sensible fallbacks."""
+        return self._get_localized_value("description", lang)
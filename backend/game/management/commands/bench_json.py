@@ -0,0 +1,47 @@
+"""Management command: compare JSON render time of the tracks payload."""
+
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.fastjson import FastJSONRenderer, orjson
+from game.views import TrackViewSet
+
+
+class Command(BaseCommand):
+    """Render the full ``/api/tracks/`` payload with the stock and fast renderers."""
+
+    help = "Benchmark JSON rendering of the tracks payload (stdlib vs orjson)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--lang", default="ru")
+
+    def handle(self, *args, **options):
+        """Entry point for the management command."""
+        queryset = TrackViewSet.queryset.filter(is_active=True)
+        serializer = TrackViewSet.serializer_class(
+            queryset, many=True, context={"language": options["lang"]}
+        )
+        data = serializer.data
+        repeat = options["repeat"]
+
+        stock = self._time(JSONRenderer(), data, repeat)
+        fast = self._time(FastJSONRenderer(), data, repeat)
+        size = len(JSONRenderer().render(data))
+
+        self.stdout.write(f"Tracks payload: {size} bytes, {repeat} renders each")
+        self.stdout.write(f"  JSONRenderer:     {stock * 1000:.3f} ms/render")
+        self.stdout.write(f"  FastJSONRenderer: {fast * 1000:.3f} ms/render")
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("  orjson is not installed"))
+        self.stdout.write(self.style.SUCCESS(f"  Speedup: {stock / fast:.1f}x"))
+
+    @staticmethod
+    def _time(renderer, data, repeat) -> float:
+        renderer.render(data)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(data)
+        return (time.perf_counter() - start) / repeat
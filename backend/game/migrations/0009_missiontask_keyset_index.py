@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0008_alter_track_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="missiontask",
+            index=models.Index(
+                fields=["mission", "order", "id"], name="missiontask_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:24
+
+from collections import defaultdict
+import logging
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+logger = logging.getLogger(__name__)
+
+
+def closure(links):
+    # Frozen copy of game.prerequisites.compute_closure: migrations must not
+    # follow later changes of the app code. Missions on a cycle, or behind
+    # one, come back in ``blocked`` and get neither closure rows nor a depth.
+    requires = defaultdict(set)
+    dependents = defaultdict(set)
+    for mission_id, prerequisite_id in links:
+        requires[mission_id].add(prerequisite_id)
+        dependents[prerequisite_id].add(mission_id)
+    nodes = requires.keys() | dependents.keys()
+    pending = {node: len(requires[node]) for node in nodes}
+    ready = [node for node, count in pending.items() if not count]
+    ancestors, depths = {}, {}
+    while ready:
+        node = ready.pop()
+        ancestors[node] = set()
+        depths[node] = 0
+        for prerequisite_id in requires[node]:
+            ancestors[node] |= ancestors[prerequisite_id]
+            ancestors[node].add(prerequisite_id)
+            depths[node] = max(depths[node], depths[prerequisite_id] + 1)
+        for dependent in dependents[node]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                ready.append(dependent)
+    pairs = [
+        (mission_id, prerequisite_id)
+        for mission_id, required in ancestors.items()
+        for prerequisite_id in required
+    ]
+    return pairs, depths, set(nodes) - ancestors.keys()
+
+
+def build_closure(apps, schema_editor):
+    Mission = apps.get_model("game", "Mission")
+    Closure = apps.get_model("game", "MissionPrerequisiteClosure")
+    links = Mission.prerequisites.through.objects.values_list(
+        "from_mission_id", "to_mission_id"
+    )
+    pairs, depths, blocked = closure(links)
+    if blocked:
+        # Existing data predates cycle validation: report instead of failing
+        logger.warning(
+            "Mission prerequisites contain a cycle; no closure rows for "
+            "missions on or behind it: %s. Removing a link of the cycle "
+            "rebuilds the closure.",
+            sorted(blocked),
+        )
+    Closure.objects.bulk_create(
+        Closure(mission_id=mission_id, prerequisite_id=prerequisite_id)
+        for mission_id, prerequisite_id in pairs
+    )
+    by_depth = defaultdict(list)
+    for mission_id, depth in depths.items():
+        if depth:
+            by_depth[depth].append(mission_id)
+    for depth, mission_ids in by_depth.items():
+        Mission.objects.filter(id__in=mission_ids).update(depth=depth)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game", "0009_missiontask_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mission",
+            name="depth",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="MissionPrerequisiteClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "mission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closure_prerequisites",
+                        to="game.mission",
+                    ),
+                ),
+                (
+                    "prerequisite",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="closure_unlocks",
+                        to="game.mission",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["prerequisite", "mission"],
+                        name="mission_closure_unlocks_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="missionprerequisiteclosure",
+            constraint=models.UniqueConstraint(
+                fields=("mission", "prerequisite"), name="mission_closure_unique"
+            ),
+        ),
+        migrations.RunPython(build_closure, noop_reverse),
+    ]
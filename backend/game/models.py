@@ -1,10 +1,14 @@
 """Models for game entities: roles, locations, missions, and progress."""
 
 from django.db import models
+from django.db.models import Case, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .localization import LocalizedModelMixin, normalize_language
 
-class Track(models.Model):
+
+class Track(LocalizedModelMixin, models.Model):
     """Learning track (e.g., Python Path, Django Path)."""
 
     slug = models.SlugField(unique=True)
@@ -30,25 +34,6 @@ class Track(models.Model):
     def __str__(self):
         return self.get_localized_title()
 
-    def _get_localized_value(self, field_name: str, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        localized = getattr(self, f"{field_name}_{lang}", "") or ""
-        if localized.strip():
-            return localized
-        fallback = getattr(self, field_name, "") or ""
-        if fallback.strip():
-            return fallback
-        other_lang = "en" if lang == "ru" else "ru"
-        return getattr(self, f"{field_name}_{other_lang}", "") or ""
-
-    def get_localized_title(self, lang: str = "ru") -> str:
-        return self._get_localized_value("title", lang)
-
-    def get_localized_description(self, lang: str = "ru") -> str:
-        return self._get_localized_value("description", lang)
-
     def get_localized_tagline(self, lang: str = "ru") -> str:
         return self._get_localized_value("tagline", lang)
 
@@ -64,7 +49,7 @@ class ClassRole(models.Model):
         return self.name
 
 
-class Location(models.Model):
+class Location(LocalizedModelMixin, models.Model):
     """A named location that contains missions."""
 
     track = models.ForeignKey(
@@ -82,30 +67,8 @@ class Location(models.Model):
         """Return human-readable title for Location."""
         return self.get_localized_title()
 
-    def _get_localized_value(self, field_name: str, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        localized = getattr(self, f"{field_name}_{lang}", "") or ""
-        if localized.strip():
-            return localized
-        fallback = getattr(self, field_name, "") or ""
-        if fallback.strip():
-            return fallback
-        # fallback to the other language if available
-        other_lang = "en" if lang == "ru" else "ru"
-        return getattr(self, f"{field_name}_{other_lang}", "") or ""
-
-    def get_localized_title(self, lang: str = "ru") -> str:
-        """Return title for requested language with sensible fallbacks."""
-        return self._get_localized_value("title", lang)
-
-    def get_localized_description(self, lang: str = "ru") -> str:
-        """Return description for requested language with sensible fallbacks."""
-        return self._get_localized_value("description", lang)
-
 
-class Mission(models.Model):
+class Mission(LocalizedModelMixin, models.Model):
     """A mission which can be completed by a user to gain XP."""
 
     location = models.ForeignKey(
@@ -132,34 +95,55 @@ class Mission(models.Model):
     # Позиция ноды на карте (в процентах по контейнеру 0..100)
     pos_x = models.IntegerField(default=0)
     pos_y = models.IntegerField(default=0)
+    # Длина самой длинной цепочки prerequisites (0 — без требований);
+    # поддерживается game/prerequisites.py
+    depth = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         """Return human-readable title for Mission."""
         return self.get_localized_title()
 
-    def _get_localized_value(self, field_name: str, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        localized = getattr(self, f"{field_name}_{lang}", "") or ""
-        if localized.strip():
-            return localized
-        fallback = getattr(self, field_name, "") or ""
-        if fallback.strip():
-            return fallback
-        other_lang = "en" if lang == "ru" else "ru"
-        return getattr(self, f"{field_name}_{other_lang}", "") or ""
+    def all_prerequisites(self):
+        """Every mission required before this one, directly or transitively."""
+        return Mission.objects.filter(closure_unlocks__mission=self)
 
-    def get_localized_title(self, lang: str = "ru") -> str:
-        """Return mission title for requested language."""
-        return self._get_localized_value("title", lang)
+    def all_unlocks(self):
+        """Every mission that requires this one, directly or transitively."""
+        return Mission.objects.filter(closure_prerequisites__prerequisite=self)
 
-    def get_localized_description(self, lang: str = "ru") -> str:
-        """Return mission description for requested language."""
-        return self._get_localized_value("description", lang)
+
+class MissionPrerequisiteClosure(models.Model):
+    """Transitive closure of ``Mission.prerequisites``.
+
+    One row per mission and each mission required before it, however long
+    the chain. Rebuilt by ``game/prerequisites.py`` when prerequisites change.
+    """
+
+    mission = models.ForeignKey(
+        Mission, on_delete=models.CASCADE, related_name="closure_prerequisites"
+    )
+    prerequisite = models.ForeignKey(
+        Mission, on_delete=models.CASCADE, related_name="closure_unlocks"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mission", "prerequisite"], name="mission_closure_unique"
+            )
+        ]
+        # "Everything unlocked by X" seeks on the prerequisite
+        indexes = [
+            models.Index(
+                fields=["prerequisite", "mission"], name="mission_closure_unlocks_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.mission_id} <- {self.prerequisite_id}"
 
 
-class MissionTask(models.Model):
+class MissionTask(LocalizedModelMixin, models.Model):
     """Granular task/step inside a mission (Story, Quiz, Code, Project)."""
 
     TASK_TYPES = (
@@ -192,26 +176,16 @@ class MissionTask(models.Model):
 
     class Meta:
         ordering = ["mission", "order", "id"]
+        # Keyset pagination of /api/mission-tasks/ seeks on this key
+        indexes = [
+            models.Index(
+                fields=["mission", "order", "id"], name="missiontask_keyset_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.mission_id}:{self.order}:{self.get_localized_title()}"
 
-    def _get_localized_value(self, field_name: str, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        localized = getattr(self, f"{field_name}_{lang}", "") or ""
-        if localized.strip():
-            return localized
-        fallback = getattr(self, field_name, "") or ""
-        if fallback.strip():
-            return fallback
-        other_lang = "en" if lang == "ru" else "ru"
-        return getattr(self, f"{field_name}_{other_lang}", "") or ""
-
-    def get_localized_title(self, lang: str = "ru") -> str:
-        return self._get_localized_value("title", lang)
-
     def get_localized_body(self, lang: str = "ru") -> str:
         return self._get_localized_value("body", lang)
 
@@ -272,16 +246,10 @@ class Rank(models.Model):
         return f"{self.slug} ({self.title_en})"
 
     def get_localized_title(self, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        return getattr(self, f"title_{lang}", self.title_ru or self.title_en)
+        return getattr(self, f"title_{normalize_language(lang)}")
 
     def get_localized_description(self, lang: str = "ru") -> str:
-        lang = (lang or "ru").lower()
-        if lang not in {"ru", "en"}:
-            lang = "ru"
-        return getattr(self, f"description_{lang}", "")
+        return getattr(self, f"description_{normalize_language(lang)}")
 
 
 class LeaderboardEntry(models.Model):
@@ -347,20 +315,42 @@ class Progress(models.Model):
         unique_together = ("user", "mission")
 
     def start(self):
-        """Mark mission as started: increment attempts and timestamps."""
-        now = timezone.now()
-        self.attempts = (self.attempts or 0) + 1
-        if not self.started_at:
-            self.started_at = now
-        self.last_started_at = now
-        if self.status != "completed":
-            self.status = "in_progress"
-        self.save()
+        """Mark mission as started: increment attempts and timestamps.
 
-    def complete(self):
-        """Mark mission as completed with timestamp and status."""
-        if not self.completed:
-            self.completed = True
-            self.status = "completed"
-            self.completed_at = timezone.now()
-            self.save()
+        A single ``UPDATE`` that never writes ``completed``, ``xp_earned`` or
+        ``stars``, so a concurrent completion cannot be undone. Sends no
+        ``post_save``; the instance is refreshed with the stored values.
+        """
+        now = timezone.now()
+        Progress.objects.filter(pk=self.pk).update(
+            attempts=Coalesce(models.F("attempts"), 0) + 1,
+            started_at=Coalesce(models.F("started_at"), Value(now)),
+            last_started_at=now,
+            status=Case(
+                When(completed=True, then=Value("completed")),
+                When(status="completed", then=Value("completed")),
+                default=Value("in_progress"),
+            ),
+        )
+        self.refresh_from_db(
+            fields=["attempts", "started_at", "last_started_at", "status"]
+        )
+
+    def complete(self) -> bool:
+        """Mark mission as completed with timestamp and status.
+
+        A compare-and-set on ``completed``: of concurrent calls for the same
+        row only one flips it and gets True. Sends no ``post_save``.
+        """
+        won = Progress.objects.filter(pk=self.pk, completed=False).update(
+            completed=True, status="completed", completed_at=timezone.now()
+        )
+        self.refresh_from_db(fields=["completed", "status", "completed_at"])
+        return bool(won)
+
+    def record_result(self, xp_gain: int, stars: int):
+        """Add ``xp_gain`` to ``xp_earned`` (in SQL) and store ``stars``."""
+        Progress.objects.filter(pk=self.pk).update(
+            xp_earned=models.F("xp_earned") + xp_gain, stars=stars
+        )
+        self.refresh_from_db(fields=["xp_earned", "stars"])
@@ -0,0 +1,276 @@
+"""Mission prerequisite graph evaluated with bitmasks.
+
+Availability used to walk ``Mission.prerequisites`` for every mission of
+every request. The graph here is loaded once per content version (the
+catalog version, see ``game/catalog.py``) with one query of the
+``Mission.prerequisites`` links: the missions they name get dense indices,
+each mission's prerequisites become one integer bitmask, and a user's
+completed missions become another. A mission is unlocked when its
+mask has no bit outside the completion mask, so the unlocked set of the whole
+catalog is a single pass over the masks. Missions outside the graph have no
+prerequisites.
+
+The graph is shared by the threads of a process and must be treated as
+read-only.
+
+Writes keep the prerequisites a DAG: adding a link that would close a cycle
+raises ``ValidationError`` (admin forms show it as a field error), and every
+change rebuilds the transitive closure (:class:`MissionPrerequisiteClosure`)
+and ``Mission.depth``, so "everything required before X" and "everything X
+unlocks" are single indexed queries. Prerequisite writes are serialized by
+:func:`lock_links`. ``bulk_create()`` of links sends no signals; call
+:func:`rebuild_closure` after it.
+"""
+
+import logging
+import threading
+import zlib
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete
+
+from .models import Mission, MissionPrerequisiteClosure
+
+logger = logging.getLogger(__name__)
+
+CYCLE_MESSAGE = "A mission cannot require itself, directly or through other missions."
+# pg_advisory_xact_lock key shared by every prerequisite writer
+LOCK_KEY = zlib.crc32(b"game.mission.prerequisites")
+
+_graph = None
+_lock = threading.Lock()
+
+
+class PrerequisiteGraph:
+    """Prerequisites of all missions at one content version."""
+
+    def __init__(self, version: str, links):
+        links = list(links)
+        self.version = version
+        self.ids = sorted({mission_id for link in links for mission_id in link})
+        self.index = {mission_id: i for i, mission_id in enumerate(self.ids)}
+        self.masks = [0] * len(self.ids)
+        for from_id, to_id in links:
+            self.masks[self.index[from_id]] |= 1 << self.index[to_id]
+
+    @classmethod
+    def load(cls, version: str) -> "PrerequisiteGraph":
+        links = Mission.prerequisites.through.objects.values_list(
+            "from_mission_id", "to_mission_id"
+        )
+        return cls(version, links)
+
+    def mask(self, mission_ids) -> int:
+        """Bitmask of ``mission_ids``; missions unknown to the graph are ignored."""
+        result = 0
+        for mission_id in mission_ids:
+            i = self.index.get(mission_id)
+            if i is not None:
+                result |= 1 << i
+        return result
+
+    def unlocked_mask(self, completed: int) -> int:
+        """Bitmask of the missions whose prerequisites are all in ``completed``."""
+        result = 0
+        for i, required in enumerate(self.masks):
+            if not required & ~completed:
+                result |= 1 << i
+        return result
+
+    def unlocked(self, completed_ids) -> set:
+        """Ids of the missions unlocked by the completed ``completed_ids``."""
+        unlocked = self.unlocked_mask(self.mask(completed_ids))
+        return {
+            mission_id for i, mission_id in enumerate(self.ids) if unlocked >> i & 1
+        }
+
+    def is_unlocked(self, mission_id: int, unlocked: int) -> bool:
+        """Whether ``mission_id`` is in an :meth:`unlocked_mask` result."""
+        i = self.index.get(mission_id)
+        return i is None or bool(unlocked >> i & 1)
+
+    def prerequisites(self, mission_id: int) -> list:
+        """Ids of the mission's direct prerequisites."""
+        i = self.index.get(mission_id)
+        if i is None:
+            return []
+        mask = self.masks[i]
+        return [mission_id for j, mission_id in enumerate(self.ids) if mask >> j & 1]
+
+    def missing(self, mission_id: int, completed_ids) -> list:
+        """Direct prerequisites of the mission that are not in ``completed_ids``."""
+        completed_ids = set(completed_ids)
+        return [
+            pre_id
+            for pre_id in self.prerequisites(mission_id)
+            if pre_id not in completed_ids
+        ]
+
+
+def get_graph() -> PrerequisiteGraph:
+    """This process's graph, reloaded when the content version moves."""
+    # Late import: catalog imports the serializers, which use this module
+    from .catalog import get_version
+
+    global _graph
+    version = get_version()
+    graph = _graph
+    if graph is None or graph.version != version:
+        with _lock:
+            graph = _graph
+            if graph is None or graph.version != version:
+                graph = _graph = PrerequisiteGraph.load(version)
+    return graph
+
+
+def lock_links():
+    """Serialize prerequisite writes until the end of the transaction.
+
+    A cycle can close through missions neither writer touches (A->B and C->D
+    with B->C and D->A already in place), so row locks on the linked
+    missions are not enough: every writer takes one advisory lock. SQLite
+    serializes writers on its own.
+    """
+    connection = transaction.get_connection()
+    if connection.vendor == "postgresql" and connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOCK_KEY])
+
+
+def validate_links(mission_ids, prerequisite_ids):
+    """Refuse making ``prerequisite_ids`` required before ``mission_ids``
+    if that closes a cycle.
+
+    Call under :func:`lock_links`. The closure is current, so a cycle exists
+    exactly when one of the prerequisites already requires one of the
+    missions.
+    """
+    mission_ids, prerequisite_ids = set(mission_ids), set(prerequisite_ids)
+    if mission_ids & prerequisite_ids or (
+        MissionPrerequisiteClosure.objects.filter(
+            mission_id__in=prerequisite_ids, prerequisite_id__in=mission_ids
+        ).exists()
+    ):
+        raise ValidationError(CYCLE_MESSAGE, code="prerequisite_cycle")
+
+
+def compute_closure(links):
+    """``(pairs, depths, blocked)`` for ``(mission_id, prerequisite_id)`` links.
+
+    ``pairs`` holds every transitive ``(mission_id, prerequisite_id)`` and
+    ``depths`` maps linked missions to the length of their longest chain.
+    ``blocked`` are the missions on a cycle or behind one: they get neither
+    closure rows nor a depth.
+    """
+    requires = defaultdict(set)
+    dependents = defaultdict(set)
+    for mission_id, prerequisite_id in links:
+        requires[mission_id].add(prerequisite_id)
+        dependents[prerequisite_id].add(mission_id)
+    nodes = requires.keys() | dependents.keys()
+    # Kahn's algorithm: a mission is processed after all its prerequisites
+    pending = {node: len(requires[node]) for node in nodes}
+    ready = [node for node, count in pending.items() if not count]
+    ancestors, depths = {}, {}
+    while ready:
+        node = ready.pop()
+        ancestors[node] = set()
+        depths[node] = 0
+        for prerequisite_id in requires[node]:
+            ancestors[node] |= ancestors[prerequisite_id]
+            ancestors[node].add(prerequisite_id)
+            depths[node] = max(depths[node], depths[prerequisite_id] + 1)
+        for dependent in dependents[node]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                ready.append(dependent)
+    pairs = {
+        (mission_id, prerequisite_id)
+        for mission_id, required in ancestors.items()
+        for prerequisite_id in required
+    }
+    return pairs, depths, set(nodes) - ancestors.keys()
+
+
+def rebuild_closure():
+    """Bring the closure table and ``Mission.depth`` in line with the links.
+
+    Call under :func:`lock_links`. Only the difference is written;
+    ``update()`` keeps the catalog version (the link change has already
+    moved it). Cycles written past validation (``bulk_create()``) are
+    logged, and their missions left out, instead of failing the write.
+    """
+    links = Mission.prerequisites.through.objects.values_list(
+        "from_mission_id", "to_mission_id"
+    )
+    pairs, depths, blocked = compute_closure(links)
+    if blocked:
+        logger.warning(
+            "Mission prerequisites contain a cycle; missions on or behind it: %s",
+            sorted(blocked),
+        )
+
+    current = {
+        (mission_id, prerequisite_id): pk
+        for pk, mission_id, prerequisite_id in (
+            MissionPrerequisiteClosure.objects.values_list(
+                "id", "mission_id", "prerequisite_id"
+            )
+        )
+    }
+    stale = [pk for pair, pk in current.items() if pair not in pairs]
+    if stale:
+        MissionPrerequisiteClosure.objects.filter(id__in=stale).delete()
+    MissionPrerequisiteClosure.objects.bulk_create(
+        MissionPrerequisiteClosure(mission_id=mission_id, prerequisite_id=pre_id)
+        for mission_id, pre_id in pairs - current.keys()
+    )
+
+    stored = dict(Mission.objects.filter(depth__gt=0).values_list("id", "depth"))
+    changed = defaultdict(list)
+    for mission_id in stored.keys() | depths.keys():
+        depth = depths.get(mission_id, 0)
+        if stored.get(mission_id, 0) != depth:
+            changed[depth].append(mission_id)
+    for depth, mission_ids in changed.items():
+        Mission.objects.filter(id__in=mission_ids).update(depth=depth)
+
+
+def _prerequisites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("pre_"):
+        lock_links()
+    if action == "pre_add":
+        # reverse: instance.unlocks.add(...) makes instance a prerequisite
+        if reverse:
+            validate_links(pk_set, [instance.pk])
+        else:
+            validate_links([instance.pk], pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        rebuild_closure()
+
+
+def _rebuild_after_delete():
+    with transaction.atomic():
+        lock_links()
+        rebuild_closure()
+
+
+def _mission_deleted(sender, **kwargs):
+    # Chains through the deleted mission are gone with its links. A location
+    # deletes its missions one by one: rebuild once, after the commit.
+    connection = transaction.get_connection()
+    scheduled = (callback for _, callback, *_ in connection.run_on_commit)
+    if _rebuild_after_delete not in scheduled:
+        transaction.on_commit(_rebuild_after_delete)
+
+
+def connect_signals():
+    through = Mission.prerequisites.through
+    m2m_changed.connect(
+        _prerequisites_changed, sender=through, dispatch_uid="prerequisites:links"
+    )
+    post_delete.connect(
+        _mission_deleted, sender=Mission, dispatch_uid="prerequisites:mission"
+    )
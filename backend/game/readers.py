@@ -0,0 +1,255 @@
+"""Values-based read path for hot list endpoints.
+
+Serializing a list through ``ModelSerializer`` instantiates a model per row
+and walks every field object for it. The readers here build the very same
+dicts straight from ``.values()`` rows: the columns are fixed up front and
+localization works on the row itself. Their output must stay byte-identical
+to the serializers' (see ``tests/test_readers.py``); writes and detail views
+keep the serializers.
+
+A reader renders the anonymous view; per-user fields are overlaid by
+:func:`game.catalog.personalize` like for catalog snapshots.
+"""
+
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from .localization import localized_row, normalize_language
+from .models import Mission, MissionTask
+
+
+class ValuesReader:
+    """Turns ``.values(*columns)`` rows into serializer-shaped dicts."""
+
+    columns = ()
+
+    def rows(self, queryset):
+        """The queryset as value rows (prefetches do not apply to them)."""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def render(self, rows, language) -> list:
+        return [self.item(row, language) for row in rows]
+
+    def item(self, row, language) -> dict:
+        raise NotImplementedError
+
+    def read(self, queryset, language) -> list:
+        return self.render(list(self.rows(queryset)), language)
+
+
+class MissionTaskReader(ValuesReader):
+    """``MissionTaskSerializer`` output."""
+
+    columns = (
+        "id",
+        "mission_id",
+        "task_type",
+        "order",
+        "title",
+        "title_en",
+        "title_ru",
+        "body",
+        "body_en",
+        "body_ru",
+        "data",
+        "xp_reward",
+        "is_required",
+        "is_side_quest",
+        "estimated_minutes",
+    )
+
+    def item(self, row, language):
+        return {
+            "id": row["id"],
+            "task_type": row["task_type"],
+            "order": row["order"],
+            "title": localized_row(row, "title", language),
+            "title_en": row["title_en"],
+            "title_ru": row["title_ru"],
+            "body": row["body"],
+            "body_en": row["body_en"],
+            "body_ru": row["body_ru"],
+            "data": row["data"],
+            "xp_reward": row["xp_reward"],
+            "is_required": row["is_required"],
+            "is_side_quest": row["is_side_quest"],
+            "estimated_minutes": row["estimated_minutes"],
+            "language": language,
+        }
+
+
+class MissionReader(ValuesReader):
+    """``MissionSerializer`` output for anonymous users.
+
+    Prerequisites and tasks of the whole page are loaded with one query each,
+    like the viewset's prefetches.
+    """
+
+    columns = (
+        "id",
+        "title",
+        "description",
+        "title_en",
+        "title_ru",
+        "description_en",
+        "description_ru",
+        "xp_reward",
+        "order",
+        "is_active",
+        "min_level",
+        "repeatable",
+        "repeat_xp_rate",
+        "pos_x",
+        "pos_y",
+    )
+    tasks = MissionTaskReader()
+
+    def render(self, rows, language):
+        ids = [row["id"] for row in rows]
+        prerequisites = self._load_prerequisites(ids, language)
+        tasks = defaultdict(list)
+        task_rows = self.tasks.rows(MissionTask.objects.filter(mission_id__in=ids))
+        for row in task_rows:
+            tasks[row["mission_id"]].append(self.tasks.item(row, language))
+        return [
+            self.item(
+                row,
+                language,
+                prerequisites.get(row["id"], []),
+                tasks.get(row["id"], []),
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _load_prerequisites(ids, language):
+        through = Mission.prerequisites.through.objects.filter(from_mission_id__in=ids)
+        links = through.order_by("from_mission_id", "to_mission_id").values(
+            "from_mission_id",
+            "to_mission_id",
+            "to_mission__title",
+            "to_mission__title_en",
+            "to_mission__title_ru",
+        )
+        prerequisites = defaultdict(list)
+        for link in links:
+            prerequisites[link["from_mission_id"]].append(
+                {
+                    "id": link["to_mission_id"],
+                    "title": localized_row(link, "title", language, "to_mission__"),
+                }
+            )
+        return prerequisites
+
+    def item(self, row, language, prerequisites=(), tasks=()):
+        return {
+            "id": row["id"],
+            "title": localized_row(row, "title", language),
+            "description": localized_row(row, "description", language),
+            "title_en": row["title_en"],
+            "title_ru": row["title_ru"],
+            "description_en": row["description_en"],
+            "description_ru": row["description_ru"],
+            "xp_reward": row["xp_reward"],
+            "order": row["order"],
+            "is_active": row["is_active"],
+            "min_level": row["min_level"],
+            "repeatable": row["repeatable"],
+            "repeat_xp_rate": row["repeat_xp_rate"],
+            "pos_x": row["pos_x"],
+            "pos_y": row["pos_y"],
+            "available": row["is_active"],
+            "user_progress": None,
+            "prerequisites": list(prerequisites),
+            "tasks": list(tasks),
+            "language": language,
+        }
+
+
+class RankReader(ValuesReader):
+    """``RankSerializer`` output."""
+
+    columns = (
+        "id",
+        "slug",
+        "title_en",
+        "title_ru",
+        "description_en",
+        "description_ru",
+        "min_level",
+        "min_xp",
+        "order",
+        "icon_url",
+    )
+
+    def item(self, row, language):
+        # Rank titles have no fallback: see Rank.get_localized_title()
+        lang = normalize_language(language)
+        return {
+            "id": row["id"],
+            "slug": row["slug"],
+            "title": row[f"title_{lang}"],
+            "title_en": row["title_en"],
+            "title_ru": row["title_ru"],
+            "description": row[f"description_{lang}"],
+            "description_en": row["description_en"],
+            "description_ru": row["description_ru"],
+            "min_level": row["min_level"],
+            "min_xp": row["min_xp"],
+            "order": row["order"],
+            "icon_url": row["icon_url"],
+            "language": language,
+        }
+
+
+class LeaderboardReader(ValuesReader):
+    """``LeaderboardEntrySerializer`` output."""
+
+    columns = (
+        "id",
+        "user_id",
+        "user__username",
+        "user__display_name",
+        "user__profile__level",
+        "user__profile__xp",
+        "track_id",
+        "track__slug",
+        "track__title",
+        "track__title_en",
+        "track__title_ru",
+        "track__color_theme",
+        "scope",
+        "period_label",
+        "xp_total",
+        "position",
+        "snapshot_at",
+    )
+    snapshot_at = serializers.DateTimeField()
+
+    def item(self, row, language):
+        track = None
+        if row["track_id"] is not None:
+            track = {
+                "id": row["track_id"],
+                "slug": row["track__slug"],
+                "title": localized_row(row, "title", language, "track__"),
+                "color_theme": row["track__color_theme"],
+            }
+        return {
+            "id": row["id"],
+            "user": row["user_id"],
+            "user_display": {
+                "id": row["user_id"],
+                "username": row["user__username"],
+                "display_name": row["user__display_name"] or row["user__username"],
+                "level": row["user__profile__level"],
+                "xp": row["user__profile__xp"],
+            },
+            "track": track,
+            "scope": row["scope"],
+            "period_label": row["period_label"],
+            "xp_total": row["xp_total"],
+            "position": row["position"],
+            "snapshot_at": self.snapshot_at.to_representation(row["snapshot_at"]),
+        }
@@ -1,57 +1,187 @@
-import docker
-from requests.exceptions import ReadTimeout
+import codecs
+
+from django.conf import settings
+
+from . import runner_admission, runner_cache, runner_precheck, runner_singleflight
+from .runner_backends import SandboxUnavailable, get_backend
 
 # ЗАЩИТА: Максимальный размер вывода в байтах (около 50 КБ)
-MAX_OUTPUT_SIZE = 50 * 1024 
+MAX_OUTPUT_SIZE = 50 * 1024
+
+TRUNCATED_MARKER = "\n\n... [ВЫВОД ОБРЕЗАН: Слишком много данных] ..."
+
+# Лимит времени запуска по умолчанию, секунды
+DEFAULT_TIMEOUT = 5
+
+
+def _timeout_message(timeout: int) -> str:
+    return f"Timeout: Код выполнялся дольше {timeout} секунд и был прерван."
+
+
+class _OutputBuffer:
+    """Копит вывод по потокам и следит за общим лимитом размера.
+
+    Байты декодируются инкрементально, поэтому многобайтовый символ на
+    границе чанков не превращается в мусор.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+        self.parts = []
+        self.streams = {"stdout": [], "stderr": []}
+        self._decoders = {
+            name: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for name in self.streams
+        }
+
+    def feed(self, stream: str, data: bytes) -> str:
+        """Принимает чанк и возвращает его текст (обрезанный по лимиту)."""
+        room = self.limit - self.size
+        if len(data) > room:
+            data = data[:room]
+            self.truncated = True
+        self.size += len(data)
+        text = self._decoders[stream].decode(data)
+        self._append(stream, text)
+        return text
+
+    def _append(self, stream: str, text: str):
+        if text:
+            self.streams[stream].append(text)
+            self.parts.append(text)
+
+    def result(self, exit_code=None, timed_out: bool = False, timeout: int = 0):
+        for name, decoder in self._decoders.items():
+            self._append(name, decoder.decode(b"", final=True))
+        output = "".join(self.parts)
+        result = {
+            "stdout": "".join(self.streams["stdout"]),
+            "stderr": "".join(self.streams["stderr"]),
+        }
+        if timed_out:
+            result.update(status="error", output=_timeout_message(timeout))
+        elif self.truncated:
+            # Песочницу убили на лимите — код выхода ничего не значит
+            result.update(status="error", output=output + TRUNCATED_MARKER)
+        else:
+            status = "success" if exit_code == 0 else "error"
+            result.update(status=status, output=output, exit_code=exit_code)
+        return result
+
+
+def execute_python_code(
+    code: str,
+    timeout: int = DEFAULT_TIMEOUT,
+    stdin: str = "",
+    use_cache: bool = True,
+    precheck: bool = True,
+    deterministic: bool | None = None,
+) -> dict:
+    """
+    Выполняет Python-код в изолированной песочнице.
+
+    Песочницу предоставляет бэкенд из ``RUNNER_BACKEND``: Docker (тёплый
+    пул ``RUNNER_POOL_ENABLED`` или новый контейнер на каждый запуск) или
+    локальный процесс с rlimits (``game/runner_local.py``).
+    Результаты завершившихся детерминированных программ кешируются по хешу
+    кода, stdin и лимитов; ``use_cache=False`` принудительно запускает код
+    заново. Одновременные одинаковые запуски объединяются: песочницу
+    запускает только один из них. Детерминированность определяется по
+    импортам ``code``; ``deterministic`` задаёт её явно (например, по коду
+    ученика, когда запускается обёртка проверки). Число одновременно работающих песочниц ограничено;
+    если очередь переполнена, бросается ``RunnerRejected``.
 
-def execute_python_code(code: str, timeout: int = 5) -> dict:
+    Код с синтаксической ошибкой, запрещённым импортом или слишком большой
+    не доходит до песочницы (``runner_precheck``); ``precheck=False``
+    отключает проверку для собственного кода сервера.
     """
-    Выполняет Python-код в полностью изолированном микро-контейнере.
+    if precheck and settings.RUNNER_PRECHECK_ENABLED:
+        problem = runner_precheck.check_code(code, stdin)
+        if problem is not None:
+            return {**runner_precheck.rejected_result(problem), "cached": False}
+
+    if deterministic is None:
+        deterministic = runner_cache.is_deterministic(code)
+    key = runner_cache.make_key(code, stdin, timeout=timeout)
+    if use_cache and deterministic and settings.RUNNER_CACHE_ENABLED:
+        cached = runner_cache.get_result(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    def run():
+        # Аренда слота должна пережить весь запуск, включая создание песочницы
+        with runner_admission.sandbox_slot(ttl=timeout + 30):
+            result = _execute(code, timeout, stdin)
+        # Таймауты и сбои песочницы зависят от нагрузки, их не кешируем
+        if deterministic and settings.RUNNER_CACHE_ENABLED and "exit_code" in result:
+            runner_cache.store_result(key, result)
+        return result
+
+    # Общий результат одновременных запусков — тот же кеш, только короче
+    if deterministic and settings.RUNNER_SINGLEFLIGHT_ENABLED:
+        # Лидер может до RUNNER_QUEUE_TIMEOUT простоять в очереди допуска и
+        # только потом запуститься: ведомые ждут и очередь, и сам запуск,
+        # иначе при всплеске они разойдутся по собственным песочницам
+        wait = timeout + settings.RUNNER_QUEUE_TIMEOUT + 5
+        result = runner_singleflight.run_once(key, run, timeout=wait)
+    else:
+        result = run()
+    return {**result, "cached": False}
+
+
+def stream_python_code(code: str, timeout: int = DEFAULT_TIMEOUT, stdin: str = ""):
+    """
+    Выполняет код и отдаёт вывод по мере появления.
+
+    Генерирует события ``("stdout" | "stderr", текст)`` и последним —
+    ``("result", dict)`` в том же формате, что ``execute_python_code``.
+    Как только вывод превышает ``MAX_OUTPUT_SIZE``, чтение прекращается,
+    а песочница убивается. Контроль допуска — на вызывающем.
     """
+    buffer = _OutputBuffer(MAX_OUTPUT_SIZE)
+    exit_info = {}
     try:
-        # Подключаемся к Docker-демону
-        client = docker.from_env()
+        events = _stream(code, timeout, stdin)
+        try:
+            for kind, payload in events:
+                if kind == "exit":
+                    exit_info = payload
+                    break
+                text = buffer.feed(kind, payload)
+                if text:
+                    yield kind, text
+                if buffer.truncated:
+                    break
+        finally:
+            # Закрытие генератора убивает песочницу, если она ещё работает
+            events.close()
+    except SandboxUnavailable as e:
+        yield "result", _error_result(str(e))
+        return
     except Exception as e:
-        return {"status": "error", "output": f"Docker недоступен: {str(e)}"}
+        yield "result", _error_result(f"Ошибка песочницы: {str(e)}")
+        return
 
-    container = None
-    try:
-        # Запускаем код в изолированном alpine-контейнере
-        container = client.containers.run(
-            image="python:3.11-alpine",
-            command=["python", "-c", code],
-            detach=True,           
-            mem_limit="128m",      
-            network_mode="none",   # Отключаем интернет
-        )
-
-        # Ждем завершения с жестким таймаутом
-        result = container.wait(timeout=timeout)
-        
-        # Получаем логи в виде сырых байтов
-        raw_logs = container.logs(stdout=True, stderr=True)
-        
-        # ЗАЩИТА ОТ ПЕРЕПОЛНЕНИЯ ПАМЯТИ
-        if len(raw_logs) > MAX_OUTPUT_SIZE:
-            raw_logs = raw_logs[:MAX_OUTPUT_SIZE] + b"\n\n... [ВЫВОД ОБРЕЗАН: Слишком много данных] ..."
-            
-        # Декодируем безопасно, игнорируя битые символы
-        logs = raw_logs.decode("utf-8", errors="replace")
-        
-        if result.get("StatusCode", 0) == 0:
-            return {"status": "success", "output": logs}
-        else:
-            return {"status": "error", "output": logs}
+    yield "result", buffer.result(
+        exit_code=exit_info.get("exit_code"),
+        timed_out=exit_info.get("timed_out", False),
+        timeout=timeout,
+    )
 
-    except ReadTimeout:
-        if container:
-            container.kill()
-        return {"status": "error", "output": f"Timeout: Код выполнялся дольше {timeout} секунд и был прерван."}
-    except Exception as e:
-        return {"status": "error", "output": f"Ошибка песочницы: {str(e)}"}
-    finally:
-        if container:
-            try:
-                container.remove(force=True)
-            except:
-                pass
\ No newline at end of file
+
+def _error_result(message: str) -> dict:
+    return {"status": "error", "output": message, "stdout": "", "stderr": ""}
+
+
+def _execute(code: str, timeout: int, stdin: str) -> dict:
+    result = None
+    for kind, payload in stream_python_code(code, timeout, stdin):
+        if kind == "result":
+            result = payload
+    return result
+
+
+def _stream(code: str, timeout: int, stdin: str):
+    return get_backend().stream(code, timeout, stdin)
@@ -0,0 +1,209 @@
+"""Контроль допуска и ограничение параллелизма код-раннера.
+
+Все ограничения общие для воркеров и реализованы арендой слотов в кеше
+Django: слот — это ключ, занятый через ``cache.add`` с TTL. Если воркер
+умер, не вернув слот, аренда просто истечёт, и ёмкость не «утечёт».
+
+* глобальный лимит одновременно работающих песочниц
+  (``RUNNER_MAX_CONCURRENCY``);
+* ограниченная очередь ожидающих слота (``RUNNER_MAX_QUEUE``) — при
+  переполнении или слишком долгом ожидании запрос сразу получает 503;
+* лимит одновременных запусков одного пользователя
+  (``RUNNER_MAX_PER_USER``) — при превышении 429.
+"""
+
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import runner_metrics
+
+SLOT_KEY = "runner:sem:{name}:{index}"
+
+METRICS = (
+    "admission_admitted",
+    "admission_wait_ms_total",
+    "admission_rejected_user",
+    "admission_rejected_queue",
+    "admission_timeouts",
+)
+
+
+class RunnerRejected(Exception):
+    """Запуск отклонён контролем допуска; содержит HTTP-статус и Retry-After."""
+
+    def __init__(self, detail: str, status_code: int, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LeaseSemaphore:
+    """Семафор на ``size`` слотов, арендуемых в общем кеше с TTL."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+
+    def _keys(self):
+        return [SLOT_KEY.format(name=self.name, index=i) for i in range(self.size)]
+
+    def try_acquire(self, ttl: int):
+        """Пытается занять свободный слот; возвращает аренду или ``None``."""
+        keys = self._keys()
+        if not keys:
+            return None
+        token = uuid.uuid4().hex
+        # Начинаем со случайного слота, чтобы воркеры не бились за первый
+        offset = random.randrange(len(keys))
+        for key in keys[offset:] + keys[:offset]:
+            if cache.add(key, token, timeout=ttl):
+                return key, token
+        return None
+
+    def release(self, lease):
+        release_lease(lease)
+
+    def in_use(self) -> int:
+        return len(cache.get_many(self._keys()))
+
+
+def release_lease(lease):
+    """Освобождает слот, если аренда всё ещё наша (не истекла и не перехвачена)."""
+    key, token = lease
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def renew_lease(lease, ttl: int) -> bool:
+    """Продлевает аренду на ``ttl`` секунд.
+
+    Если аренда уже истекла, но слот никто не занял, занимает его заново тем
+    же токеном. ``False`` — слот перехвачен другим запуском.
+    """
+    key, token = lease
+    if cache.get(key) == token and cache.touch(key, ttl):
+        return True
+    return cache.add(key, token, timeout=ttl)
+
+
+def _queue():
+    return LeaseSemaphore("queue", settings.RUNNER_MAX_QUEUE)
+
+
+def _slots():
+    return LeaseSemaphore("sandbox", settings.RUNNER_MAX_CONCURRENCY)
+
+
+def _user_slots(user_id):
+    return LeaseSemaphore(f"user:{user_id}", settings.RUNNER_MAX_PER_USER)
+
+
+def acquire_user_slot(user_id, ttl: int | None = None):
+    """Занимает один из слотов пользователя или бросает ``RunnerRejected`` (429).
+
+    Аренда живёт ``ttl`` секунд (по умолчанию ``RUNNER_ADMISSION_LEASE_TTL``);
+    вызывающий обязан освободить её через ``release_lease``.
+    """
+    lease = _user_slots(user_id).try_acquire(ttl or settings.RUNNER_ADMISSION_LEASE_TTL)
+    if lease is None:
+        runner_metrics.incr("admission_rejected_user")
+        raise RunnerRejected(
+            "Слишком много одновременных запусков. Дождитесь завершения предыдущих.",
+            status_code=429,
+            retry_after=settings.RUNNER_ADMISSION_RETRY_AFTER,
+        )
+    return lease
+
+
+def renew_user_slot(user_id, lease):
+    """Продлевает слот пользователя перед запуском отложенного задания.
+
+    Пока задание ждало в очереди Celery, аренда могла истечь и слот занял
+    другой запуск: тогда занимается свободный слот, а если их нет —
+    ``RunnerRejected`` (429). Возвращает действующую аренду.
+    """
+    if lease is not None and renew_lease(lease, settings.RUNNER_ADMISSION_LEASE_TTL):
+        return lease
+    return acquire_user_slot(user_id)
+
+
+@contextmanager
+def user_slot(user_id):
+    """Удерживает слот пользователя на время запуска."""
+    lease = acquire_user_slot(user_id)
+    try:
+        yield
+    finally:
+        release_lease(lease)
+
+
+@contextmanager
+def sandbox_slot(ttl: int):
+    """Ждёт свободную песочницу в ограниченной очереди и удерживает её.
+
+    ``ttl`` — срок аренды слота, он должен покрывать весь запуск.
+    """
+    slots = _slots()
+    lease = slots.try_acquire(ttl)
+    if lease is None:
+        lease = _wait_in_queue(slots, ttl)
+    else:
+        runner_metrics.incr("admission_admitted")
+    try:
+        yield
+    finally:
+        slots.release(lease)
+
+
+def _wait_in_queue(slots: LeaseSemaphore, ttl: int):
+    retry_after = settings.RUNNER_ADMISSION_RETRY_AFTER
+    wait_timeout = settings.RUNNER_QUEUE_TIMEOUT
+    queue = _queue()
+    ticket = queue.try_acquire(wait_timeout + 5)
+    if ticket is None:
+        runner_metrics.incr("admission_rejected_queue")
+        raise RunnerRejected(
+            "Песочница перегружена, попробуйте позже.",
+            status_code=503,
+            retry_after=retry_after,
+        )
+
+    started = time.monotonic()
+    deadline = started + wait_timeout
+    try:
+        while True:
+            lease = slots.try_acquire(ttl)
+            if lease is not None:
+                runner_metrics.incr("admission_admitted")
+                runner_metrics.incr(
+                    "admission_wait_ms_total",
+                    int((time.monotonic() - started) * 1000),
+                )
+                return lease
+            if time.monotonic() >= deadline:
+                runner_metrics.incr("admission_timeouts")
+                raise RunnerRejected(
+                    "Песочница перегружена, попробуйте позже.",
+                    status_code=503,
+                    retry_after=retry_after,
+                )
+            time.sleep(settings.RUNNER_ADMISSION_POLL_INTERVAL)
+    finally:
+        queue.release(ticket)
+
+
+def stats() -> dict:
+    data = runner_metrics.get_metrics(METRICS)
+    admitted = data["admission_admitted"]
+    data["avg_wait_ms"] = (
+        round(data["admission_wait_ms_total"] / admitted, 2) if admitted else 0
+    )
+    data["running"] = _slots().in_use()
+    data["queue_depth"] = _queue().in_use()
+    return data
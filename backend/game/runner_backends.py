@@ -0,0 +1,59 @@
+"""Подключаемые бэкенды песочницы код-раннера.
+
+Бэкенд отвечает только за сам запуск: получает код, stdin и лимит времени
+и генерирует события ``("stdout" | "stderr", bytes)`` по мере появления
+вывода, а последним — ``("exit", {"exit_code": int, "timed_out": bool})``.
+Кеш, single-flight, контроль допуска и лимит размера вывода живут выше, в
+``runner.py``, и одинаково работают с любым бэкендом.
+
+Бэкенд выбирается настройкой ``RUNNER_BACKEND``: короткое имя из
+``BACKENDS`` или полный путь к классу.
+"""
+
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    "docker": "game.runner_docker.DockerBackend",
+    "local": "game.runner_local.LocalBackend",
+    "zygote": "game.runner_zygote.ZygoteBackend",
+}
+
+# Код выхода процесса, убитого SIGKILL (128 + 9)
+KILLED_EXIT_CODE = 137
+
+
+class SandboxUnavailable(Exception):
+    """Песочница не может принять запуск (нет Docker, не создать процесс)."""
+
+
+class RunnerBackend:
+    """Базовый класс бэкенда песочницы."""
+
+    name = ""
+
+    def stream(self, code: str, timeout: int, stdin: str):
+        """Запускает код и генерирует события вывода и завершения.
+
+        Закрытие генератора до события ``exit`` обязано остановить
+        выполнение и освободить ресурсы песочницы.
+        """
+        raise NotImplementedError
+
+
+_backend = None
+_backend_path = None
+_lock = threading.Lock()
+
+
+def get_backend() -> RunnerBackend:
+    """Возвращает бэкенд из ``RUNNER_BACKEND`` (один экземпляр на процесс)."""
+    global _backend, _backend_path
+    path = BACKENDS.get(settings.RUNNER_BACKEND, settings.RUNNER_BACKEND)
+    with _lock:
+        if _backend is None or _backend_path != path:
+            _backend = import_string(path)()
+            _backend_path = path
+        return _backend
@@ -0,0 +1,149 @@
+"""Кеш результатов код-раннера с адресацией по содержимому.
+
+Ключ — sha256 от кода, stdin, бэкенда, образа и лимитов песочницы, поэтому
+повторный запуск того же фрагмента возвращает сохранённый результат без
+контейнера. Два уровня: LRU в памяти процесса (миллисекунды, без сети) и
+общий кеш Django с TTL, чтобы попадание работало между воркерами.
+
+Кешируются только детерминированные программы: код, импортирующий модули
+из ``RUNNER_CACHE_NONDETERMINISTIC_MODULES`` (``random``, ``time``...),
+каждый раз запускается заново — иначе бросок кубика показывал бы всем одно
+и то же число.
+"""
+
+import ast
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import runner_metrics
+from .runner_precheck import _imported_modules, _names
+
+RESULT_KEY = "runner:result:{digest}"
+
+# Меняйте при изменении формата результата, чтобы не отдавать старые записи
+CACHE_VERSION = 1
+
+METRICS = ("cache_hits", "cache_misses", "cache_evictions")
+
+
+def make_key(code: str, stdin: str = "", **limits) -> str:
+    """Считает ключ кеша для запуска с заданными кодом, stdin и лимитами."""
+    payload = {
+        "v": CACHE_VERSION,
+        "code": code,
+        "stdin": stdin,
+        "backend": settings.RUNNER_BACKEND,
+        "image": settings.RUNNER_IMAGE,
+        "mem_limit": settings.RUNNER_MEM_LIMIT,
+        **limits,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(code: str) -> bool:
+    """Можно ли переиспользовать результат ``code`` для того же stdin."""
+    return _is_deterministic(code, settings.RUNNER_CACHE_NONDETERMINISTIC_MODULES)
+
+
+@lru_cache(maxsize=256)
+def _is_deterministic(code: str, modules: str) -> bool:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        # Не запустится вовсе — и упадёт каждый раз одинаково
+        return True
+    nondeterministic = _names(modules)
+    for node in ast.walk(tree):
+        for module in _imported_modules(node):
+            if module.split(".")[0] in nondeterministic:
+                return False
+    return True
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кеш с TTL для одного процесса."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> int:
+        """Сохраняет значение и возвращает число вытесненных записей."""
+        evicted = 0
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def _get_local() -> LRUCache:
+    global _local
+    with _local_lock:
+        if _local is None:
+            _local = LRUCache(
+                max_entries=settings.RUNNER_CACHE_MAX_ENTRIES,
+                ttl=settings.RUNNER_CACHE_TTL,
+            )
+        return _local
+
+
+def get_result(key: str) -> dict | None:
+    """Ищет результат сначала в памяти процесса, затем в общем кеше."""
+    local = _get_local()
+    result = local.get(key)
+    if result is None:
+        result = cache.get(RESULT_KEY.format(digest=key))
+        if result is not None:
+            local.set(key, result)
+    runner_metrics.incr("cache_hits" if result is not None else "cache_misses")
+    return result
+
+
+def store_result(key: str, result: dict):
+    evicted = _get_local().set(key, result)
+    if evicted:
+        runner_metrics.incr("cache_evictions", evicted)
+    cache.set(RESULT_KEY.format(digest=key), result, timeout=settings.RUNNER_CACHE_TTL)
+
+
+def stats() -> dict:
+    data = runner_metrics.get_metrics(METRICS)
+    data["local_entries"] = len(_get_local())
+    return data
@@ -0,0 +1,292 @@
+"""Docker-бэкенд код-раннера и общий Docker-клиент.
+
+``docker.from_env()`` на каждый запуск заново создаёт HTTP-сессию поверх
+unix-сокета и согласовывает версию API. Здесь клиент один на процесс:
+создаётся лениво, держит пул соединений, периодически проверяется
+``ping`` и пересоздаётся после ``fork`` или обрыва соединения.
+"""
+
+import io
+import logging
+import os
+import socket
+import tarfile
+import threading
+import time
+
+import docker
+from django.conf import settings
+from docker.utils.socket import STDOUT, frames_iter
+from requests.exceptions import ConnectionError as DockerConnectionError
+
+from .runner_backends import KILLED_EXIT_CODE, RunnerBackend, SandboxUnavailable
+from .runner_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_pid = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _connect():
+    kwargs = {"max_pool_size": settings.RUNNER_DOCKER_MAX_POOL_SIZE}
+    # Зафиксированная версия API избавляет от запроса /version при подключении
+    if settings.RUNNER_DOCKER_API_VERSION:
+        kwargs["version"] = settings.RUNNER_DOCKER_API_VERSION
+    return docker.from_env(**kwargs)
+
+
+def get_docker_client():
+    """Возвращает общий клиент процесса, при необходимости переподключаясь."""
+    global _client, _pid, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _client is None or _pid != os.getpid():
+            _client = _connect()
+            _pid = os.getpid()
+            _checked_at = now
+        elif now - _checked_at > settings.RUNNER_DOCKER_HEALTHCHECK_INTERVAL:
+            try:
+                _client.ping()
+            except Exception:
+                logger.warning("Docker client failed health check, reconnecting")
+                _close(_client)
+                _client = _connect()
+            _checked_at = now
+        return _client
+
+
+def reset_docker_client():
+    """Сбрасывает клиент, чтобы следующий вызов переподключился."""
+    global _client
+    with _lock:
+        if _client is not None and _pid == os.getpid():
+            _close(_client)
+        _client = None
+
+
+def _close(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+def _forget_after_fork():
+    # Сокеты пула соединений принадлежат родителю: не закрываем их,
+    # а просто забываем клиента.
+    global _client, _lock
+    _client = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+# Код передаём через переменную окружения: так не нужно экранировать его
+# для shell. stdin в переменную не кладём — ядро ограничивает одну строку
+# окружения 128 КБ (MAX_ARG_STRLEN), а stdin бывает до мегабайта.
+STDIN_DIR = "/tmp"
+STDIN_NAME = ".runner-stdin"
+# Холодный контейнер: stdin кладётся файлом через put_archive до старта
+RUN_SCRIPT = f'python -c "$RUNNER_CODE" < {STDIN_DIR}/{STDIN_NAME}'
+# Тёплый контейнер: stdin пишется в сокет exec; процесс дополнительно
+# убивается по SIGKILL через timeout
+POOL_EXEC_SCRIPT = 'timeout -s KILL "$0" python -c "$RUNNER_CODE"'
+
+
+def stdin_archive(stdin: str) -> bytes:
+    """Tar-архив с файлом stdin, читать который может только root контейнера."""
+    data = stdin.encode("utf-8")
+    info = tarfile.TarInfo(STDIN_NAME)
+    info.size = len(data)
+    info.mode = 0o600
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class DockerBackend(RunnerBackend):
+    """Запуск в контейнере без сети: из тёплого пула или в новом контейнере."""
+
+    name = "docker"
+
+    def stream(self, code: str, timeout: int, stdin: str):
+        try:
+            # Общий клиент процесса: без нового подключения на каждый запуск
+            client = get_docker_client()
+        except Exception as e:
+            raise SandboxUnavailable(f"Docker недоступен: {str(e)}") from e
+        try:
+            if settings.RUNNER_POOL_ENABLED:
+                yield from self._stream_pooled(code, timeout, stdin)
+            else:
+                yield from self._stream_cold(client, code, timeout, stdin)
+        except DockerConnectionError:
+            # Соединение с демоном оборвалось — следующий запуск переподключится
+            reset_docker_client()
+            raise
+
+    @staticmethod
+    def _stream_pooled(code: str, timeout: int, stdin: str):
+        """Выполняет код через exec в заранее запущенном контейнере пула."""
+        pool = get_pool(get_docker_client)
+        item = pool.acquire()
+
+        dirty = True
+        container = item.container
+        # timeout -s KILL убивает только python: потомок после fork держит
+        # stdout exec открытым. Сторожевой таймер убивает весь контейнер.
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            try:
+                container.kill()
+            except Exception:
+                pass
+
+        try:
+            api = container.client.api
+            exec_id = api.exec_create(
+                container.id,
+                ["sh", "-c", POOL_EXEC_SCRIPT, str(timeout)],
+                stdin=True,
+                environment={"RUNNER_CODE": code},
+            )["Id"]
+            started = time.monotonic()
+            yield from _exec_stream(api, exec_id, stdin, timeout, kill)
+            if timed_out.is_set():
+                exit_code = KILLED_EXIT_CODE
+            else:
+                exit_code = api.exec_inspect(exec_id)["ExitCode"]
+            elapsed = time.monotonic() - started
+
+            # Убитый процесс мог оставить после себя что угодно — не переиспользуем
+            dirty = exit_code == KILLED_EXIT_CODE
+            yield "exit", {
+                "exit_code": exit_code,
+                "timed_out": timed_out.is_set()
+                or (exit_code == KILLED_EXIT_CODE and elapsed >= timeout),
+            }
+        finally:
+            # Если чтение прервали (лимит вывода, обрыв клиента), dirty=True и
+            # контейнер вместе с процессом будет удалён
+            pool.release(item, dirty=dirty)
+
+    @staticmethod
+    def _stream_cold(client, code: str, timeout: int, stdin: str):
+        """Выполняет код в отдельном контейнере, созданном под этот запуск."""
+        # Запускаем код в изолированном alpine-контейнере
+        container = client.containers.create(
+            image=settings.RUNNER_IMAGE,
+            command=["sh", "-c", RUN_SCRIPT],
+            environment={"RUNNER_CODE": code},
+            mem_limit=settings.RUNNER_MEM_LIMIT,
+            network_mode="none",  # Отключаем интернет
+        )
+        try:
+            container.put_archive(STDIN_DIR, stdin_archive(stdin))
+            container.start()
+        except BaseException:
+            container.remove(force=True)
+            raise
+
+        # Жёсткий таймаут: сторожевой таймер убивает контейнер
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            try:
+                container.kill()
+            except Exception:
+                pass
+
+        watchdog = threading.Timer(timeout, kill)
+        watchdog.start()
+        try:
+            for stdout, stderr in container.attach(
+                stdout=True, stderr=True, stream=True, logs=True, demux=True
+            ):
+                if stdout:
+                    yield "stdout", stdout
+                if stderr:
+                    yield "stderr", stderr
+            result = container.wait(timeout=timeout)
+            yield "exit", {
+                "exit_code": result.get("StatusCode", 0),
+                "timed_out": timed_out.is_set(),
+            }
+        finally:
+            watchdog.cancel()
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+
+
+def _exec_stream(api, exec_id: str, stdin: str, timeout=None, on_timeout=None):
+    """Запускает exec, отдаёт ему stdin через сокет и читает stdout/stderr.
+
+    С ``timeout`` чтение ограничено сроком: по его истечении вызывается
+    ``on_timeout`` (убить процесс) и сокет закрывается, а сам сокет не ждёт
+    данных дольше оставшегося времени, даже если таймер не сработал.
+    """
+    sock = api.exec_start(exec_id, socket=True)
+    raw = getattr(sock, "_sock", sock)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    expired = threading.Event()
+
+    def expire():
+        if expired.is_set():
+            return
+        expired.set()
+        if on_timeout is not None:
+            on_timeout()
+        try:
+            raw.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def remaining():
+        return max(deadline - time.monotonic(), 0.001)
+
+    def feed():
+        # Пишем из отдельного потока: процесс может заполнить stdout раньше,
+        # чем дочитает stdin, и тогда запись из этого потока встала бы
+        try:
+            raw.sendall(stdin.encode("utf-8"))
+            raw.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    watchdog = None
+    if deadline is not None:
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.start()
+        raw.settimeout(remaining())
+    writer = threading.Thread(target=feed, name="runner-exec-stdin", daemon=True)
+    writer.start()
+    try:
+        for stream, data in frames_iter(sock, tty=False):
+            if data:
+                yield ("stdout" if stream == STDOUT else "stderr"), data
+            if deadline is not None:
+                raw.settimeout(remaining())
+    except OSError:
+        # socket.timeout или сокет, закрытый сторожевым таймером
+        if deadline is None or (not expired.is_set() and time.monotonic() < deadline):
+            raise
+        expire()
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        # Разблокирует запись, если процесс завершился, не дочитав stdin
+        try:
+            raw.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
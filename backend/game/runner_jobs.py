@@ -0,0 +1,73 @@
+"""Асинхронные задания код-раннера поверх Celery.
+
+Состояние задания хранится в кеше Django (Redis в проде): кто его
+отправил, текущий статус и результат. Так эндпоинт опроса не зависит от
+result backend Celery и одинаково работает и в eager-режиме тестов.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+JOB_KEY = "runner:job:{job_id}"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+
+
+def _key(job_id: str) -> str:
+    return JOB_KEY.format(job_id=job_id)
+
+
+def _save(job_id: str, job: dict):
+    cache.set(_key(job_id), job, timeout=settings.RUNNER_JOB_TTL)
+
+
+def get_job(job_id: str) -> dict | None:
+    return cache.get(_key(job_id))
+
+
+def submit_job(
+    user_id: int,
+    code: str,
+    stdin: str = "",
+    use_cache: bool = True,
+    user_lease=None,
+) -> str:
+    """Регистрирует задание и ставит его в очередь Celery, возвращает его id.
+
+    ``user_lease`` — аренда слота пользователя (см. ``runner_admission``),
+    задание продлевает её при старте и освобождает по завершении.
+
+    Если брокер недоступен, исключение ``apply_async`` пробрасывается, а
+    запись о задании удаляется; аренду освобождает вызывающий.
+    """
+    from .tasks import execute_code_job
+
+    job_id = uuid.uuid4().hex
+    _save(job_id, {"user_id": user_id, "status": STATUS_QUEUED, "result": None})
+    try:
+        execute_code_job.apply_async(
+            args=[job_id, code],
+            kwargs={"stdin": stdin, "use_cache": use_cache, "user_lease": user_lease},
+            task_id=job_id,
+        )
+    except Exception:
+        cache.delete(_key(job_id))
+        raise
+    return job_id
+
+
+def mark_running(job_id: str):
+    job = get_job(job_id)
+    if job is not None:
+        job["status"] = STATUS_RUNNING
+        _save(job_id, job)
+
+
+def mark_done(job_id: str, result: dict):
+    job = get_job(job_id) or {"user_id": None}
+    job.update({"status": STATUS_DONE, "result": result})
+    _save(job_id, job)
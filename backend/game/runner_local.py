@@ -0,0 +1,231 @@
+"""Локальный бэкенд код-раннера: подпроцесс с rlimits вместо контейнера.
+
+Код запускается отдельным интерпретатором (``python -I``) во временном
+рабочем каталоге, с чистым окружением и в собственной группе процессов.
+Перед ``exec`` дочерний процесс:
+
+* уходит в новый сетевой namespace без интерфейсов (кроме ``lo``), если
+  ``RUNNER_LOCAL_ISOLATE_NETWORK`` — не получилось, запуск отклоняется;
+* получает rlimits: процессорное время, адресное пространство
+  (``RUNNER_MEM_LIMIT``), размер файла (``RUNNER_LOCAL_FILE_SIZE``) и
+  число процессов (``RUNNER_LOCAL_MAX_PROCESSES``);
+* если сервер работает от root — понижает права до ``RUNNER_LOCAL_UID``.
+
+Старт занимает десятки миллисекунд вместо сотен у контейнера, поэтому
+бэкенд подходит для CI, хостов без Docker и простых упражнений. Файловая
+система хоста при этом остаётся видимой (в пределах прав пользователя
+песочницы), так что для недоверенного кода в проде Docker надёжнее.
+"""
+
+import ctypes
+import os
+import resource
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+
+from .runner_backends import RunnerBackend, SandboxUnavailable
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+# Сколько байт читаем из канала за раз
+CHUNK_SIZE = 64 * 1024
+
+_SIZE_UNITS = {"b": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+
+# libc загружаем заранее: в дочернем процессе после fork только вызываем
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def parse_size(value) -> int:
+    """Переводит размер в формате Docker (``128m``, ``1g``, ``512k``) в байты."""
+    text = str(value).strip().lower()
+    if text and text[-1] in _SIZE_UNITS:
+        return int(float(text[:-1]) * _SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def _unshare(flags: int):
+    if _libc.unshare(flags) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def _write(path: str, data: str):
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def _isolate_network():
+    if os.getuid() == 0:
+        _unshare(CLONE_NEWNET)
+        return
+    # Без root сетевой namespace можно создать только вместе с user
+    # namespace; отображаем в нём себя на себя, чтобы работали файлы.
+    uid, gid = os.getuid(), os.getgid()
+    _unshare(CLONE_NEWUSER | CLONE_NEWNET)
+    _write("/proc/self/setgroups", "deny")
+    _write("/proc/self/uid_map", f"{uid} {uid} 1")
+    _write("/proc/self/gid_map", f"{gid} {gid} 1")
+
+
+def _sandbox_child(limits: dict):
+    """Выполняется в дочернем процессе между ``fork`` и ``exec``."""
+    if limits["isolate_network"]:
+        _isolate_network()
+    cpu = limits["cpu"]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (limits["memory"], limits["memory"]))
+    resource.setrlimit(
+        resource.RLIMIT_FSIZE, (limits["file_size"], limits["file_size"])
+    )
+    resource.setrlimit(
+        resource.RLIMIT_NPROC, (limits["processes"], limits["processes"])
+    )
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    drop_privileges(limits["uid"])
+
+
+def drop_privileges(uid: int):
+    """Понижает права до ``uid``, если процесс работает от root."""
+    if os.getuid() == 0 and uid != 0:
+        os.setgroups([])
+        os.setgid(uid)
+        os.setuid(uid)
+
+
+def write_private(path: str, content: str):
+    """Пишет файл, доступный только серверу.
+
+    Так пишется stdin: песочница получает его готовым дескриптором, а
+    открыть файл по пути код под другим uid не может.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with open(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def make_workdir(uid: int) -> str:
+    """Создаёт временный рабочий каталог, доступный пользователю песочницы."""
+    workdir = tempfile.mkdtemp(prefix="runner-")
+    if os.getuid() == 0 and uid != 0:
+        os.chown(workdir, uid, uid)
+    return workdir
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _wait_exited(proc, deadline: float) -> bool:
+    """Ждёт завершения процесса, не забирая его статус.
+
+    Пока статус не забран, pid (и номер группы) не может достаться
+    другому процессу, поэтому после этого группу безопасно добивать.
+    """
+    while True:
+        flags = os.WEXITED | os.WNOHANG | os.WNOWAIT
+        if os.waitid(os.P_PID, proc.pid, flags) is not None:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+
+
+def _exit_code(returncode: int) -> int:
+    # Как у Docker и shell: процесс, убитый сигналом N, даёт код 128 + N
+    return 128 - returncode if returncode < 0 else returncode
+
+
+class LocalBackend(RunnerBackend):
+    """Запуск в локальном подпроцессе с rlimits и без сети."""
+
+    name = "local"
+
+    def stream(self, code: str, timeout: int, stdin: str):
+        workdir = make_workdir(settings.RUNNER_LOCAL_UID)
+        try:
+            proc = self._spawn(code, stdin, timeout, workdir)
+            try:
+                yield from self._communicate(proc, timeout)
+            finally:
+                # Чтение прервали или процесс завис — убиваем всю группу
+                if proc.returncode is None:
+                    _kill_group(proc)
+                    proc.wait()
+                proc.stdout.close()
+                proc.stderr.close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    @staticmethod
+    def _limits(timeout: int) -> dict:
+        return {
+            "cpu": max(1, int(timeout)),
+            "memory": parse_size(settings.RUNNER_MEM_LIMIT),
+            "file_size": parse_size(settings.RUNNER_LOCAL_FILE_SIZE),
+            "processes": settings.RUNNER_LOCAL_MAX_PROCESSES,
+            "uid": settings.RUNNER_LOCAL_UID,
+            "isolate_network": settings.RUNNER_LOCAL_ISOLATE_NETWORK,
+        }
+
+    def _spawn(self, code: str, stdin: str, timeout: int, workdir: str):
+        limits = self._limits(timeout)
+        stdin_path = os.path.join(workdir, ".stdin")
+        write_private(stdin_path, stdin)
+        python = settings.RUNNER_LOCAL_PYTHON or sys.executable
+        env = {"PATH": "/usr/local/bin:/usr/bin:/bin", "HOME": workdir}
+        try:
+            with open(stdin_path, "rb") as stdin_file:
+                return subprocess.Popen(
+                    [python, "-I", "-X", "utf8", "-c", code],
+                    stdin=stdin_file,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=workdir,
+                    env=env,
+                    start_new_session=True,
+                    preexec_fn=lambda: _sandbox_child(limits),
+                )
+        except (OSError, subprocess.SubprocessError) as e:
+            raise SandboxUnavailable(f"Не удалось запустить песочницу: {e}") from e
+
+    @staticmethod
+    def _communicate(proc, timeout: int):
+        deadline = time.monotonic() + timeout
+        timed_out = False
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ, "stdout")
+            selector.register(proc.stderr, selectors.EVENT_READ, "stderr")
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, CHUNK_SIZE)
+                    if data:
+                        yield key.data, data
+                    else:
+                        selector.unregister(key.fileobj)
+
+        # Оба канала закрыты, но процесс мог их закрыть сам и продолжить работу
+        if not timed_out and not _wait_exited(proc, deadline):
+            timed_out = True
+        # Добиваем потомков, которые пережили основной процесс
+        _kill_group(proc)
+        returncode = proc.wait()
+        yield "exit", {
+            "exit_code": _exit_code(returncode),
+            "timed_out": timed_out or returncode == -signal.SIGXCPU,
+        }
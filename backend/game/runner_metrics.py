@@ -0,0 +1,94 @@
+"""Счётчики код-раннера, общие для всех воркеров.
+
+Значения лежат в кеше Django (Redis в проде), поэтому gunicorn-воркеры и
+celery-воркеры пишут в одни и те же счётчики. Ошибки кеша не должны
+ломать запуск кода, поэтому они только логируются.
+
+Счётчики горячих путей (``incr_buffered``) копятся в памяти процесса и
+уходят в кеш одним пакетом раз в ``FLUSH_INTERVAL`` секунд, а не сетевым
+запросом на каждое событие.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+METRIC_KEY = "runner:metrics:{name}"
+
+FLUSH_INTERVAL = 5.0
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def _key(name: str) -> str:
+    return METRIC_KEY.format(name=name)
+
+
+def incr(name: str, amount: int = 1):
+    """Увеличивает счётчик ``name`` на ``amount``."""
+    key = _key(name)
+    try:
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Ключа ещё нет: add не перезапишет значение, если его успел
+            # создать соседний воркер
+            cache.add(key, 0, timeout=None)
+            cache.incr(key, amount)
+    except Exception:
+        logger.warning("Failed to update runner metric %s", name, exc_info=True)
+
+
+def incr_buffered(name: str, amount: int = 1):
+    """Как ``incr``, но без похода в кеш на каждый вызов."""
+    with _pending_lock:
+        _pending[name] += amount
+        if time.monotonic() - _flushed_at < FLUSH_INTERVAL:
+            return
+    flush()
+
+
+def flush():
+    """Сбрасывает накопленные в процессе счётчики в общий кеш."""
+    global _flushed_at
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    for name, amount in pending.items():
+        incr(name, amount)
+
+
+def _forget_after_fork():
+    # Накопленное принадлежит родителю — он его и сбросит
+    global _pending_lock
+    _pending.clear()
+    _pending_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+atexit.register(flush)
+
+
+def get_metrics(names) -> dict:
+    """Возвращает текущие значения счётчиков (отсутствующие — 0).
+
+    Счётчики этого процесса сбрасываются перед чтением; чужие процессы
+    отстают не больше чем на ``FLUSH_INTERVAL``.
+    """
+    flush()
+    try:
+        values = cache.get_many([_key(name) for name in names])
+    except Exception:
+        logger.warning("Failed to read runner metrics", exc_info=True)
+        values = {}
+    return {name: values.get(_key(name), 0) for name in names}
@@ -0,0 +1,287 @@
+"""Пул заранее запущенных sandbox-контейнеров для код-раннера.
+
+Вместо ``containers.run`` на каждый запрос держим несколько «тёплых»
+контейнеров без сети и с лимитом памяти. Код выполняется через ``exec``
+внутри уже запущенного контейнера, после чего контейнер либо возвращается
+в пул (если лимит повторных запусков не исчерпан и состояние не утекло),
+либо удаляется, а фоновый поток доливает пул до нужного размера.
+
+Пул свой у каждого процесса: при ``RUNNER_POOL_SIZE=4`` и четырёх
+gunicorn-воркерах плюс двух celery-воркерах простаивают 24 контейнера.
+Контейнеры помечены хостом и pid владельца; ``atexit`` не срабатывает при
+SIGKILL воркера, поэтому при старте пул удаляет контейнеры своего хоста,
+чей владелец уже умер.
+"""
+
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Метки, по которым находятся и подчищаются осиротевшие контейнеры пула:
+# pid владельца и хост, в пространстве pid которого этот pid имеет смысл
+POOL_LABEL = "diplom.runner.pool"
+POOL_HOST_LABEL = "diplom.runner.pool.host"
+
+# Процесс-заглушка, который держит контейнер живым между запусками
+IDLE_COMMAND = ["tail", "-f", "/dev/null"]
+
+
+class PooledContainer:
+    """Тёплый контейнер и его счётчики использования."""
+
+    __slots__ = ("container", "uses", "created_at", "last_used_at")
+
+    def __init__(self, container):
+        now = time.monotonic()
+        self.container = container
+        self.uses = 0
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ContainerPool:
+    """Потокобезопасный пул sandbox-контейнеров с фоновым пополнением."""
+
+    def __init__(
+        self,
+        client_factory,
+        *,
+        image: str,
+        mem_limit: str,
+        size: int = 4,
+        max_reuse: int = 1,
+        idle_timeout: int = 300,
+    ):
+        self._client_factory = client_factory
+        self.image = image
+        self.mem_limit = mem_limit
+        self.size = max(0, size)
+        self.max_reuse = max(1, max_reuse)
+        self.idle_timeout = idle_timeout
+        self._idle = deque()
+        self._spawning = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.pid = os.getpid()
+        self.host = socket.gethostname()
+
+    # --- жизненный цикл -------------------------------------------------
+
+    def start(self):
+        """Запускает фоновый поток пополнения (идемпотентно)."""
+        with self._lock:
+            if self._thread is not None or self._stopped:
+                return
+            self._thread = threading.Thread(
+                target=self._refill_loop, name="runner-pool-refill", daemon=True
+            )
+            self._thread.start()
+        self._background(self.reap_orphans)
+
+    def shutdown(self):
+        """Останавливает пополнение и удаляет все простаивающие контейнеры."""
+        with self._lock:
+            self._stopped = True
+            idle = list(self._idle)
+            self._idle.clear()
+        self._wakeup.set()
+        for item in idle:
+            self._remove(item.container)
+
+    # --- выдача и возврат -----------------------------------------------
+
+    def acquire(self) -> PooledContainer:
+        """Возвращает тёплый контейнер; если пул пуст — создаёт новый синхронно."""
+        with self._lock:
+            item = self._idle.popleft() if self._idle else None
+        self._wakeup.set()
+        if item is not None:
+            return item
+        return PooledContainer(self._spawn())
+
+    def release(self, item: PooledContainer, *, dirty: bool = False):
+        """Возвращает контейнер в пул или утилизирует его.
+
+        Контейнер утилизируется, если запуск «испачкал» его состояние,
+        исчерпан ``max_reuse`` или пул уже полон/остановлен.
+        """
+        item.uses += 1
+        item.last_used_at = time.monotonic()
+        if dirty or item.uses >= self.max_reuse:
+            self.discard(item)
+            return
+        # Проверка на утечку состояния — это пара вызовов Docker API,
+        # выносим её из пути запроса.
+        self._background(self._check_and_return, item)
+
+    def discard(self, item: PooledContainer):
+        """Удаляет контейнер в фоне и будит поток пополнения."""
+        self._background(self._remove, item.container)
+        self._wakeup.set()
+
+    def reap_orphans(self) -> int:
+        """Удаляет контейнеры пула этого хоста, чей процесс-владелец умер."""
+        try:
+            containers = self._client_factory().containers.list(
+                all=True, filters={"label": f"{POOL_HOST_LABEL}={self.host}"}
+            )
+        except Exception:  # Docker недоступен — подчистит следующий старт
+            logger.warning("Runner pool orphan cleanup failed", exc_info=True)
+            return 0
+        reaped = 0
+        for container in containers:
+            if not _pid_alive(container.labels.get(POOL_LABEL)):
+                self._remove(container)
+                reaped += 1
+        if reaped:
+            logger.info("Removed %d orphaned runner pool containers", reaped)
+        return reaped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "spawning": self._spawning,
+                "size": self.size,
+                "max_reuse": self.max_reuse,
+            }
+
+    # --- внутреннее -----------------------------------------------------
+
+    @staticmethod
+    def _background(func, *args):
+        threading.Thread(target=func, args=args, daemon=True).start()
+
+    def _spawn(self):
+        return self._client_factory().containers.run(
+            image=self.image,
+            command=IDLE_COMMAND,
+            detach=True,
+            mem_limit=self.mem_limit,
+            network_mode="none",  # Отключаем интернет
+            labels={POOL_LABEL: str(self.pid), POOL_HOST_LABEL: self.host},
+        )
+
+    @staticmethod
+    def has_leaked_state(container) -> bool:
+        """Проверяет, оставил ли запуск следы: процессы или изменения в ФС."""
+        processes = container.top().get("Processes") or []
+        if len(processes) > 1:
+            return True
+        return bool(container.diff())
+
+    def _check_and_return(self, item: PooledContainer):
+        try:
+            dirty = self.has_leaked_state(item.container)
+        except Exception:  # при сомнениях контейнер не переиспользуем
+            dirty = True
+        if not dirty:
+            with self._lock:
+                if not self._stopped and len(self._idle) < self.size:
+                    self._idle.append(item)
+                    return
+        self._remove(item.container)
+        self._wakeup.set()
+
+    @staticmethod
+    def _remove(container):
+        try:
+            container.remove(force=True)
+        except Exception:  # контейнер мог уже исчезнуть
+            logger.debug("Failed to remove pooled container", exc_info=True)
+
+    def _evict_expired(self):
+        deadline = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            while self._idle and self._idle[0].last_used_at < deadline:
+                expired.append(self._idle.popleft())
+        for item in expired:
+            self._remove(item.container)
+
+    def _refill_loop(self):
+        backoff = 1.0
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                missing = self.size - len(self._idle) - self._spawning
+                if missing > 0:
+                    self._spawning += 1
+            self._evict_expired()
+            if missing <= 0:
+                self._wakeup.wait(timeout=min(self.idle_timeout, 5))
+                self._wakeup.clear()
+                continue
+            try:
+                item = PooledContainer(self._spawn())
+            except Exception:  # Docker недоступен, пробуем позже
+                logger.warning("Runner pool refill failed", exc_info=True)
+                with self._lock:
+                    self._spawning -= 1
+                self._wakeup.wait(timeout=backoff)
+                self._wakeup.clear()
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            with self._lock:
+                self._spawning -= 1
+                keep = not self._stopped and len(self._idle) < self.size
+                if keep:
+                    self._idle.append(item)
+            if not keep:
+                self._remove(item.container)
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (TypeError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:  # процесс есть, но чужой
+        return True
+    return True
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(client_factory) -> ContainerPool:
+    """Возвращает пул текущего процесса, создавая его лениво.
+
+    После ``fork`` (gunicorn, celery prefork) потоки родителя не
+    наследуются, поэтому дочерний процесс заводит собственный пул.
+    """
+    global _pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ContainerPool(
+                client_factory,
+                image=settings.RUNNER_IMAGE,
+                mem_limit=settings.RUNNER_MEM_LIMIT,
+                size=settings.RUNNER_POOL_SIZE,
+                max_reuse=settings.RUNNER_POOL_MAX_REUSE,
+                idle_timeout=settings.RUNNER_POOL_IDLE_TIMEOUT,
+            )
+            _pool.start()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def pool_stats() -> dict | None:
+    """Статистика пула текущего процесса (``None``, если пул не создан)."""
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        return None
+    return pool.stats()
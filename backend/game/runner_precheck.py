@@ -0,0 +1,185 @@
+"""Статическая проверка кода до запуска песочницы.
+
+Код с синтаксической ошибкой, запрещённым импортом или превышением
+размера всё равно упадёт, но до этого займёт слот и поднимет контейнер.
+Здесь такие запуски отсекаются в процессе сервера за микросекунды: код
+компилируется в AST, а дерево проверяется по спискам
+``RUNNER_BANNED_IMPORTS`` и ``RUNNER_BANNED_ATTRIBUTES``. Атрибут в списке
+задаётся либо с модулем (``os.system`` — только у модуля ``os``, в том
+числе под псевдонимом и через ``from os import system``), либо без него
+(``__globals__`` — у любого объекта).
+
+Проверка не заменяет песочницу — динамический импорт через ``getattr`` и
+подобные трюки она не поймает. Её задача — не тратить запуск на код,
+который заведомо не пройдёт.
+"""
+
+import ast
+import traceback
+from functools import lru_cache
+
+from django.conf import settings
+
+from . import runner_metrics
+
+METRICS = ("precheck_passed", "precheck_rejected")
+
+# Функции, чей строковый аргумент — имя импортируемого модуля
+IMPORT_FUNCTIONS = {"__import__", "import_module"}
+
+
+@lru_cache(maxsize=8)
+def _names(value: str) -> frozenset:
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+def _problem(kind: str, message: str, line=None, column=None) -> dict:
+    return {"type": kind, "message": message, "line": line, "column": column}
+
+
+def _size_problem(code: str, stdin: str):
+    code_size = len(code.encode("utf-8"))
+    if code_size > settings.RUNNER_MAX_CODE_SIZE:
+        return _problem(
+            "size",
+            f"Код слишком большой: {code_size} байт "
+            f"(максимум {settings.RUNNER_MAX_CODE_SIZE}).",
+        )
+    stdin_size = len(stdin.encode("utf-8"))
+    if stdin_size > settings.RUNNER_MAX_STDIN_SIZE:
+        return _problem(
+            "size",
+            f"Слишком большой stdin: {stdin_size} байт "
+            f"(максимум {settings.RUNNER_MAX_STDIN_SIZE}).",
+        )
+    return None
+
+
+def _parse(code: str):
+    """Возвращает (AST, None) или (None, описание ошибки компиляции)."""
+    try:
+        tree = ast.parse(code, "<string>")
+        # compile ловит то, что пропускает парсер: return вне функции и т. п.
+        compile(tree, "<string>", "exec", dont_inherit=True)
+    except SyntaxError as exc:
+        # Тот же текст, что напечатал бы интерпретатор в песочнице
+        message = "".join(traceback.format_exception_only(type(exc), exc))
+        return None, _problem("syntax", message, exc.lineno, exc.offset)
+    except ValueError as exc:  # например, нулевой байт в исходнике
+        return None, _problem("syntax", f"{type(exc).__name__}: {exc}\n")
+    except (RecursionError, MemoryError):
+        return None, _problem("size", "Код слишком сложный для разбора.")
+    return tree, None
+
+
+def _imported_modules(node):
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        return [node.module]
+    if isinstance(node, ast.Call) and node.args:
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+        first = node.args[0]
+        if (
+            name in IMPORT_FUNCTIONS
+            and isinstance(first, ast.Constant)
+            and isinstance(first.value, str)
+        ):
+            return [first.value]
+    return []
+
+
+def _module_aliases(tree) -> dict:
+    """Имена, под которыми в коде доступны импортированные модули."""
+    aliases = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    aliases[alias.asname] = alias.name
+                else:
+                    top = alias.name.split(".")[0]
+                    aliases[top] = top
+    return aliases
+
+
+def _banned_attribute(node, aliases, banned):
+    """Запрещённое имя вида ``модуль.атрибут`` или ``атрибут``, если есть."""
+    if isinstance(node, ast.Attribute):
+        if node.attr in banned:
+            return node.attr
+        if isinstance(node.value, ast.Name) and node.value.id in aliases:
+            qualified = f"{aliases[node.value.id]}.{node.attr}"
+            if qualified in banned:
+                return qualified
+    if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        for alias in node.names:
+            qualified = f"{node.module}.{alias.name}"
+            if qualified in banned or alias.name in banned:
+                return qualified
+    return None
+
+
+def _banned_usage(tree):
+    banned_imports = _names(settings.RUNNER_BANNED_IMPORTS)
+    banned_attributes = _names(settings.RUNNER_BANNED_ATTRIBUTES)
+    aliases = _module_aliases(tree) if banned_attributes else {}
+    for node in ast.walk(tree):
+        for module in _imported_modules(node):
+            # Запрет пакета распространяется на его подмодули
+            if module.split(".")[0] in banned_imports or module in banned_imports:
+                return _problem(
+                    "banned_import",
+                    f"ImportError: импорт модуля '{module}' запрещён "
+                    f"(строка {node.lineno}).\n",
+                    node.lineno,
+                    node.col_offset + 1,
+                )
+        name = _banned_attribute(node, aliases, banned_attributes)
+        if name is not None:
+            return _problem(
+                "banned_attribute",
+                f"AttributeError: обращение к '{name}' запрещено "
+                f"(строка {node.lineno}).\n",
+                node.lineno,
+                node.col_offset + 1,
+            )
+    return None
+
+
+def check_code(code: str, stdin: str = "") -> dict | None:
+    """Проверяет код перед запуском.
+
+    Возвращает ``None``, если код можно отправлять в песочницу, иначе
+    описание проблемы: ``type`` (``size``, ``syntax``, ``banned_import``,
+    ``banned_attribute``), ``message``, ``line`` и ``column``.
+    """
+    problem = _size_problem(code, stdin)
+    if problem is None:
+        tree, problem = _parse(code)
+        if problem is None:
+            problem = _banned_usage(tree)
+    runner_metrics.incr_buffered("precheck_rejected" if problem else "precheck_passed")
+    return problem
+
+
+def rejected_result(problem: dict) -> dict:
+    """Результат в формате раннера для кода, не прошедшего проверку.
+
+    Кода выхода нет: программа не запускалась, поэтому результат не кешируется.
+    """
+    return {
+        "status": "error",
+        "output": problem["message"],
+        "stdout": "",
+        "stderr": problem["message"],
+        "precheck": problem,
+    }
+
+
+def stats() -> dict:
+    data = runner_metrics.get_metrics(METRICS)
+    # Каждый отклонённый запуск — это несостоявшийся старт песочницы
+    data["launches_saved"] = data["precheck_rejected"]
+    return data
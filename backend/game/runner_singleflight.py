@@ -0,0 +1,112 @@
+"""Single-flight для одинаковых запусков код-раннера.
+
+Если несколько запросов с одним и тем же ключом (хеш кода, stdin и
+лимитов) приходят одновременно, песочницу запускает только первый —
+«лидер», остальные ждут и получают его результат. Внутри процесса ожидание
+идёт через ``threading.Event``, между воркерами — через блокировку
+``cache.add`` и опубликованный лидером результат в общем кеше Django.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import runner_metrics
+
+LOCK_KEY = "runner:flight:{key}"
+RESULT_KEY = "runner:flight:{key}:{token}"
+
+METRICS = ("singleflight_leaders", "singleflight_coalesced")
+
+
+class _Call:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def run_once(key: str, func, *, timeout: int) -> dict:
+    """Выполняет ``func`` один раз на все одновременные вызовы с ``key``.
+
+    ``timeout`` — сколько максимум ждать чужой результат; он должен
+    покрывать всё время ``func`` лидера, включая ожидание в очереди
+    допуска. Если лидер не успел (или умер), вызывающий выполняет ``func`` сам.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.event.wait(timeout)
+        if call.result is not None:
+            runner_metrics.incr("singleflight_coalesced")
+            return call.result
+        return func()
+
+    try:
+        call.result = _run_shared(key, func, timeout)
+        return call.result
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.event.set()
+
+
+def _run_shared(key: str, func, timeout: int) -> dict:
+    lock_key = LOCK_KEY.format(key=key)
+    # Блокировка живёт дольше самого долгого запуска лидера (очередь плюс
+    # сам запуск, см. ``timeout``), но истекает, если он умер, не сняв её
+    lock_ttl = timeout * 2 + 10
+    deadline = time.monotonic() + timeout
+
+    while True:
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, timeout=lock_ttl):
+            return _lead(lock_key, key, token, func)
+
+        leader_token = cache.get(lock_key)
+        if leader_token is not None:
+            result = _wait_for_leader(lock_key, key, leader_token, deadline)
+            if result is not None:
+                runner_metrics.incr("singleflight_coalesced")
+                return result
+        if time.monotonic() >= deadline:
+            # Не дождались — запускаем сами, чтобы не зависнуть навсегда
+            return func()
+
+
+def _lead(lock_key: str, key: str, token: str, func) -> dict:
+    runner_metrics.incr("singleflight_leaders")
+    try:
+        result = func()
+        # Публикуем результат до снятия блокировки, чтобы ведомые его увидели
+        cache.set(RESULT_KEY.format(key=key, token=token), result, timeout=60)
+        return result
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _wait_for_leader(lock_key: str, key: str, token: str, deadline: float):
+    result_key = RESULT_KEY.format(key=key, token=token)
+    interval = settings.RUNNER_SINGLEFLIGHT_POLL_INTERVAL
+    while time.monotonic() < deadline:
+        result = cache.get(result_key)
+        if result is not None:
+            return result
+        if cache.get(lock_key) != token:
+            # Лидер закончил (результат уже опубликован) или умер
+            return cache.get(result_key)
+        time.sleep(interval)
+    return None
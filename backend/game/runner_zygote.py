@@ -0,0 +1,421 @@
+"""Zygote-режим локального бэкенда: запуск через ``fork`` готового интерпретатора.
+
+Обычный локальный запуск каждый раз платит за старт CPython и импорт
+``site``. Здесь на процесс сервера поднимается один долгоживущий
+интерпретатор-«зигота» (без сети и с пониженными правами, как и
+песочница), который заранее импортирует модули из
+``RUNNER_ZYGOTE_PRELOAD`` и на каждый запуск делает ``fork``. Потомок
+накладывает rlimits, переходит в рабочий каталог и выполняет код, так что
+стоимость запуска — это ``fork`` плюс само выполнение.
+
+Протокол: сервер подключается к unix-сокету зиготы и передаёт через
+``SCM_RIGHTS`` дескрипторы stdin и каналов stdout/stderr, а в JSON —
+рабочий каталог и лимит процессорного времени. Код лежит в каталоге в
+файле ``.code``. Зигота отвечает pid потомка, а после его завершения —
+кодом выхода. Закрытие соединения сервером убивает группу процессов
+потомка: так работают таймаут и лимит вывода.
+"""
+
+import atexit
+import json
+import os
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .runner_backends import SandboxUnavailable
+from .runner_local import (
+    CHUNK_SIZE,
+    LocalBackend,
+    _isolate_network,
+    drop_privileges,
+    make_workdir,
+    write_private,
+)
+
+ZYGOTE_SCRIPT = r"""
+import atexit, json, os, resource, selectors, signal, socket, sys, traceback, types
+
+config = json.loads(sys.argv[2])
+for name in config["preload"]:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+
+listener = socket.socket(fileno=int(sys.argv[1]))
+
+
+def exit_status(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run(code):
+    main = types.ModuleType("__main__")
+    sys.modules["__main__"] = main
+    sys.argv = ["-c"]
+    try:
+        exec(compile(code, "<string>", "exec"), main.__dict__)
+        status = 0
+    except SystemExit as exc:
+        status = exit_status(exc.code)
+    except BaseException as exc:
+        # Первый кадр — этот run(), пользователю он не нужен
+        tb = exc.__traceback__.tb_next
+        traceback.print_exception(type(exc), exc, tb)
+        status = 1
+    atexit._run_exitfuncs()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            status = status or 120
+    return status
+
+
+def child(request, fds):
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.setsid()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+        os.chdir(request["workdir"])
+        os.environ["HOME"] = request["workdir"]
+        cpu = request["cpu"]
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        memory, file_size = config["memory"], config["file_size"]
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+        processes = config["processes"]
+        resource.setrlimit(resource.RLIMIT_NPROC, (processes, processes))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        with open(".code", encoding="utf-8") as f:
+            code = f.read()
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(
+            2, "w", 1, "utf-8", "backslashreplace", closefd=False
+        )
+        # Без этого все потомки получили бы одну и ту же последовательность
+        if "random" in sys.modules:
+            sys.modules["random"].seed()
+    except BaseException:
+        traceback.print_exc()
+        os._exit(70)
+    os._exit(run(code))
+
+
+def send(conn, message):
+    try:
+        conn.sendall(json.dumps(message).encode() + b"\n")
+    except OSError:
+        pass
+
+
+def report_exits(sessions):
+    # Статус читаем с WNOWAIT: потомок остаётся зомби, и его pid (он же
+    # номер группы) не достанется другому процессу, пока сервер не закроет
+    # соединение и мы не добьём оставшуюся группу.
+    for pid, session in sessions.items():
+        if session["reported"]:
+            continue
+        flags = os.WEXITED | os.WNOHANG | os.WNOWAIT
+        info = os.waitid(os.P_PID, pid, flags)
+        if info is None:
+            continue
+        if info.si_code == os.CLD_EXITED:
+            exit_code = info.si_status
+        else:
+            exit_code = -info.si_status
+        session["reported"] = True
+        send(session["conn"], {"exit_code": exit_code})
+
+
+def finish(pid, sessions, selector):
+    session = sessions.pop(pid)
+    selector.unregister(session["conn"])
+    session["conn"].close()
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    os.waitpid(pid, 0)
+
+
+wakeup_r, wakeup_w = os.pipe()
+os.set_blocking(wakeup_w, False)
+signal.set_wakeup_fd(wakeup_w)
+signal.signal(signal.SIGCHLD, lambda *args: None)
+
+sessions = {}
+selector = selectors.DefaultSelector()
+selector.register(listener, selectors.EVENT_READ, "accept")
+selector.register(wakeup_r, selectors.EVENT_READ, "reap")
+while True:
+    for key, _ in selector.select():
+        if key.data == "accept":
+            conn, _ = listener.accept()
+            message, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+            if len(fds) != 3:
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                continue
+            pid = os.fork()
+            if pid == 0:
+                child(json.loads(message), fds)
+            for fd in fds:
+                os.close(fd)
+            sessions[pid] = {"conn": conn, "reported": False}
+            selector.register(conn, selectors.EVENT_READ, pid)
+            send(conn, {"pid": pid})
+        elif key.data == "reap":
+            os.read(wakeup_r, 4096)
+            report_exits(sessions)
+        elif not key.fileobj.recv(4096):
+            # Сервер закрыл соединение: вывод дочитан, истёк таймаут или
+            # превышен лимит вывода — добиваем группу и забираем потомка
+            finish(key.data, sessions, selector)
+"""
+
+
+class Zygote:
+    """Процесс-зигота и unix-сокет, через который ему передаются запуски."""
+
+    def __init__(self, limits: dict, preload: list):
+        self.limits = limits
+        self.preload = preload
+        self.pid = os.getpid()
+        self._dir = tempfile.mkdtemp(prefix="runner-zygote-")
+        self.path = os.path.join(self._dir, "zygote.sock")
+        self._proc = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            listener.bind(self.path)
+            listener.listen(128)
+            config = {
+                "preload": self.preload,
+                "memory": self.limits["memory"],
+                "file_size": self.limits["file_size"],
+                "processes": self.limits["processes"],
+            }
+            python = settings.RUNNER_LOCAL_PYTHON or sys.executable
+            self._proc = subprocess.Popen(
+                [
+                    python,
+                    "-I",
+                    "-X",
+                    "utf8",
+                    "-c",
+                    ZYGOTE_SCRIPT,
+                    str(listener.fileno()),
+                    json.dumps(config),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                cwd="/",
+                env={"PATH": "/usr/local/bin:/usr/bin:/bin"},
+                pass_fds=(listener.fileno(),),
+                start_new_session=True,
+                preexec_fn=self._sandbox,
+            )
+        finally:
+            # Сокет теперь принадлежит зиготе
+            listener.close()
+
+    def _sandbox(self):
+        if self.limits["isolate_network"]:
+            _isolate_network()
+        drop_privileges(self.limits["uid"])
+
+    def connect(self) -> socket.socket:
+        """Подключается к зиготе, (пере)запуская её при необходимости."""
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def shutdown(self):
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+class _Connection:
+    """Читает построчные JSON-сообщения зиготы."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._buffer = b""
+
+    def read_message(self, data: bytes = b""):
+        self._buffer += data
+        if b"\n" not in self._buffer:
+            return None
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def wait_message(self, timeout: float):
+        self.sock.settimeout(timeout)
+        try:
+            while True:
+                message = self.read_message()
+                if message is not None:
+                    return message
+                data = self.sock.recv(4096)
+                if not data:
+                    raise ConnectionError("zygote closed the connection")
+                self._buffer += data
+        finally:
+            self.sock.settimeout(None)
+
+
+class ZygoteBackend(LocalBackend):
+    """Локальный бэкенд, запускающий код через ``fork`` зиготы."""
+
+    name = "zygote"
+
+    # Сколько ждём ответ зиготы с pid потомка (включая её первый старт)
+    SPAWN_TIMEOUT = 10
+
+    def stream(self, code: str, timeout: int, stdin: str):
+        workdir = make_workdir(settings.RUNNER_LOCAL_UID)
+        try:
+            with open(os.path.join(workdir, ".code"), "w", encoding="utf-8") as f:
+                f.write(code)
+            write_private(os.path.join(workdir, ".stdin"), stdin)
+            stdout_r, stdout_w = os.pipe()
+            stderr_r, stderr_w = os.pipe()
+            with (
+                open(stdout_r, "rb", buffering=0) as stdout,
+                open(stderr_r, "rb", buffering=0) as stderr,
+            ):
+                try:
+                    conn = self._submit(workdir, timeout, stdout_w, stderr_w)
+                finally:
+                    os.close(stdout_w)
+                    os.close(stderr_w)
+                # Закрытие соединения убивает потомка, если он ещё работает
+                with conn.sock:
+                    yield from self._relay(conn, stdout, stderr, timeout)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _submit(self, workdir: str, timeout: int, stdout_w: int, stderr_w: int):
+        request = {"workdir": workdir, "cpu": max(1, int(timeout))}
+        stdin_fd = os.open(os.path.join(workdir, ".stdin"), os.O_RDONLY)
+        try:
+            sock = get_zygote(self._limits(timeout)).connect()
+            try:
+                socket.send_fds(
+                    sock, [json.dumps(request).encode()], [stdin_fd, stdout_w, stderr_w]
+                )
+                conn = _Connection(sock)
+                conn.wait_message(self.SPAWN_TIMEOUT)
+            except BaseException:
+                sock.close()
+                raise
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            raise SandboxUnavailable(f"Зигота недоступна: {e}") from e
+        finally:
+            os.close(stdin_fd)
+        return conn
+
+    @staticmethod
+    def _relay(conn: _Connection, stdout, stderr, timeout: int):
+        deadline = time.monotonic() + timeout
+        exit_code = None
+        pipes = 2
+        with selectors.DefaultSelector() as selector:
+            selector.register(stdout, selectors.EVENT_READ, "stdout")
+            selector.register(stderr, selectors.EVENT_READ, "stderr")
+            selector.register(conn.sock, selectors.EVENT_READ, "status")
+            while pipes or exit_code is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Потомка убьёт зигота, когда мы закроем соединение
+                    yield "exit", {"exit_code": None, "timed_out": True}
+                    return
+                for key, _ in selector.select(remaining):
+                    if key.data == "status":
+                        data = conn.sock.recv(4096)
+                        if not data:
+                            raise SandboxUnavailable(
+                                "Зигота завершилась во время запуска"
+                            )
+                        message = conn.read_message(data)
+                        if message is not None:
+                            exit_code = message["exit_code"]
+                            selector.unregister(conn.sock)
+                        continue
+                    data = os.read(key.fd, CHUNK_SIZE)
+                    if data:
+                        yield key.data, data
+                    else:
+                        selector.unregister(key.fileobj)
+                        pipes -= 1
+
+        yield "exit", {
+            "exit_code": 128 - exit_code if exit_code < 0 else exit_code,
+            # SIGXCPU: исчерпан лимит процессорного времени
+            "timed_out": exit_code == -signal.SIGXCPU,
+        }
+
+
+_zygote = None
+_zygote_lock = threading.Lock()
+
+
+def get_zygote(limits: dict) -> Zygote:
+    """Возвращает зиготу текущего процесса, создавая её лениво.
+
+    Зигота пересоздаётся после ``fork`` сервера и при смене лимитов.
+    """
+    global _zygote
+    # Лимит CPU задаётся на каждый запуск, остальные — при старте зиготы
+    limits = {name: value for name, value in limits.items() if name != "cpu"}
+    preload = [
+        name.strip()
+        for name in settings.RUNNER_ZYGOTE_PRELOAD.split(",")
+        if name.strip()
+    ]
+    with _zygote_lock:
+        current = _zygote
+        if (
+            current is None
+            or current.pid != os.getpid()
+            or current.limits != limits
+            or current.preload != preload
+        ):
+            if current is not None and current.pid == os.getpid():
+                current.shutdown()
+            _zygote = Zygote(limits, preload)
+            atexit.register(_zygote.shutdown)
+        return _zygote
@@ -1,8 +1,9 @@
 """Serializers for game models used in API endpoints."""
 
 from rest_framework import serializers
-from users.models import Profile
 
+from . import prerequisites
+from .localization import resolve_language
 from .models import (
     LeaderboardEntry,
     Location,
@@ -15,36 +16,208 @@ from .models import (
 )
 
 
-def _resolve_language(request, default="ru"):
-    """Resolve preferred language from query params or headers."""
-    if not request:
-        return default
-    lang = (
-        request.query_params.get("lang")
-        or request.headers.get("Accept-Language")
-        or default
-    )
-    lang = lang.split(",")[0].split("-")[0].strip().lower()
-    return lang if lang in {"ru", "en"} else default
+def _context_language(context):
+    """Language pinned in the context (catalog snapshots) or taken from the request."""
+    return context.get("language") or resolve_language(context.get("request"))
+
+
+USER_PROGRESS_FIELDS = (
+    "completed",
+    "status",
+    "attempts",
+    "xp_earned",
+    "stars",
+    "completed_at",
+)
+
+EMPTY_USER_PROGRESS = {
+    "completed": False,
+    "status": "not_started",
+    "attempts": 0,
+    "xp_earned": 0,
+    "stars": 0,
+    "completed_at": None,
+}
+
+
+class UserProgressState:
+    """The requesting user's profile and mission progress, loaded once.
+
+    Kept in the serializer context, which nested serializers share, so a
+    catalog response costs one progress query instead of two per mission.
+    """
+
+    context_key = "user_progress_state"
+
+    def __init__(self, user):
+        self.profile = getattr(user, "profile", None)
+        rows = Progress.objects.filter(user=user).values(
+            "mission_id", *USER_PROGRESS_FIELDS
+        )
+        self.progress = {row.pop("mission_id"): row for row in rows}
+        self.completed_ids = {
+            mission_id for mission_id, row in self.progress.items() if row["completed"]
+        }
+        self._unlocked = None
+
+    @classmethod
+    def from_context(cls, context):
+        """Return the state for the context's user, or None for anonymous requests."""
+        request = context.get("request")
+        user = getattr(request, "user", None)
+        if not (user and user.is_authenticated):
+            return None
+        state = context.get(cls.context_key)
+        if state is None:
+            state = context[cls.context_key] = cls(user)
+        return state
+
+    @property
+    def unlocked(self):
+        """Graph and bitmask of the missions whose prerequisites this user completed.
+
+        Evaluated once for the whole catalog on first use.
+        """
+        if self._unlocked is None:
+            graph = prerequisites.get_graph()
+            mask = graph.unlocked_mask(graph.mask(self.completed_ids))
+            self._unlocked = graph, mask
+        return self._unlocked
+
+    def is_available(self, mission_id, is_active, min_level):
+        """Whether this user may play the mission with the given gates."""
+        if not is_active:
+            return False
+        if self.profile and self.profile.level < min_level:
+            return False
+        graph, mask = self.unlocked
+        return graph.is_unlocked(mission_id, mask)
+
+    def frontier(self, candidates):
+        """Missions this user can play next, in the order of ``candidates``.
+
+        ``candidates`` are ``(mission_id, repeatable)`` pairs of missions that
+        already pass the active and level gates; completed missions stay in
+        only if they are repeatable.
+        """
+        graph, mask = self.unlocked
+        return [
+            mission_id
+            for mission_id, repeatable in candidates
+            if graph.is_unlocked(mission_id, mask)
+            and (repeatable or mission_id not in self.completed_ids)
+        ]
+
+
+# Nested relations of the catalog, rendered only on request in sparse mode
+EXPANDABLE_FIELDS = frozenset({"worlds", "missions", "tasks"})
+
 
+def _split_param(value):
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
 
-class LocalizedSerializerMixin:
+
+class SparseFieldset:
+    """``?fields=`` and ``?expand=`` of a catalog request.
+
+    ``fields`` limits the top-level fields of ``model`` (``None``: all of
+    them); the nested ``worlds``/``missions``/``tasks`` are rendered only when
+    named in ``expand``, at any depth. Items nested in an expanded relation
+    keep all their other fields.
+    """
+
+    context_key = "sparse_fieldset"
+
+    def __init__(self, model, fields=None, expand=frozenset()):
+        self.model = model
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request, model):
+        """The request's fieldset, or None when it asks for neither parameter."""
+        params = getattr(request, "query_params", None) or {}
+        if "fields" not in params and "expand" not in params:
+            return None
+        fields = params.get("fields")
+        return cls(
+            model,
+            fields=None if fields is None else _split_param(fields),
+            expand=_split_param(params.get("expand", "")),
+        )
+
+    def wants(self, name: str) -> bool:
+        """Whether a top-level field of ``model`` is rendered."""
+        if name in EXPANDABLE_FIELDS:
+            return name in self.expand
+        return self.fields is None or name in self.fields
+
+    def keeps(self, model, name: str) -> bool:
+        if model is self.model:
+            return self.wants(name)
+        return name not in EXPANDABLE_FIELDS or name in self.expand
+
+    def only(self, requires=None):
+        """Columns of ``model`` the requested fields read, or None for all.
+
+        ``requires`` maps serializer fields to the model fields they read;
+        ``title`` also loads ``title_en``/``title_ru`` and so on.
+        """
+        if self.fields is None:
+            return None
+        concrete = {field.name for field in self.model._meta.concrete_fields}
+        names = {"id"}
+        for name in self.fields:
+            names.update((requires or {}).get(name, (name,)))
+            names.update((f"{name}_en", f"{name}_ru"))
+        return sorted(names & concrete)
+
+    def trim(self, item, top=True):
+        """The same selection applied to an already serialized item."""
+        data = {}
+        for name, value in item.items():
+            if name in EXPANDABLE_FIELDS:
+                if name not in self.expand:
+                    continue
+                value = [self.trim(child, top=False) for child in value]
+            elif top and self.fields is not None and name not in self.fields:
+                continue
+            data[name] = value
+        return data
+
+
+class SparseFieldsMixin:
+    """Drop the fields a :class:`SparseFieldset` in the context leaves out.
+
+    Dropped fields are never evaluated, so unexpanded nested serializers cost
+    nothing.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.context.get(SparseFieldset.context_key)
+        if sparse is None:
+            return fields
+        model = self.Meta.model
+        return {name: f for name, f in fields.items() if sparse.keeps(model, name)}
+
+
+class LocalizedSerializerMixin(SparseFieldsMixin):
     """Inject localized title/description fields."""
 
     language_field_name = "language"
 
     def _preferred_language(self):
-        request = self.context.get("request") if hasattr(self, "context") else None
-        return _resolve_language(request)
+        return _context_language(self.context if hasattr(self, "context") else {})
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         lang = self._preferred_language()
-        if hasattr(instance, "get_localized_title"):
+        if "title" in data and hasattr(instance, "get_localized_title"):
             data["title"] = instance.get_localized_title(lang)
-        if hasattr(instance, "get_localized_description"):
+        if "description" in data and hasattr(instance, "get_localized_description"):
             data["description"] = instance.get_localized_description(lang)
-        if self.language_field_name:
+        if self.language_field_name and self.language_field_name in data:
             data[self.language_field_name] = lang
         return data
 
@@ -111,52 +284,21 @@ class MissionSerializer(LocalizedSerializerMixin, serializers.ModelSerializer):
             "tasks",
             "language",
         ]
+        # Model fields read by method fields (see SparseFieldset.only)
+        sparse_requires = {"available": ("is_active", "min_level")}
 
     def get_available(self, obj):
         """Mission availability: check level, prerequisites and active flag."""
-        request = self.context.get("request")
-        if not obj.is_active:
-            return False
-        if request and request.user and request.user.is_authenticated:
-            profile: Profile = getattr(request.user, "profile", None)
-            if profile and profile.level < obj.min_level:
-                return False
-            # prerequisites must be completed
-            if obj.prerequisites.exists():
-                completed_missions = set(
-                    Progress.objects.filter(
-                        user=request.user, completed=True
-                    ).values_list("mission_id", flat=True)
-                )
-                for pre in obj.prerequisites.all():
-                    if pre.id not in completed_missions:
-                        return False
-        return True
+        state = UserProgressState.from_context(self.context)
+        if state is None:
+            return obj.is_active
+        return state.is_available(obj.id, obj.is_active, obj.min_level)
 
     def get_user_progress(self, obj):
-        request = self.context.get("request")
-        if request and request.user and request.user.is_authenticated:
-            prog = (
-                Progress.objects.filter(user=request.user, mission=obj)
-                .values(
-                    "completed",
-                    "status",
-                    "attempts",
-                    "xp_earned",
-                    "stars",
-                    "completed_at",
-                )
-                .first()
-            )
-            return prog or {
-                "completed": False,
-                "status": "not_started",
-                "attempts": 0,
-                "xp_earned": 0,
-                "stars": 0,
-                "completed_at": None,
-            }
-        return None
+        state = UserProgressState.from_context(self.context)
+        if state is None:
+            return None
+        return state.progress.get(obj.id) or dict(EMPTY_USER_PROGRESS)
 
     def get_prerequisites(self, obj):
         # Compact representation for UI linking with localization
@@ -246,8 +388,10 @@ class TrackSerializer(LocalizedSerializerMixin, serializers.ModelSerializer):
         ]
 
     def get_worlds(self, obj):
-        qs = obj.worlds.all().order_by("order")
-        serializer = LocationSerializer(qs, many=True, context=self.context)
+        # Sorting in Python keeps the prefetched worlds (and their nested
+        # prefetches) instead of issuing a fresh ordered query per track
+        worlds = sorted(obj.worlds.all(), key=lambda world: (world.order, world.id))
+        serializer = LocationSerializer(worlds, many=True, context=self.context)
         return serializer.data
 
     def get_tagline(self, obj):
@@ -303,7 +447,7 @@ class TaskProgressSerializer(serializers.ModelSerializer):
         ]
 
 
-class RankSerializer(serializers.ModelSerializer):
+class RankSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     language = serializers.SerializerMethodField()
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
@@ -327,8 +471,7 @@ class RankSerializer(serializers.ModelSerializer):
         ]
 
     def _preferred_language(self):
-        request = self.context.get("request") if self.context else None
-        return _resolve_language(request)
+        return _context_language(self.context or {})
 
     def get_language(self, obj):
         return self._preferred_language()
@@ -373,7 +516,7 @@ class LeaderboardEntrySerializer(serializers.ModelSerializer):
         track = obj.track
         if not track:
             return None
-        lang = _resolve_language(self.context.get("request"))
+        lang = resolve_language(self.context.get("request"))
         return {
             "id": track.id,
             "slug": track.slug,
@@ -0,0 +1,57 @@
+"""Celery tasks for the game app."""
+
+from celery import shared_task
+from django.conf import settings
+
+from . import runner_jobs
+from .runner import execute_python_code
+from .runner_admission import (
+    RunnerRejected,
+    release_lease,
+    renew_lease,
+    renew_user_slot,
+)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=3)
+def execute_code_job(
+    self,
+    job_id: str,
+    code: str,
+    stdin: str = "",
+    use_cache: bool = True,
+    user_lease=None,
+):
+    """Run submitted code in the sandbox and store the result for polling.
+
+    ``user_lease`` was taken with ``RUNNER_JOB_LEASE_TTL`` to cover the wait in
+    the queue; it is renewed (or re-acquired) for the run itself and released
+    when the job is done.
+    """
+    try:
+        if user_lease:
+            job = runner_jobs.get_job(job_id) or {}
+            user_lease = renew_user_slot(job.get("user_id"), user_lease)
+        runner_jobs.mark_running(job_id)
+        result = execute_python_code(code, stdin=stdin, use_cache=use_cache)
+    except RunnerRejected as e:
+        # The sandbox or the user's slots are saturated: try again later
+        # instead of failing the job, keeping the slot through the wait
+        if self.request.retries < self.max_retries:
+            if user_lease:
+                renew_lease(user_lease, e.retry_after + settings.RUNNER_JOB_LEASE_TTL)
+            raise self.retry(
+                exc=e,
+                countdown=e.retry_after,
+                kwargs={
+                    "stdin": stdin,
+                    "use_cache": use_cache,
+                    "user_lease": user_lease,
+                },
+            )
+        result = {"status": "error", "output": e.detail}
+    except Exception as e:
+        result = {"status": "error", "output": f"Ошибка песочницы: {str(e)}"}
+    runner_jobs.mark_done(job_id, result)
+    if user_lease:
+        release_lease(user_lease)
@@ -0,0 +1,72 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, Progress, Track
+from users.models import User
+
+
+@pytest.fixture()
+def mission(db):
+    track = Track.objects.create(slug="etag", title="ETag")
+    world = Location.objects.create(track=track, title="World", order=1)
+    return Mission.objects.create(location=world, title="First", order=1)
+
+
+def revalidate(client, url, etag, **headers):
+    return client.get(url, HTTP_IF_NONE_MATCH=etag, **headers)
+
+
+@pytest.mark.parametrize("name", ["track-list", "location-list", "mission-list"])
+def test_anonymous_catalog_revalidates_without_queries(
+    mission, name, django_assert_num_queries
+):
+    client = APIClient()
+    url = reverse(name)
+    resp = client.get(url)
+
+    assert resp.status_code == 200
+    assert resp["Cache-Control"] == "public, max-age=60"
+    assert {"Accept-Language", "Authorization"} <= {
+        v.strip() for v in resp["Vary"].split(",")
+    }
+    with django_assert_num_queries(0):
+        cached = revalidate(client, url, resp["ETag"])
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached["ETag"] == resp["ETag"]
+
+
+def test_etag_depends_on_language_and_content(mission):
+    client = APIClient()
+    url = reverse("mission-detail", args=[mission.id])
+    etag = client.get(url)["ETag"]
+
+    assert revalidate(client, url, f"W/{etag}").status_code == 304
+    assert revalidate(client, url, etag, HTTP_ACCEPT_LANGUAGE="en").status_code == 200
+    assert client.get(url, {"lang": "en"})["ETag"] != etag
+
+    mission.title = "Renamed"
+    mission.save()
+    resp = revalidate(client, url, etag)
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Renamed"
+
+
+def test_user_progress_changes_the_etag(mission):
+    user = User.objects.create_user(username="etag", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    url = reverse("mission-list")
+    resp = client.get(url)
+    etag = resp["ETag"]
+
+    assert "private" in resp["Cache-Control"]
+    assert APIClient().get(url)["ETag"] != etag
+    assert revalidate(client, url, etag).status_code == 304
+
+    Progress.objects.create(user=user, mission=mission, status="in_progress")
+    resp = revalidate(client, url, etag)
+    assert resp.status_code == 200
+    item = next(m for m in resp.json() if m["id"] == mission.id)
+    assert item["user_progress"]["status"] == "in_progress"
@@ -0,0 +1,101 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, MissionTask, Progress, Track
+from users.models import User
+
+MISSIONS_PER_WORLD = 100
+WORLDS = 3
+
+
+@pytest.fixture()
+def catalog(db):
+    """Several hundred missions chained by prerequisites, each with tasks."""
+    track = Track.objects.create(slug="python", title="Python", order=1)
+    worlds = Location.objects.bulk_create(
+        Location(track=track, title=f"World {i}", order=i) for i in range(WORLDS)
+    )
+    missions = Mission.objects.bulk_create(
+        Mission(location=world, title=f"Mission {world.order}.{i}", order=i)
+        for world in worlds
+        for i in range(MISSIONS_PER_WORLD)
+    )
+    Mission.prerequisites.through.objects.bulk_create(
+        Mission.prerequisites.through(from_mission=current, to_mission=previous)
+        for previous, current in zip(missions, missions[1:])
+    )
+    MissionTask.objects.bulk_create(
+        MissionTask(mission=mission, order=order, title=f"Step {order}")
+        for mission in missions
+        for order in range(2)
+    )
+    return missions
+
+
+@pytest.fixture()
+def player(catalog):
+    user = User.objects.create_user(username="player", password="pass1234")
+    Progress.objects.bulk_create(
+        Progress(user=user, mission=mission, completed=True, status="completed")
+        for mission in catalog[:10]
+    )
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(pk=user.pk))
+    return client
+
+
+def test_mission_list_query_count_is_constant(
+    player, catalog, django_assert_max_num_queries
+):
+    # missions, prerequisites, tasks, profile, progress, prerequisite graph
+    with django_assert_max_num_queries(6):
+        resp = player.get(reverse("mission-list"))
+
+    assert resp.status_code == 200
+    missions = {m["id"]: m for m in resp.json()}
+    assert len(missions) == len(catalog)
+    assert missions[catalog[10].id]["available"] is True
+    assert missions[catalog[11].id]["available"] is False
+    assert missions[catalog[0].id]["user_progress"]["completed"] is True
+    assert missions[catalog[11].id]["user_progress"]["status"] == "not_started"
+
+
+def test_location_list_query_count_is_constant(
+    player, catalog, django_assert_max_num_queries
+):
+    # locations, missions, prerequisites, tasks, profile, progress, graph
+    with django_assert_max_num_queries(7):
+        resp = player.get(reverse("location-list"))
+
+    assert resp.status_code == 200
+    assert sum(len(world["missions"]) for world in resp.json()) == len(catalog)
+
+
+def test_track_tree_query_count_does_not_grow_with_catalog(
+    player, catalog, django_assert_max_num_queries
+):
+    # tracks, worlds, missions, prerequisites, tasks, profile, progress, graph
+    with django_assert_max_num_queries(8):
+        resp = player.get(reverse("track-list"))
+    assert resp.status_code == 200
+
+    world = Location.objects.create(
+        track=catalog[0].location.track, title="Extra", order=-1
+    )
+    for order in range(50, 0, -1):
+        mission = Mission.objects.create(
+            location=world, title=f"Extra {order}", order=order
+        )
+        mission.prerequisites.add(catalog[0])
+        MissionTask.objects.create(mission=mission, order=1)
+
+    with django_assert_max_num_queries(8):
+        resp = player.get(reverse("track-list"))
+
+    track = next(t for t in resp.json() if t["slug"] == "python")
+    worlds = track["worlds"]
+    assert [w["title"] for w in worlds[:2]] == ["Extra", "World 0"]
+    assert [m["order"] for m in worlds[0]["missions"]] == list(range(1, 51))
+    assert sum(len(w["missions"]) for w in worlds) == len(catalog) + 50
+    assert all(len(m["tasks"]) >= 1 for w in worlds for m in w["missions"])
@@ -0,0 +1,122 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.catalog import CatalogSnapshot
+from game.models import Location, Mission, MissionTask, Progress, Rank, Track
+from users.models import User
+
+
+@pytest.fixture()
+def content(db):
+    track = Track.objects.create(slug="snap", title="Snap", title_en="Snap EN")
+    world = Location.objects.create(track=track, title="World", order=1)
+    first = Mission.objects.create(location=world, title="First", order=1)
+    second = Mission.objects.create(
+        location=world, title="Second", title_en="Second EN", order=2
+    )
+    second.prerequisites.add(first)
+    MissionTask.objects.create(mission=first, order=1, title="Read", body="Text")
+    Rank.objects.create(slug="novice", title_en="Novice", title_ru="Новичок")
+    return first, second
+
+
+@pytest.fixture()
+def player(content):
+    user = User.objects.create_user(username="snap", password="pass1234")
+    Progress.objects.create(
+        user=user, mission=content[0], completed=True, status="completed"
+    )
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(pk=user.pk))
+    return client
+
+
+def fetch(client, settings, url, enabled, **params):
+    settings.CATALOG_SNAPSHOT_ENABLED = enabled
+    resp = client.get(url, params)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.parametrize(
+    "name", ["track-list", "location-list", "mission-list", "rank-list"]
+)
+@pytest.mark.parametrize("lang", ["ru", "en"])
+@pytest.mark.parametrize("authenticated", [False, True])
+def test_snapshot_matches_serializers(
+    content, player, settings, name, lang, authenticated
+):
+    client = player if authenticated else APIClient()
+    url = reverse(name)
+
+    expected = fetch(client, settings, url, False, lang=lang)
+    assert fetch(client, settings, url, True, lang=lang) == expected
+    # Second read comes from the built snapshot
+    assert fetch(client, settings, url, True, lang=lang) == expected
+
+
+def test_retrieve_matches_serializers(content, player, settings):
+    url = reverse("mission-detail", args=[content[1].id])
+    for client in (APIClient(), player):
+        expected = fetch(client, settings, url, False)
+        assert fetch(client, settings, url, True) == expected
+
+    assert fetch(player, settings, url, True)["available"] is True
+    assert fetch(APIClient(), settings, url, True)["user_progress"] is None
+
+
+def test_anonymous_reads_skip_the_database(
+    content, settings, django_assert_num_queries
+):
+    client = APIClient()
+    client.get(reverse("track-list"))
+    client.get(reverse("mission-detail", args=[content[0].id]))
+
+    with django_assert_num_queries(0):
+        resp = client.get(reverse("track-list"))
+        client.get(reverse("mission-detail", args=[content[0].id]))
+
+    assert resp["Content-Type"] == "application/json"
+    track = next(t for t in resp.json() if t["slug"] == "snap")
+    assert [m["title"] for m in track["worlds"][0]["missions"]] == ["First", "Second"]
+
+
+def test_unknown_id_falls_back_to_404(content):
+    resp = APIClient().get(reverse("mission-detail", args=[10**6]))
+    assert resp.status_code == 404
+
+
+def test_content_changes_invalidate_snapshot(content, settings):
+    first, second = content
+    client = APIClient()
+    url = reverse("mission-detail", args=[second.id])
+    assert client.get(url).json()["title"] == "Second"
+
+    second.title = "Renamed"
+    second.save()
+    assert client.get(url).json()["title"] == "Renamed"
+
+    second.prerequisites.clear()
+    assert client.get(url).json()["prerequisites"] == []
+
+    MissionTask.objects.create(mission=second, order=1, title="New step")
+    assert [t["title"] for t in client.get(url).json()["tasks"]] == ["New step"]
+
+    first.delete()
+    assert client.get(reverse("mission-detail", args=[first.id])).status_code == 404
+
+
+def test_snapshot_builds_each_kind_once():
+    calls = []
+
+    def build(language):
+        calls.append(language)
+        return [{"id": 1, "title": "x"}]
+
+    snapshot = CatalogSnapshot("v", "ru")
+
+    assert snapshot.get("missions", 1, build) == {"id": 1, "title": "x"}
+    assert snapshot.json("missions", build) == b'[{"id":1,"title":"x"}]'
+    assert snapshot.list("missions", build) is snapshot.list("missions", build)
+    assert calls == ["ru"]
@@ -0,0 +1,97 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, MissionTask, Progress, Track
+from users.models import User
+
+
+@pytest.fixture()
+def world(db):
+    track = Track.objects.create(slug="sparse", title="Sparse", title_en="Sparse EN")
+    world = Location.objects.create(track=track, title="World", order=1)
+    first = Mission.objects.create(location=world, title="First", order=1)
+    second = Mission.objects.create(location=world, title="Second", order=2)
+    second.prerequisites.add(first)
+    for mission in (first, second):
+        MissionTask.objects.create(mission=mission, order=1, title="Read", body="x")
+    return world
+
+
+def get(client, settings, url, enabled, **params):
+    settings.CATALOG_SNAPSHOT_ENABLED = enabled
+    resp = client.get(url, params)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def pick(items, key, value):
+    return next(item for item in items if item[key] == value)
+
+
+@pytest.mark.parametrize(
+    "name, params",
+    [
+        ("track-list", {"fields": "id,slug"}),
+        ("track-list", {"expand": "worlds,missions"}),
+        ("location-list", {"fields": "id,title,track", "expand": "missions"}),
+        ("location-list", {"expand": "missions,tasks", "lang": "en"}),
+        ("mission-list", {"fields": "id,title,available,user_progress"}),
+        ("mission-list", {"fields": "id", "expand": "tasks"}),
+        ("rank-list", {"fields": "slug,title"}),
+    ],
+)
+@pytest.mark.parametrize("authenticated", [False, True])
+def test_snapshot_and_serializers_agree(world, settings, name, params, authenticated):
+    client = APIClient()
+    if authenticated:
+        user = User.objects.create_user(username="sparse", password="pass1234")
+        Progress.objects.create(user=user, mission=world.missions.first())
+        client.force_authenticate(user=user)
+    url = reverse(name)
+
+    assert get(client, settings, url, True, **params) == get(
+        client, settings, url, False, **params
+    )
+
+
+def test_nesting_is_opt_in(world, settings):
+    client = APIClient()
+    url = reverse("location-detail", args=[world.id])
+
+    assert "missions" in get(client, settings, url, True)
+    assert "missions" not in get(client, settings, url, True, expand="")
+    missions = get(client, settings, url, True, expand="missions")["missions"]
+    assert [m["title"] for m in missions] == ["First", "Second"]
+    assert "tasks" not in missions[0]
+    missions = get(client, settings, url, True, expand="missions,tasks")["missions"]
+    assert [t["title"] for t in missions[0]["tasks"]] == ["Read"]
+
+
+def test_fields_select_top_level_fields(world, settings):
+    items = get(
+        APIClient(),
+        settings,
+        reverse("mission-list"),
+        True,
+        fields="id,title,available",
+    )
+    second = pick(items, "title", "Second")
+    assert list(second) == ["id", "title", "available"]
+
+
+def test_sparse_queries_load_only_what_is_rendered(
+    world, settings, django_assert_max_num_queries
+):
+    settings.CATALOG_SNAPSHOT_ENABLED = False
+    client = APIClient()
+    Mission.objects.create(location=world, title="Third", order=3)
+
+    # missions + prerequisites, no tasks and no per-row queries
+    with django_assert_max_num_queries(2):
+        resp = client.get(reverse("mission-list"), {"fields": "id,title,available"})
+    assert pick(resp.json(), "title", "Second")["available"] is True
+
+    # locations + track, missions not loaded at all
+    with django_assert_max_num_queries(1):
+        client.get(reverse("location-list"), {"fields": "id,title,track"})
@@ -0,0 +1,182 @@
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import grading
+from game.models import Location, Mission, MissionTask, TaskProgress
+from users.models import User
+
+
+@pytest.fixture()
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user(db):
+    return User.objects.create_user(username="grader", password="pass1234")
+
+
+@pytest.fixture()
+def code_task(db):
+    loc = Location.objects.create(title="World", order=1)
+    mission = Mission.objects.create(location=loc, title="Mission", order=1)
+    return MissionTask.objects.create(
+        mission=mission,
+        order=1,
+        task_type="code",
+        data={
+            "tests": [
+                {"name": "sum", "stdin": "2 3\n", "expected_output": "5"},
+                {"name": "add", "assert": "add(2, 3) == 5"},
+            ]
+        },
+    )
+
+
+@pytest.fixture()
+def sandbox(monkeypatch):
+    """Fake sandbox answering with a harness report; ``outputs`` sets each stdout."""
+    runs = []
+    outputs = {}
+
+    def execute(code, timeout, stdin, **kwargs):
+        payload = json.loads(stdin)
+        runs.append({**payload, "timeout": timeout})
+        cases = [
+            {
+                "name": case["name"],
+                "exit_code": 0,
+                "time_ms": 1.0,
+                "stdout": outputs.get(case["name"], "5\n"),
+                "error": "",
+            }
+            for case in payload["cases"]
+        ]
+        report = payload["marker"] + json.dumps({"cases": cases})
+        return {"status": "success", "output": "noise\n" + report + "\n"}
+
+    monkeypatch.setattr(grading, "execute_python_code", execute)
+    return runs, outputs
+
+
+def submit(client, task, code="def add(a, b):\n    return a + b\n"):
+    return client.post(
+        reverse("missiontask-submit", args=[task.id]), {"code": code}, format="json"
+    )
+
+
+def test_all_cases_run_in_one_sandbox_and_progress_is_recorded(
+    api_client, user, code_task, sandbox
+):
+    runs, outputs = sandbox
+    api_client.force_authenticate(user=user)
+    outputs["sum"] = "6\n"
+
+    resp = submit(api_client, code_task)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["passed"], data["total"], data["score"]) == (1, 2, 50)
+    assert data["completed"] is False
+    assert [case["passed"] for case in data["cases"]] == [False, True]
+    assert data["cases"][0]["output"] == "6\n"
+    assert len(runs) == 1
+    assert len(runs[0]["cases"]) == 2
+
+    outputs["sum"] = "5  \n\n"
+    data = submit(api_client, code_task).json()
+    assert data["completed"] is True
+    progress = TaskProgress.objects.get(user=user, task=code_task)
+    assert progress.attempts == 2
+    assert progress.best_score == 100
+    assert progress.status == "completed"
+
+
+def test_forged_report_without_marker_is_rejected(
+    api_client, user, code_task, monkeypatch
+):
+    monkeypatch.setattr(
+        grading,
+        "execute_python_code",
+        lambda code, timeout, stdin, **kwargs: {
+            "status": "success",
+            "output": '@@grader:fake@@{"cases": []}\n',
+        },
+    )
+    api_client.force_authenticate(user=user)
+    resp = submit(api_client, code_task)
+    assert resp.status_code == 400
+    assert not TaskProgress.objects.filter(user=user).exists()
+
+
+def test_non_code_task_cannot_be_submitted(api_client, user, code_task):
+    code_task.task_type = "quiz"
+    code_task.save()
+    api_client.force_authenticate(user=user)
+    resp = submit(api_client, code_task)
+    assert resp.status_code == 400
+
+
+def test_code_failing_precheck_fails_all_cases_without_sandbox(
+    api_client, user, code_task, sandbox
+):
+    runs, _ = sandbox
+    api_client.force_authenticate(user=user)
+
+    resp = submit(api_client, code_task, code="def add(a, b)\n    return a + b\n")
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert runs == []
+    assert (data["passed"], data["total"]) == (0, 2)
+    assert all("SyntaxError" in case["error"] for case in data["cases"])
+
+
+def test_expected_output_never_enters_the_sandbox(api_client, user, code_task, sandbox):
+    runs, _ = sandbox
+    api_client.force_authenticate(user=user)
+
+    submit(api_client, code_task)
+
+    assert "expected_output" not in json.dumps(runs[0])
+    assert runs[0]["cases"][0]["output_limit"] >= len("5")
+
+
+def test_harness_refusal_is_a_grading_error(api_client, user, code_task, monkeypatch):
+    def execute(code, timeout, stdin, **kwargs):
+        marker = json.loads(stdin)["marker"]
+        return {"status": "success", "output": marker + '{"error": "no uid"}\n'}
+
+    monkeypatch.setattr(grading, "execute_python_code", execute)
+    api_client.force_authenticate(user=user)
+
+    resp = submit(api_client, code_task)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "no uid"
+
+
+def test_many_cases_share_a_bounded_deadline(api_client, user, code_task, sandbox):
+    runs, _ = sandbox
+    code_task.data = {
+        "time_limit": 2,
+        "tests": [{"assert": "True"} for _ in range(40)],
+    }
+    code_task.save()
+    api_client.force_authenticate(user=user)
+
+    assert submit(api_client, code_task).status_code == 200
+    assert runs[0]["timeout"] == grading.MAX_TOTAL_TIMEOUT
+    assert runs[0]["deadline"] < runs[0]["timeout"]
+
+
+@pytest.mark.parametrize("time_limit", ["fast", 0, 1000])
+def test_invalid_time_limit_is_rejected(
+    api_client, user, code_task, sandbox, time_limit
+):
+    code_task.data = {**code_task.data, "time_limit": time_limit}
+    code_task.save()
+    api_client.force_authenticate(user=user)
+    assert submit(api_client, code_task).status_code == 400
+    assert sandbox[0] == []
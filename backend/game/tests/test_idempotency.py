@@ -0,0 +1,128 @@
+import hashlib
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.idempotency import CACHE_KEY
+from game.models import Location, Mission, MissionTask, Progress, TaskProgress
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture()
+def missions(db):
+    world = Location.objects.create(title="Retry", order=1)
+    first = Mission.objects.create(
+        location=world,
+        title="Again",
+        xp_reward=50,
+        repeatable=True,
+        repeat_xp_rate=20,
+    )
+    gated = Mission.objects.create(location=world, title="Gated", order=1)
+    gated.prerequisites.add(first)
+    return first, gated
+
+
+@pytest.fixture()
+def user(db):
+    return User.objects.create_user(username="retry", password="pass1234")
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def post(client, url, key, data=None):
+    return client.post(url, data or {}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+
+def test_retried_complete_replays_without_awarding_again(missions, user):
+    client = client_for(user)
+    url = reverse("mission-complete", args=[missions[0].id])
+
+    first = post(client, url, "k-1", {"stars": 3})
+    retry = post(client, url, "k-1", {"stars": 3})
+
+    assert retry.status_code == first.status_code == 200
+    assert retry.json() == first.json()
+    assert retry["Idempotent-Replayed"] == "true"
+    user.profile.refresh_from_db()
+    assert user.profile.xp == 50
+    # A new key is a new completion: repeat XP
+    assert post(client, url, "k-2", {"stars": 3}).json()["xp_added"] == 10
+
+
+def test_retried_start_counts_one_attempt(missions, user):
+    client = client_for(user)
+    url = reverse("mission-start", args=[missions[0].id])
+
+    for _ in range(3):
+        assert post(client, url, "start-1").status_code == 200
+
+    assert Progress.objects.get(user=user, mission=missions[0]).attempts == 1
+
+
+def test_key_reuse_and_concurrent_retries_are_rejected(missions, user):
+    client = client_for(user)
+    url = reverse("mission-complete", args=[missions[0].id])
+    post(client, url, "k-1", {"stars": 1})
+
+    assert post(client, url, "k-1", {"stars": 2}).status_code == 422
+    other = reverse("mission-start", args=[missions[0].id])
+    assert post(client, other, "k-1").status_code == 422
+
+    # Another worker still runs the first request with this key
+    digest = hashlib.sha256(b"k-busy").hexdigest()
+    cache.add(
+        CACHE_KEY.format(user_id=user.pk, digest=digest),
+        {"fingerprint": "x", "status": None},
+    )
+    resp = post(client, url, "k-busy")
+    assert resp.status_code == 409
+    assert resp["Retry-After"] == "1"
+
+
+def test_errors_are_not_stored(missions, user):
+    first, gated = missions
+    client = client_for(user)
+    url = reverse("mission-complete", args=[gated.id])
+
+    assert post(client, url, "gate").status_code == 403
+    post(client, reverse("mission-complete", args=[first.id]), "prereq")
+
+    assert post(client, url, "gate").status_code == 200
+
+
+def test_keys_are_per_user(missions, user):
+    other = User.objects.create_user(username="other", password="pass1234")
+    url = reverse("mission-complete", args=[missions[0].id])
+
+    post(client_for(user), url, "shared")
+    resp = post(client_for(other), url, "shared")
+
+    assert resp.status_code == 200
+    assert "Idempotent-Replayed" not in resp
+    other.profile.refresh_from_db()
+    assert other.profile.xp == 50
+
+
+def test_task_progress_create_retry(missions, user):
+    task = MissionTask.objects.create(mission=missions[0], order=1)
+    client = client_for(user)
+    url = reverse("task-progress-list")
+
+    first = post(client, url, "tp-1", {"task": task.id, "status": "in_progress"})
+    retry = post(client, url, "tp-1", {"task": task.id, "status": "in_progress"})
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert TaskProgress.objects.filter(user=user).count() == 1
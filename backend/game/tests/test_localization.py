@@ -0,0 +1,43 @@
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from game.localization import localized_row, resolve_language
+from game.models import Mission, MissionTask, Rank, Track
+
+
+@pytest.mark.parametrize(
+    "values, lang, expected",
+    [
+        ({"title": "Base", "title_en": "EN", "title_ru": "RU"}, "en", "EN"),
+        ({"title": "Base", "title_en": " ", "title_ru": "RU"}, "en", "Base"),
+        ({"title": "", "title_en": "", "title_ru": "RU"}, "en", "RU"),
+        ({"title": "", "title_en": "EN", "title_ru": ""}, "de", "EN"),
+        ({"title": "", "title_en": "", "title_ru": ""}, "ru", ""),
+    ],
+)
+def test_models_and_rows_share_the_fallback_chain(values, lang, expected):
+    for model in (Track, Mission, MissionTask):
+        assert model(**values).get_localized_title(lang) == expected
+    assert localized_row(values, "title", lang) == expected
+    prefixed = {f"to_mission__{k}": v for k, v in values.items()}
+    assert localized_row(prefixed, "title", lang, "to_mission__") == expected
+
+
+def test_rank_titles_do_not_fall_back():
+    rank = Rank(title_en="Novice", title_ru="")
+    assert rank.get_localized_title("ru") == ""
+    assert rank.get_localized_title("EN") == "Novice"
+
+
+def test_request_language_is_memoized():
+    request = Request(
+        APIRequestFactory().get("/", {"lang": "en"}, HTTP_ACCEPT_LANGUAGE="ru")
+    )
+    assert resolve_language(request) == "en"
+
+    request._request.GET = request._request.GET.copy()
+    request._request.GET["lang"] = "ru"
+    assert resolve_language(request) == "en"
+    assert resolve_language(request, default="en") == "ru"
+    assert resolve_language(None) == "ru"
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, Progress
+from users.models import Profile, User
+
+THREADS = 16
+
+
+@pytest.fixture()
+def missions(db):
+    world = Location.objects.create(title="XP", order=1)
+    once = Mission.objects.create(location=world, title="Once", xp_reward=100)
+    repeat = Mission.objects.create(
+        location=world,
+        title="Again",
+        order=1,
+        xp_reward=50,
+        repeatable=True,
+        repeat_xp_rate=20,
+    )
+    return once, repeat
+
+
+def test_add_xp_from_stale_instances_keeps_every_award(db):
+    user = User.objects.create_user(username="xp", password="pass1234")
+    first = Profile.objects.get(user=user)
+    second = Profile.objects.get(user=user)
+
+    first.add_xp(150)
+    second.add_xp(70)
+
+    assert (second.xp, second.level) == (220, 3)
+    user.profile.refresh_from_db()
+    assert (user.profile.xp, user.profile.level) == (220, 3)
+
+
+def test_first_completion_is_compare_and_set(missions):
+    user = User.objects.create_user(username="cas", password="pass1234")
+    first = Progress.objects.create(user=user, mission=missions[0])
+    # A second request that read the row before the first one completed it
+    second = Progress.objects.get(pk=first.pk)
+
+    assert first.complete() is True
+    assert second.complete() is False
+    assert second.completed and second.status == "completed"
+
+
+def test_stale_start_does_not_undo_completion(missions):
+    user = User.objects.create_user(username="stale", password="pass1234")
+    started = Progress.objects.create(user=user, mission=missions[0])
+    # /start/ read the row before a parallel /complete/ won the compare-and-set
+    completing = Progress.objects.get(pk=started.pk)
+    assert completing.complete() is True
+    completing.record_result(100, 2)
+
+    started.start()
+
+    assert (started.attempts, started.status) == (1, "completed")
+    stored = Progress.objects.get(pk=started.pk)
+    assert (stored.completed, stored.xp_earned, stored.stars) == (True, 100, 2)
+    assert stored.completed_at is not None
+    assert started.complete() is False
+
+
+def test_complete_awards_in_sql(missions):
+    once, repeat = missions
+    user = User.objects.create_user(username="sql", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    data = client.post(reverse("mission-complete", args=[once.id])).json()
+    assert data["xp_added"] == 100
+    assert (data["profile_xp"], data["profile_level"]) == (100, 2)
+    data = client.post(reverse("mission-complete", args=[once.id])).json()
+    assert (data["xp_added"], data["xp_earned"]) == (0, 100)
+
+    for expected in (50, 10, 10):
+        data = client.post(
+            reverse("mission-complete", args=[repeat.id]), {"stars": 2}
+        ).json()
+        assert data["xp_added"] == expected
+    assert (data["xp_earned"], data["stars"], data["profile_xp"]) == (70, 2, 170)
+
+
+def _hammer(url, user):
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def worker():
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            barrier.wait()
+            statuses.append(client.post(url).status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_completions_award_exactly_once(missions):
+    if connection.vendor != "postgresql":
+        pytest.skip("needs a database with concurrent connections (Postgres)")
+    once, repeat = missions
+    user = User.objects.create_user(username="race", password="pass1234")
+    Progress.objects.create(user=user, mission=once)
+
+    statuses = _hammer(reverse("mission-complete", args=[once.id]), user)
+    assert statuses == [200] * THREADS
+    statuses = _hammer(reverse("mission-complete", args=[repeat.id]), user)
+    assert statuses.count(200) == THREADS
+
+    progress = Progress.objects.get(user=user, mission=once)
+    assert progress.xp_earned == 100
+    repeated = Progress.objects.get(user=user, mission=repeat)
+    assert repeated.xp_earned == 50 + 10 * (THREADS - 1)
+    user.profile.refresh_from_db()
+    assert user.profile.xp == progress.xp_earned + repeated.xp_earned
+    assert user.profile.level == user.profile.xp // 100 + 1
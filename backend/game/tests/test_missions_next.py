@@ -0,0 +1,80 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, Progress, Track
+from users.models import User
+
+
+@pytest.fixture()
+def content(db):
+    """Two tracks; missions deliberately created out of display order."""
+    second_track = Track.objects.create(slug="next-b", title="B", order=-1)
+    first_track = Track.objects.create(slug="next-a", title="A", order=-2)
+    hidden = Track.objects.create(slug="next-h", title="H", is_active=False)
+    world = Location.objects.create(track=first_track, title="A1", order=1)
+    other = Location.objects.create(track=second_track, title="B1", order=0)
+    missions = {
+        "b1": Mission.objects.create(location=other, title="b1", order=1),
+        "a2": Mission.objects.create(location=world, title="a2", order=2),
+        "a1": Mission.objects.create(location=world, title="a1", order=1),
+        "a3": Mission.objects.create(location=world, title="a3", order=3),
+        "high": Mission.objects.create(
+            location=world, title="high", order=4, min_level=99
+        ),
+        "off": Mission.objects.create(
+            location=world, title="off", order=5, is_active=False
+        ),
+        "repeat": Mission.objects.create(
+            location=world, title="repeat", order=6, repeatable=True
+        ),
+        "hidden": Mission.objects.create(
+            location=Location.objects.create(track=hidden, title="H1"), title="h"
+        ),
+    }
+    missions["a2"].prerequisites.add(missions["a1"])
+    missions["a3"].prerequisites.add(missions["a1"], missions["a2"])
+    return missions
+
+
+@pytest.fixture()
+def player(content):
+    user = User.objects.create_user(username="next", password="pass1234")
+    for key in ("a1", "repeat"):
+        Progress.objects.create(
+            user=user, mission=content[key], completed=True, status="completed"
+        )
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(pk=user.pk))
+    return client
+
+
+def frontier(client, content):
+    titles = {mission.id: key for key, mission in content.items()}
+    resp = client.get(reverse("mission-next"))
+    assert resp.status_code == 200
+    return [titles[m["id"]] for m in resp.json() if m["id"] in titles]
+
+
+@pytest.mark.parametrize("snapshot", [True, False])
+def test_next_returns_ordered_frontier(player, content, settings, snapshot):
+    settings.CATALOG_SNAPSHOT_ENABLED = snapshot
+
+    assert frontier(player, content) == ["a2", "repeat", "b1"]
+
+    resp = player.get(reverse("mission-next"))
+    item = next(m for m in resp.json() if m["id"] == content["repeat"].id)
+    assert item["available"] is True
+    assert item["user_progress"]["completed"] is True
+
+
+def test_next_follows_progress(player, content):
+    assert "a3" not in frontier(player, content)
+
+    player.post(reverse("mission-complete", args=[content["a2"].id]))
+
+    assert frontier(player, content)[:2] == ["a3", "repeat"]
+
+
+def test_next_requires_authentication(content):
+    assert APIClient().get(reverse("mission-next")).status_code == 401
@@ -0,0 +1,98 @@
+import base64
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.models import Location, Mission, MissionTask, Progress, Track
+from users.models import User
+
+
+@pytest.fixture()
+def tasks(db):
+    track = Track.objects.create(slug="pages", title="Pages")
+    world = Location.objects.create(track=track, title="World", order=1)
+    missions = [
+        Mission.objects.create(location=world, title=f"M{i}", order=i) for i in (2, 1)
+    ]
+    # Duplicate orders inside a mission: the id breaks the tie
+    for mission in missions:
+        for order in (2, 1, 1):
+            MissionTask.objects.create(mission=mission, order=order, title="t")
+    return MissionTask.objects.filter(mission__in=missions)
+
+
+def walk(client, url, params):
+    ids, pages = [], 0
+    resp = client.get(url, params)
+    while True:
+        assert resp.status_code == 200
+        body = resp.json()
+        ids += [item["id"] for item in body["results"]]
+        pages += 1
+        if body["next"] is None:
+            return ids, pages
+        resp = client.get(body["next"])
+
+
+def test_unpaginated_by_default_in_compat_mode(tasks):
+    resp = APIClient().get(reverse("missiontask-list"))
+    assert isinstance(resp.json(), list)
+
+
+def test_cursor_walks_every_row_once_in_key_order(tasks):
+    expected = list(
+        tasks.order_by("mission_id", "order", "id").values_list("id", flat=True)
+    )
+    client = APIClient()
+
+    with CaptureQueriesContext(connection) as queries:
+        ids, pages = walk(client, reverse("missiontask-list"), {"page_size": 2})
+
+    # Seeded content pages along with the fixture's tasks
+    assert [i for i in ids if i in expected] == expected
+    assert len(ids) == len(set(ids))
+    assert pages >= 3
+    sql = " ".join(q["sql"].upper() for q in queries.captured_queries)
+    assert "COUNT(" not in sql and "OFFSET" not in sql
+
+
+def test_pagination_without_compat_mode(db, settings):
+    settings.API_PAGINATION_COMPAT = False
+    settings.API_PAGE_SIZE = 2
+    user = User.objects.create_user(username="pager", password="pass1234")
+    track = Track.objects.create(slug="progress-pages", title="P")
+    world = Location.objects.create(track=track, title="W", order=1)
+    for i in range(5):
+        mission = Mission.objects.create(location=world, title=f"M{i}", order=i)
+        Progress.objects.create(user=user, mission=mission)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    first = client.get(reverse("progress-list")).json()
+    assert len(first["results"]) == 2
+    ids, pages = walk(client, reverse("progress-list"), {})
+    assert ids == sorted(user.progress.values_list("id", flat=True)) and pages == 3
+
+    users, _ = walk(client, reverse("user-list"), {"page_size": 1})
+    assert user.id in users
+
+
+def test_invalid_cursor_is_404(tasks):
+    resp = APIClient().get(reverse("missiontask-list"), {"cursor": "garbage"})
+    assert resp.status_code == 404
+
+
+@pytest.mark.parametrize("values", [["abc"], [{"id": 1}], [[1]], [None], [1, 2]])
+def test_cursor_with_wrong_value_types_is_404(db, values):
+    user = User.objects.create_user(username="cursor", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    resp = client.get(reverse("progress-list"), {"cursor": cursor})
+
+    assert resp.status_code == 404
@@ -0,0 +1,184 @@
+from importlib import import_module
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game.admin import MissionAdminForm
+from game.models import Location, Mission, Progress, Track
+from game import prerequisites
+from game.prerequisites import PrerequisiteGraph, compute_closure, get_graph
+from users.models import User
+
+
+def test_graph_unlocks_missions_whose_prerequisites_are_completed():
+    # 2 <- 1, 3 <- (1, 2), 4 has no prerequisites
+    graph = PrerequisiteGraph("v", [(2, 1), (3, 1), (3, 2)])
+
+    assert graph.unlocked([]) == {1}
+    assert graph.unlocked([1]) == {1, 2}
+    assert graph.unlocked([1, 2]) == {1, 2, 3}
+    unlocked = graph.unlocked_mask(graph.mask([1]))
+    assert graph.is_unlocked(2, unlocked)
+    assert not graph.is_unlocked(3, unlocked)
+    assert graph.is_unlocked(4, unlocked)
+    assert graph.prerequisites(3) == [1, 2]
+    assert graph.missing(3, [1, 99]) == [2]
+    assert graph.missing(4, []) == []
+
+
+@pytest.fixture()
+def chain(db):
+    track = Track.objects.create(slug="dag", title="DAG")
+    world = Location.objects.create(track=track, title="World", order=1)
+    missions = [
+        Mission.objects.create(location=world, title=f"M{i}", order=i) for i in range(3)
+    ]
+    missions[1].prerequisites.add(missions[0])
+    missions[2].prerequisites.add(missions[0], missions[1])
+    return missions
+
+
+@pytest.fixture()
+def client(chain):
+    user = User.objects.create_user(username="dag", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(pk=user.pk))
+    client.user = user
+    return client
+
+
+def test_graph_follows_prerequisite_edits(chain):
+    first, second, third = chain
+    assert get_graph().prerequisites(third.id) == [first.id, second.id]
+
+    third.prerequisites.remove(first)
+    assert get_graph().prerequisites(third.id) == [second.id]
+
+
+def test_start_checks_prerequisites_against_graph(client, chain):
+    first, second, third = chain
+    url = reverse("mission-start", args=[third.id])
+    assert client.post(url).status_code == 403
+
+    Progress.objects.create(
+        user=client.user, mission=first, completed=True, status="completed"
+    )
+    assert client.post(url).status_code == 403
+    assert client.post(reverse("mission-start", args=[second.id])).status_code == 200
+
+    Progress.objects.filter(user=client.user, mission=second).update(completed=True)
+    assert client.post(url).status_code == 200
+    assert client.post(reverse("mission-complete", args=[third.id])).status_code == 200
+
+
+def test_available_reads_graph_not_prerequisite_rows(
+    client, chain, settings, django_assert_max_num_queries
+):
+    first, second, third = chain
+    Progress.objects.create(
+        user=client.user, mission=first, completed=True, status="completed"
+    )
+    settings.CATALOG_SNAPSHOT_ENABLED = False
+    get_graph()
+
+    # missions, profile, progress: no prerequisites query for "available"
+    with django_assert_max_num_queries(3):
+        resp = client.get(reverse("mission-list"), {"fields": "id,available"})
+
+    available = {m["id"]: m["available"] for m in resp.json()}
+    assert available[first.id] is True
+    assert available[second.id] is True
+    assert available[third.id] is False
+
+
+def test_prerequisite_cycles_are_rejected(chain):
+    first, second, third = chain
+    attempts = [
+        lambda: first.prerequisites.add(first),
+        lambda: first.prerequisites.add(second),
+        lambda: first.prerequisites.add(third),
+        lambda: third.unlocks.add(first),
+    ]
+    for attempt in attempts:
+        with pytest.raises(ValidationError), transaction.atomic():
+            attempt()
+
+    assert list(first.prerequisites.all()) == []
+
+
+def test_closure_and_depth_follow_links(chain, django_capture_on_commit_callbacks):
+    first, second, third = chain
+    fourth = Mission.objects.create(location=first.location, title="M3", order=3)
+    fourth.prerequisites.add(third)
+
+    assert set(fourth.all_prerequisites()) == {first, second, third}
+    assert set(first.all_unlocks()) == {second, third, fourth}
+    depths = dict(
+        Mission.objects.filter(pk__in=[m.pk for m in chain]).values_list("pk", "depth")
+    )
+    assert depths == {first.pk: 0, second.pk: 1, third.pk: 2}
+    fourth.refresh_from_db()
+    assert fourth.depth == 3
+
+    # third keeps first directly: only the chain through second goes away
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    fourth.refresh_from_db()
+    assert set(fourth.all_prerequisites()) == {first, third}
+    assert fourth.depth == 2
+
+    third.prerequisites.clear()
+    assert set(fourth.all_prerequisites()) == {third}
+    assert list(first.all_unlocks()) == []
+
+
+def test_deleting_a_location_rebuilds_closure_once(
+    chain, monkeypatch, django_capture_on_commit_callbacks
+):
+    calls = []
+    monkeypatch.setattr(prerequisites, "rebuild_closure", lambda: calls.append(1))
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        chain[0].location.delete()
+        assert calls == []
+
+    assert callbacks.count(prerequisites._rebuild_after_delete) == 1
+    assert calls == [1]
+
+
+def test_compute_closure_reports_cycles():
+    pairs, depths, blocked = compute_closure([(2, 1), (3, 2)])
+    assert pairs == {(2, 1), (3, 2), (3, 1)}
+    assert depths == {1: 0, 2: 1, 3: 2}
+    assert blocked == set()
+
+    # 1 -> 2 -> 3 -> 1, and 4 behind the cycle; 5 requires only 6
+    links = [(2, 1), (3, 2), (1, 3), (4, 3), (5, 6)]
+    pairs, depths, blocked = compute_closure(links)
+    assert blocked == {1, 2, 3, 4}
+    assert pairs == {(5, 6)}
+    assert depths == {5: 1, 6: 0}
+
+
+def test_migration_closure_matches_app_code():
+    closure = import_module("game.migrations.0010_mission_prerequisite_closure").closure
+    links = [(2, 1), (3, 2), (3, 1), (1, 4), (5, 6), (6, 5)]
+    pairs, depths, blocked = closure(links)
+
+    assert (set(pairs), depths, blocked) == compute_closure(links)
+
+
+def test_admin_form_reports_cycle(chain):
+    first, second, third = chain
+    data = {
+        field: getattr(first, field)
+        for field in ("title", "xp_reward", "order", "min_level", "repeat_xp_rate")
+    }
+    data.update(location=first.location_id, prerequisites=[third.pk], pos_x=0, pos_y=0)
+    form = MissionAdminForm(data, instance=first)
+
+    assert not form.is_valid()
+    assert "prerequisites" in form.errors
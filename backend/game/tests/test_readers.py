@@ -0,0 +1,97 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import views
+from game.models import (
+    LeaderboardEntry,
+    Location,
+    Mission,
+    MissionTask,
+    Progress,
+    Rank,
+    Track,
+)
+from users.models import Profile, User
+
+VIEWSETS = {
+    "mission-list": views.MissionViewSet,
+    "missiontask-list": views.MissionTaskViewSet,
+    "rank-list": views.RankViewSet,
+    "leaderboard-list": views.LeaderboardViewSet,
+}
+
+
+@pytest.fixture()
+def content(db):
+    track = Track.objects.create(
+        slug="readers", title="", title_en="Readers", title_ru="Чтение"
+    )
+    world = Location.objects.create(track=track, title="World", order=1)
+    third = Mission.objects.create(location=world, title="Third", order=3)
+    first = Mission.objects.create(
+        location=world, title="", title_en="First", description_ru="Описание", order=1
+    )
+    second = Mission.objects.create(
+        location=world, title="Second", title_ru="Второй", order=1, is_active=False
+    )
+    # Added out of id order on purpose
+    third.prerequisites.add(second, first)
+    MissionTask.objects.create(
+        mission=first,
+        order=2,
+        task_type="code",
+        title_en="Code",
+        data={"tests": [{"input": "1\n", "output": "2"}], "hint": None},
+    )
+    MissionTask.objects.create(mission=first, order=1, title="Read", body="Текст")
+    MissionTask.objects.create(mission=third, order=1, title="Quiz", is_side_quest=True)
+    Rank.objects.create(slug="readers-rank", title_en="Reader", title_ru="Читатель")
+
+    player = User.objects.create_user(username="reader", password="pass1234")
+    named = User.objects.create_user(
+        username="named", password="pass1234", display_name="Named"
+    )
+    Profile.objects.filter(user=named).delete()
+    LeaderboardEntry.objects.create(user=player, track=track, xp_total=30, position=1)
+    LeaderboardEntry.objects.create(user=named, xp_total=10, position=2)
+    Progress.objects.create(
+        user=player, mission=first, completed=True, status="completed"
+    )
+    return player
+
+
+@pytest.mark.parametrize("name", VIEWSETS)
+@pytest.mark.parametrize("lang", ["ru", "en"])
+@pytest.mark.parametrize("authenticated", [False, True])
+def test_values_path_is_byte_identical(
+    content, settings, monkeypatch, name, lang, authenticated
+):
+    settings.CATALOG_SNAPSHOT_ENABLED = False
+    client = APIClient()
+    if authenticated:
+        client.force_authenticate(user=content)
+    url = reverse(name)
+
+    fast = client.get(url, {"lang": lang})
+    monkeypatch.setattr(VIEWSETS[name], "values_reader", None)
+    slow = client.get(url, {"lang": lang})
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content == slow.content
+
+
+def test_values_path_pages_by_cursor(content):
+    client = APIClient()
+    url = reverse("missiontask-list")
+    body = client.get(url, {"page_size": 1}).json()
+    second = client.get(body["next"]).json()
+
+    assert len(body["results"]) == len(second["results"]) == 1
+    assert body["results"][0]["id"] != second["results"][0]["id"]
+
+
+def test_values_path_skips_model_instances(content, django_assert_num_queries):
+    # missions + prerequisites + tasks, whatever the number of rows
+    with django_assert_num_queries(3):
+        views.MissionViewSet.values_reader.read(Mission.objects.all(), "ru")
@@ -0,0 +1,78 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import runner, runner_admission
+from game.runner_admission import RunnerRejected
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def limits(settings):
+    cache.clear()
+    settings.RUNNER_CACHE_ENABLED = False
+    settings.RUNNER_MAX_CONCURRENCY = 1
+    settings.RUNNER_MAX_QUEUE = 1
+    settings.RUNNER_QUEUE_TIMEOUT = 0
+    settings.RUNNER_MAX_PER_USER = 1
+    settings.RUNNER_ADMISSION_RETRY_AFTER = 7
+    return settings
+
+
+@pytest.fixture()
+def user(db):
+    return User.objects.create_user(username="busy", password="pass1234")
+
+
+@pytest.fixture()
+def fake_execute(monkeypatch):
+    calls = []
+
+    def execute(code, timeout, stdin):
+        calls.append(code)
+        return {"status": "success", "output": "", "exit_code": 0}
+
+    monkeypatch.setattr(runner, "_execute", execute)
+    return calls
+
+
+def test_free_slot_is_taken_and_released(fake_execute):
+    result = runner.execute_python_code("print(1)")
+    assert result["status"] == "success"
+    stats = runner_admission.stats()
+    assert stats["admission_admitted"] == 1
+    assert stats["running"] == 0
+
+
+def test_busy_sandbox_times_out_in_queue_with_503(fake_execute):
+    with runner_admission.sandbox_slot(ttl=30):
+        with pytest.raises(RunnerRejected) as exc:
+            runner.execute_python_code("print(1)")
+    assert exc.value.status_code == 503
+    assert fake_execute == []
+    assert runner_admission.stats()["admission_timeouts"] == 1
+
+
+def test_full_queue_is_rejected_immediately(limits, fake_execute):
+    limits.RUNNER_MAX_QUEUE = 0
+    with runner_admission.sandbox_slot(ttl=30):
+        with pytest.raises(RunnerRejected) as exc:
+            runner.execute_python_code("print(1)")
+    assert exc.value.status_code == 503
+    assert runner_admission.stats()["admission_rejected_queue"] == 1
+
+
+def test_per_user_limit_returns_429_with_retry_after(user, fake_execute):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    with runner_admission.user_slot(user.id):
+        resp = client.post(
+            reverse("runner_execute"), {"code": "print(1)"}, format="json"
+        )
+    assert resp.status_code == 429
+    assert resp["Retry-After"] == "7"
+    assert fake_execute == []
+
+    resp = client.post(reverse("runner_execute"), {"code": "print(1)"}, format="json")
+    assert resp.status_code == 200
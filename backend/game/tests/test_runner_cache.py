@@ -0,0 +1,105 @@
+import pytest
+from django.core.cache import cache
+
+from game import runner, runner_cache
+from game.runner_cache import LRUCache
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(settings):
+    settings.RUNNER_CACHE_ENABLED = True
+    cache.clear()
+    runner_cache._local = None
+    yield
+    runner_cache._local = None
+
+
+@pytest.fixture()
+def fake_execute(monkeypatch):
+    calls = []
+
+    def execute(code, timeout, stdin):
+        calls.append((code, stdin))
+        return {"status": "success", "output": f"{code}|{stdin}", "exit_code": 0}
+
+    monkeypatch.setattr(runner, "_execute", execute)
+    return calls
+
+
+def test_identical_submission_is_served_from_cache(fake_execute):
+    first = runner.execute_python_code("print(1)", stdin="x")
+    second = runner.execute_python_code("print(1)", stdin="x")
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["output"] == first["output"]
+    assert len(fake_execute) == 1
+    stats = runner_cache.stats()
+    assert stats["cache_hits"] == 1
+    assert stats["cache_misses"] == 1
+
+
+def test_cache_key_covers_stdin_and_limits(fake_execute):
+    runner.execute_python_code("print(1)", stdin="a")
+    runner.execute_python_code("print(1)", stdin="b")
+    runner.execute_python_code("print(1)", stdin="a", timeout=10)
+    assert len(fake_execute) == 3
+
+
+def test_cache_can_be_bypassed(fake_execute):
+    runner.execute_python_code("print(1)")
+    result = runner.execute_python_code("print(1)", use_cache=False)
+    assert result["cached"] is False
+    assert len(fake_execute) == 2
+
+
+def test_timeouts_are_not_cached(monkeypatch):
+    calls = []
+
+    def execute(code, timeout, stdin):
+        calls.append(code)
+        return runner._OutputBuffer(runner.MAX_OUTPUT_SIZE).result(
+            timed_out=True, timeout=timeout
+        )
+
+    monkeypatch.setattr(runner, "_execute", execute)
+    runner.execute_python_code("while True: pass")
+    runner.execute_python_code("while True: pass")
+    assert len(calls) == 2
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    assert lru.set("c", 3) == 1
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+
+    expired = LRUCache(max_entries=2, ttl=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import random\nprint(random.randint(1, 6))",
+        "from datetime import datetime\nprint(datetime.now())",
+        "import os.path\nprint(os.getpid())",
+    ],
+)
+def test_nondeterministic_code_is_never_reused(fake_execute, code):
+    runner.execute_python_code(code)
+    second = runner.execute_python_code(code)
+
+    assert second["cached"] is False
+    assert len(fake_execute) == 2
+
+
+def test_determinism_can_be_decided_by_caller(fake_execute):
+    # Обёртка проверки импортирует time, но кешируемость решает код ученика
+    code = "import time\nprint(1)"
+    runner.execute_python_code(code, deterministic=True)
+    assert runner.execute_python_code(code, deterministic=True)["cached"] is True
@@ -0,0 +1,60 @@
+import pytest
+
+from game import runner_docker
+
+
+class FakeDockerClient:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def ping(self):
+        if not self.healthy:
+            raise ConnectionError("daemon gone")
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture()
+def connects(monkeypatch, settings):
+    settings.RUNNER_DOCKER_API_VERSION = "1.43"
+    created = []
+
+    def from_env(**kwargs):
+        client = FakeDockerClient()
+        created.append((kwargs, client))
+        return client
+
+    monkeypatch.setattr(runner_docker.docker, "from_env", from_env)
+    runner_docker.reset_docker_client()
+    yield created
+    runner_docker.reset_docker_client()
+
+
+def test_client_is_shared_within_process(connects):
+    first = runner_docker.get_docker_client()
+    assert runner_docker.get_docker_client() is first
+    assert len(connects) == 1
+    kwargs, _ = connects[0]
+    assert kwargs == {"max_pool_size": 10, "version": "1.43"}
+
+
+def test_unhealthy_client_is_replaced(connects, settings):
+    settings.RUNNER_DOCKER_HEALTHCHECK_INTERVAL = -1
+    first = runner_docker.get_docker_client()
+    first.healthy = False
+
+    second = runner_docker.get_docker_client()
+    assert second is not first
+    assert first.closed is True
+
+
+def test_client_is_recreated_in_forked_child(connects):
+    first = runner_docker.get_docker_client()
+    runner_docker._forget_after_fork()
+
+    assert runner_docker.get_docker_client() is not first
+    # the parent's sockets must stay untouched
+    assert first.closed is False
@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import runner_admission, runner_jobs, tasks
+from users.models import User
+
+
+@pytest.fixture()
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture()
+def user(db):
+    return User.objects.create_user(username="coder", password="pass1234")
+
+
+@pytest.fixture()
+def fake_runner(monkeypatch):
+    calls = []
+
+    def run(code, **kwargs):
+        calls.append(code)
+        return {"status": "success", "output": "42\n"}
+
+    monkeypatch.setattr(tasks, "execute_python_code", run)
+    return calls
+
+
+def test_async_submit_returns_job_id_and_result_is_pollable(
+    api_client, user, fake_runner
+):
+    api_client.force_authenticate(user=user)
+    resp = api_client.post(
+        reverse("runner_execute"), {"code": "print(42)", "async": True}, format="json"
+    )
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    assert resp.json()["url"].endswith(reverse("runner_job", args=[job_id]))
+
+    # eager Celery in tests: the job is already finished
+    job = api_client.get(reverse("runner_job", args=[job_id]))
+    assert job.status_code == 200
+    assert job.json() == {
+        "job_id": job_id,
+        "status": "done",
+        "result": {"status": "success", "output": "42\n"},
+    }
+    assert fake_runner == ["print(42)"]
+
+
+def test_job_is_hidden_from_other_users(api_client, user, fake_runner):
+    api_client.force_authenticate(user=user)
+    resp = api_client.post(
+        reverse("runner_execute"), {"code": "print(1)", "async": True}, format="json"
+    )
+    job_id = resp.json()["job_id"]
+
+    other = User.objects.create_user(username="other", password="x")
+    api_client.force_authenticate(user=other)
+    assert api_client.get(reverse("runner_job", args=[job_id])).status_code == 404
+    assert api_client.get(reverse("runner_job", args=["missing"])).status_code == 404
+
+
+def test_broker_failure_returns_503_and_frees_the_slot(
+    api_client, user, fake_runner, monkeypatch
+):
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(tasks.execute_code_job, "apply_async", unavailable)
+    api_client.force_authenticate(user=user)
+    resp = api_client.post(
+        reverse("runner_execute"), {"code": "print(1)", "async": True}, format="json"
+    )
+
+    assert resp.status_code == 503
+    assert resp["Retry-After"]
+    assert runner_admission._user_slots(user.id).in_use() == 0
+    assert fake_runner == []
+
+
+def test_expired_lease_is_reacquired_when_the_job_starts(user, monkeypatch):
+    held = []
+
+    def run(code, **kwargs):
+        held.append(runner_admission._user_slots(user.id).in_use())
+        return {"status": "success", "output": ""}
+
+    monkeypatch.setattr(tasks, "execute_python_code", run)
+    lease = runner_admission.acquire_user_slot(user.id)
+    # The job sat in the queue longer than the lease lived
+    cache.delete(lease[0])
+    job_id = "queued-too-long"
+    runner_jobs._save(job_id, {"user_id": user.id, "status": "queued"})
+
+    tasks.execute_code_job.apply(args=[job_id, "pass"], kwargs={"user_lease": lease})
+
+    assert held == [1]
+    assert runner_admission._user_slots(user.id).in_use() == 0
+    assert runner_jobs.get_job(job_id)["status"] == "done"
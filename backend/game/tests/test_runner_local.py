@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.core.cache import cache
+
+from game import runner, runner_backends
+from game.runner_local import LocalBackend, parse_size
+
+
+def can_isolate_network():
+    probe = (
+        "import ctypes, os, sys\n"
+        "flags = 0x40000000 if os.getuid() == 0 else 0x50000000\n"
+        "sys.exit(ctypes.CDLL(None).unshare(flags) != 0)\n"
+    )
+    return subprocess.run([sys.executable, "-c", probe]).returncode == 0
+
+
+@pytest.fixture(autouse=True)
+def local_backend(settings):
+    cache.clear()
+    settings.RUNNER_BACKEND = "local"
+    settings.RUNNER_CACHE_ENABLED = False
+    # Проверяем саму песочницу, в том числе то, что отсекла бы предпроверка
+    settings.RUNNER_PRECHECK_ENABLED = False
+    # Тестовый интерпретатор может быть недоступен пользователю nobody
+    settings.RUNNER_LOCAL_UID = os.getuid()
+    settings.RUNNER_LOCAL_ISOLATE_NETWORK = False
+    return settings
+
+
+def test_backend_is_selected_by_settings(settings):
+    assert isinstance(runner_backends.get_backend(), LocalBackend)
+    settings.RUNNER_BACKEND = "game.runner_docker.DockerBackend"
+    assert runner_backends.get_backend().name == "docker"
+
+
+def test_runs_code_with_stdin():
+    result = runner.execute_python_code("print(input() * 2)", stdin="ab\n")
+
+    assert result["status"] == "success"
+    assert result["stdout"] == "abab\n"
+    assert result["exit_code"] == 0
+
+
+def test_reports_exit_code_and_stderr():
+    code = "import sys\nprint('out')\nsys.exit('boom')"
+    result = runner.execute_python_code(code)
+
+    assert result["status"] == "error"
+    assert result["exit_code"] == 1
+    assert result["stdout"] == "out\n"
+    assert result["stderr"] == "boom\n"
+
+
+def test_runs_in_private_working_directory():
+    code = "import os\nopen('f.txt', 'w').write('x')\nprint(os.getcwd())"
+    result = runner.execute_python_code(code)
+
+    workdir = result["stdout"].strip()
+    assert result["exit_code"] == 0
+    assert os.path.basename(workdir).startswith("runner-")
+    assert not os.path.exists(workdir)
+
+
+def test_wall_clock_timeout_kills_process():
+    result = runner.execute_python_code("import time\ntime.sleep(30)", timeout=1)
+
+    assert result["status"] == "error"
+    assert "exit_code" not in result
+    assert result["output"].startswith("Timeout")
+
+
+def test_file_size_is_limited(settings):
+    settings.RUNNER_LOCAL_FILE_SIZE = "1k"
+    code = "with open('big', 'w') as f:\n    f.write('x' * 4096)"
+    result = runner.execute_python_code(code)
+
+    assert result["exit_code"] == 1
+    assert "File too large" in result["stderr"]
+
+
+@pytest.mark.skipif(not can_isolate_network(), reason="no network namespaces")
+def test_network_is_unreachable(settings):
+    settings.RUNNER_LOCAL_ISOLATE_NETWORK = True
+    code = "import socket\nsocket.create_connection(('1.1.1.1', 80), timeout=1)"
+    result = runner.execute_python_code(code)
+
+    assert result["exit_code"] == 1
+    assert "unreachable" in result["stderr"]
+
+
+def test_parse_size():
+    assert parse_size("128m") == 128 * 1024 * 1024
+    assert parse_size("1k") == 1024
+    assert parse_size(4096) == 4096
@@ -0,0 +1,266 @@
+import io
+import os
+import socket
+import subprocess
+import struct
+import tarfile
+import threading
+import time
+
+import pytest
+
+from game import runner, runner_docker
+from game.runner_pool import POOL_HOST_LABEL, POOL_LABEL, ContainerPool
+
+
+class FakeAPI:
+    """Низкоуровневый exec API docker-py, которым пользуется раннер."""
+
+    def __init__(self, container):
+        self.container = container
+
+    def exec_create(self, container_id, cmd, stdin=False, environment=None):
+        assert container_id == self.container.id and stdin
+        self.container.exec_calls.append((cmd, environment))
+        return {"Id": "exec-1"}
+
+    def exec_start(self, exec_id, socket=False):
+        assert socket
+        ours, theirs = _socketpair()
+        process = threading.Thread(target=_run_process, args=(theirs, self.container))
+        process.start()
+        self.container.process = process
+        return ours
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.container.exit_code}
+
+
+_socketpair = socket.socketpair
+
+
+def _run_process(sock, container):
+    """Процесс в контейнере: дочитывает stdin, потом пишет вывод."""
+    chunks = []
+    while chunk := sock.recv(65536):
+        chunks.append(chunk)
+    container.stdin = b"".join(chunks)
+    # Мультиплексированный поток docker: заголовок (поток, длина) + данные
+    for stream, data in enumerate(container.chunks[0], start=1):
+        if data:
+            sock.sendall(struct.pack(">BxxxL", stream, len(data)) + data)
+    sock.close()
+
+
+class FakeContainer:
+    def __init__(self, exit_code=0, stdout=b"", stderr=b"", processes=1, diff=None):
+        self.id = "container-1"
+        self.exit_code = exit_code
+        self.chunks = [(stdout or None, stderr or None)]
+        self.processes = processes
+        self.changes = diff or []
+        self.exec_calls = []
+        self.removed = False
+        self.client = type("Client", (), {"api": FakeAPI(self)})()
+
+    def top(self):
+        return {"Processes": [["1", "tail"]] * self.processes}
+
+    def diff(self):
+        return self.changes
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakeClient:
+    def __init__(self, factory=FakeContainer):
+        self.created = []
+        self.containers = self
+        self.factory = factory
+        self.existing = []
+
+    def list(self, all=False, filters=None):
+        key, value = filters["label"].split("=")
+        return [c for c in self.existing if c.labels.get(key) == value]
+
+    def run(self, **kwargs):
+        assert kwargs["network_mode"] == "none"
+        container = self.factory()
+        self.created.append(container)
+        return container
+
+
+def make_pool(client, **kwargs):
+    pool = ContainerPool(
+        lambda: client, image="python:3.11-alpine", mem_limit="128m", **kwargs
+    )
+    # run background work inline to keep tests deterministic
+    pool._background = lambda func, *args: func(*args)
+    return pool
+
+
+def test_pool_recycles_after_each_run_by_default():
+    client = FakeClient()
+    pool = make_pool(client, size=2)
+
+    item = pool.acquire()
+    pool.release(item)
+
+    assert item.container.removed is True
+    assert pool.stats()["idle"] == 0
+
+
+def test_pool_reuses_clean_container_until_max_reuse():
+    client = FakeClient()
+    pool = make_pool(client, size=2, max_reuse=2)
+
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.stats()["idle"] == 1
+
+    second = pool.acquire()
+    assert second is first
+    pool.release(second)
+    assert first.container.removed is True
+    assert len(client.created) == 1
+
+
+def test_pool_discards_container_with_leaked_state():
+    client = FakeClient(factory=lambda: FakeContainer(diff=[{"Path": "/tmp/x"}]))
+    pool = make_pool(client, size=2, max_reuse=5)
+
+    item = pool.acquire()
+    pool.release(item)
+
+    assert item.container.removed is True
+    assert pool.stats()["idle"] == 0
+
+
+@pytest.mark.parametrize("exit_code, status", [(0, "success"), (1, "error")])
+def test_execute_python_code_uses_pool(monkeypatch, settings, exit_code, status):
+    settings.RUNNER_POOL_ENABLED = True
+    settings.RUNNER_CACHE_ENABLED = False
+    client = FakeClient(
+        factory=lambda: FakeContainer(exit_code=exit_code, stdout=b"hi\n", stderr=b"")
+    )
+    pool = make_pool(client, size=1)
+    monkeypatch.setattr(runner_docker, "get_pool", lambda factory: pool)
+    monkeypatch.setattr(runner_docker, "get_docker_client", lambda: client)
+
+    result = runner.execute_python_code("print('hi')")
+
+    assert result == {
+        "status": status,
+        "output": "hi\n",
+        "stdout": "hi\n",
+        "stderr": "",
+        "exit_code": exit_code,
+        "cached": False,
+    }
+    cmd, env = client.created[0].exec_calls[0]
+    assert env == {"RUNNER_CODE": "print('hi')"}
+    assert cmd[-1] == "5"
+
+
+def test_large_stdin_goes_through_exec_socket(monkeypatch, settings):
+    settings.RUNNER_POOL_ENABLED = True
+    settings.RUNNER_CACHE_ENABLED = False
+    settings.RUNNER_PRECHECK_ENABLED = False
+    client = FakeClient(factory=lambda: FakeContainer(stdout=b"ok\n"))
+    pool = make_pool(client, size=1)
+    monkeypatch.setattr(runner_docker, "get_pool", lambda factory: pool)
+    monkeypatch.setattr(runner_docker, "get_docker_client", lambda: client)
+    stdin = "x" * (512 * 1024)
+
+    result = runner.execute_python_code("print(len(input()))", stdin=stdin)
+
+    assert result["stdout"] == "ok\n"
+    container = client.created[0]
+    # В окружение stdin больше не попадает: там он упирался в MAX_ARG_STRLEN
+    assert "RUNNER_STDIN" not in container.exec_calls[0][1]
+    container.process.join(5)
+    assert container.stdin == stdin.encode()
+
+
+class ForkedContainer(FakeContainer):
+    """Потомок после fork пережил timeout: печатает, пока контейнер не убьют."""
+
+    def __init__(self):
+        super().__init__(exit_code=0)
+        self.killed = threading.Event()
+        self.client = type("Client", (), {"api": ForkedAPI(self)})()
+
+    def kill(self):
+        self.killed.set()
+
+
+class ForkedAPI(FakeAPI):
+    def exec_start(self, exec_id, socket=False):
+        ours, theirs = _socketpair()
+
+        def child():
+            frame = struct.pack(">BxxxL", 1, 5) + b"tick\n"
+            try:
+                while not self.container.killed.wait(0.2):
+                    theirs.sendall(frame)
+            except OSError:
+                pass
+            theirs.close()
+
+        threading.Thread(target=child, daemon=True).start()
+        return ours
+
+    def exec_inspect(self, exec_id):
+        raise AssertionError("a killed container has no exec to inspect")
+
+
+def test_watchdog_kills_pooled_run_that_outlives_timeout(monkeypatch, settings):
+    settings.RUNNER_POOL_ENABLED = True
+    settings.RUNNER_CACHE_ENABLED = False
+    client = FakeClient(factory=ForkedContainer)
+    pool = make_pool(client, size=1)
+    monkeypatch.setattr(runner_docker, "get_pool", lambda factory: pool)
+    monkeypatch.setattr(runner_docker, "get_docker_client", lambda: client)
+
+    started = time.monotonic()
+    events = list(runner_docker.DockerBackend().stream("print(1)", 1, ""))
+
+    assert time.monotonic() - started < 3
+    container = client.created[0]
+    assert container.killed.is_set() and container.removed is True
+    kind, result = events[-1]
+    assert kind == "exit" and result["timed_out"] is True
+    assert result["exit_code"] == runner_docker.KILLED_EXIT_CODE
+    assert ("stdout", b"tick\n") in events
+
+
+def test_stdin_archive_is_private_to_root():
+    with tarfile.open(fileobj=io.BytesIO(runner_docker.stdin_archive("секрет"))) as tar:
+        member = tar.getmember(runner_docker.STDIN_NAME)
+        assert member.mode == 0o600 and member.uid == 0
+        assert tar.extractfile(member).read() == "секрет".encode()
+
+
+def test_orphans_of_dead_workers_are_reaped():
+    client = FakeClient()
+    pool = make_pool(client, size=1)
+
+    def labelled(pid, host=pool.host):
+        container = FakeContainer()
+        container.labels = {POOL_LABEL: str(pid), POOL_HOST_LABEL: host}
+        return container
+
+    dead = subprocess.Popen(["true"])
+    dead.wait()
+    orphan, alive, foreign = (
+        labelled(dead.pid),
+        labelled(os.getpid()),
+        labelled(dead.pid, host="other-host"),
+    )
+    client.existing = [orphan, alive, foreign]
+
+    assert pool.reap_orphans() == 1
+    assert orphan.removed is True
+    # Живой владелец и контейнеры других хостов (свои pid) не трогаем
+    assert alive.removed is False and foreign.removed is False
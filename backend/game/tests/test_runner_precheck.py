@@ -0,0 +1,166 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import runner, runner_metrics, runner_precheck
+from game.runner_precheck import check_code
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def precheck(settings):
+    # Счётчики прошлых тестов, ещё не сброшенные в кеш, не должны сюда попасть
+    runner_metrics.flush()
+    cache.clear()
+    settings.RUNNER_PRECHECK_ENABLED = True
+    settings.RUNNER_BANNED_IMPORTS = "socket,subprocess"
+    settings.RUNNER_BANNED_ATTRIBUTES = "system"
+    settings.RUNNER_MAX_CODE_SIZE = 1024
+    settings.RUNNER_MAX_STDIN_SIZE = 16
+    return settings
+
+
+@pytest.fixture()
+def sandbox(monkeypatch):
+    calls = []
+
+    def execute(code, timeout, stdin):
+        calls.append(code)
+        return {"status": "success", "output": "", "exit_code": 0}
+
+    monkeypatch.setattr(runner, "_execute", execute)
+    return calls
+
+
+def test_valid_code_passes():
+    assert check_code("import math\nprint(math.pi)") is None
+
+
+def test_syntax_error_reports_line_and_column():
+    problem = check_code("x = 1\ndef f(:\n    pass")
+
+    assert problem["type"] == "syntax"
+    assert (problem["line"], problem["column"]) == (2, 7)
+    assert problem["message"].endswith("SyntaxError: invalid syntax\n")
+
+
+def test_compile_time_errors_are_caught():
+    problem = check_code("return 1")
+    assert problem["type"] == "syntax"
+    assert "'return' outside function" in problem["message"]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import socket",
+        "import os, subprocess",
+        "from socket import create_connection",
+        "import socket.foo as s",
+        "__import__('subprocess')",
+        "import importlib\nimportlib.import_module('socket')",
+    ],
+)
+def test_banned_imports(code):
+    problem = check_code(code)
+    assert problem["type"] == "banned_import"
+    assert problem["line"] >= 1
+
+
+def test_banned_attribute():
+    problem = check_code("import os\n\nos.system('ls')")
+    assert problem["type"] == "banned_attribute"
+    assert (problem["line"], problem["column"]) == (3, 1)
+
+
+@pytest.mark.parametrize(
+    "code, banned",
+    [
+        ("import os\nos.system('ls')", True),
+        ("import os as o\no.popen('ls')", True),
+        ("from os import system", True),
+        ("import platform\nprint(platform.system())", False),
+        ("class P:\n    def system(self): pass\nP().system()", False),
+        ("print((lambda: 0).__globals__)", True),
+    ],
+)
+def test_qualified_attributes_match_their_module_only(settings, code, banned):
+    settings.RUNNER_BANNED_ATTRIBUTES = "__globals__,os.system,os.popen"
+    problem = check_code(code)
+    assert (problem is not None and problem["type"] == "banned_attribute") == banned
+
+
+def test_size_limits():
+    assert check_code("x" * 2048)["type"] == "size"
+    assert check_code("print(input())", stdin="y" * 32)["type"] == "size"
+
+
+def test_rejected_code_never_reaches_sandbox(sandbox):
+    result = runner.execute_python_code("print(")
+
+    assert sandbox == []
+    assert result["status"] == "error"
+    assert result["precheck"]["type"] == "syntax"
+    assert "exit_code" not in result
+
+    runner.execute_python_code("print(1)")
+    assert sandbox == ["print(1)"]
+
+    stats = runner_precheck.stats()
+    assert stats["precheck_rejected"] == 1
+    assert stats["precheck_passed"] == 1
+    assert stats["launches_saved"] == 1
+
+
+@pytest.mark.django_db
+def test_async_submission_is_rejected_before_queueing(monkeypatch):
+    from game import runner_jobs
+
+    monkeypatch.setattr(
+        runner_jobs, "submit_job", lambda *args, **kwargs: pytest.fail("queued")
+    )
+    user = User.objects.create_user(username="precheck", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    resp = client.post(
+        reverse("runner_execute"),
+        {"code": "import socket", "async": True},
+        format="json",
+    )
+
+    assert resp.status_code == 400
+    assert resp.json()["precheck"]["type"] == "banned_import"
+
+
+def test_counters_are_flushed_in_batches(monkeypatch):
+    writes = []
+    monkeypatch.setattr(runner_metrics, "incr", lambda *args: writes.append(args))
+    monkeypatch.setattr(runner_metrics, "_flushed_at", time.monotonic())
+
+    for _ in range(100):
+        check_code("print(1)")
+    assert writes == []
+
+    runner_metrics.flush()
+    assert writes == [("precheck_passed", 100)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ["runner_execute", "runner_stream"])
+@pytest.mark.parametrize(
+    "body", [{"code": 123}, {"code": ["print(1)"]}, {"code": "print(1)", "stdin": 5}]
+)
+def test_non_string_code_or_stdin_is_400(sandbox, name, body):
+    user = User.objects.create_user(username="types", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    resp = client.post(reverse(name), body, format="json")
+
+    assert resp.status_code == 400
+    assert resp.json()["status"] == "error"
+    assert sandbox == []
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+
+from game import runner, runner_singleflight
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+
+
+def test_concurrent_calls_share_one_execution():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"status": "success", "output": "ok"}
+
+    results = []
+
+    def worker():
+        results.append(runner_singleflight.run_once("k", slow, timeout=5))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=worker) for _ in range(5)]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"status": "success", "output": "ok"}] * 6
+
+
+def test_follower_in_other_worker_receives_published_result():
+    # another worker holds the lock and has already published its result
+    cache.set(runner_singleflight.LOCK_KEY.format(key="k"), "token")
+    cache.set(
+        runner_singleflight.RESULT_KEY.format(key="k", token="token"),
+        {"status": "success", "output": "from leader"},
+    )
+
+    def must_not_run():
+        raise AssertionError("sandbox should not start")
+
+    result = runner_singleflight.run_once("k", must_not_run, timeout=1)
+    assert result["output"] == "from leader"
+
+
+def test_follower_runs_itself_when_leader_is_gone(settings):
+    settings.RUNNER_SINGLEFLIGHT_POLL_INTERVAL = 0.01
+    cache.set(runner_singleflight.LOCK_KEY.format(key="k"), "dead-leader", timeout=1)
+
+    result = runner_singleflight.run_once("k", lambda: {"output": "own"}, timeout=0)
+    assert result == {"output": "own"}
+
+
+def test_followers_wait_for_leaders_queue_time(settings, monkeypatch):
+    settings.RUNNER_SINGLEFLIGHT_ENABLED = True
+    settings.RUNNER_QUEUE_TIMEOUT = 10
+    waits = []
+
+    def run_once(key, func, *, timeout):
+        waits.append(timeout)
+        return {"status": "success", "output": "", "exit_code": 0}
+
+    monkeypatch.setattr(runner_singleflight, "run_once", run_once)
+    runner.execute_python_code("print(1)", timeout=5, use_cache=False)
+
+    # Ожидание в очереди допуска плюс сам запуск
+    assert waits[0] > 5 + 10
@@ -0,0 +1,126 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from game import runner
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def no_cache(settings):
+    cache.clear()
+    settings.RUNNER_CACHE_ENABLED = False
+
+
+def fake_stream(events, closed=None):
+    def stream(code, timeout, stdin):
+        try:
+            yield from events
+        finally:
+            if closed is not None:
+                closed.append(True)
+
+    return stream
+
+
+def test_stdout_and_stderr_are_kept_apart(monkeypatch):
+    events = [
+        ("stdout", b"out\n"),
+        ("stderr", b"err\n"),
+        ("stdout", b"more\n"),
+        ("exit", {"exit_code": 1, "timed_out": False}),
+    ]
+    monkeypatch.setattr(runner, "_stream", fake_stream(events))
+
+    chunks = list(runner.stream_python_code("x"))
+
+    assert chunks[:3] == [
+        ("stdout", "out\n"),
+        ("stderr", "err\n"),
+        ("stdout", "more\n"),
+    ]
+    kind, result = chunks[-1]
+    assert kind == "result"
+    assert result == {
+        "status": "error",
+        "output": "out\nerr\nmore\n",
+        "stdout": "out\nmore\n",
+        "stderr": "err\n",
+        "exit_code": 1,
+    }
+
+
+def test_multibyte_characters_survive_chunk_boundaries(monkeypatch):
+    data = "привет".encode("utf-8")
+    events = [
+        ("stdout", data[:3]),
+        ("stdout", data[3:]),
+        ("exit", {"exit_code": 0, "timed_out": False}),
+    ]
+    monkeypatch.setattr(runner, "_stream", fake_stream(events))
+
+    result = runner.execute_python_code("x")
+
+    assert result["output"] == "привет"
+
+
+def test_output_cap_stops_reading_and_kills_sandbox(monkeypatch):
+    closed = []
+    produced = []
+
+    def endless():
+        while True:
+            produced.append(1)
+            yield "stdout", b"x" * 4096
+
+    monkeypatch.setattr(runner, "_stream", fake_stream(endless(), closed))
+
+    result = runner.execute_python_code("while True: print('x' * 4096)")
+
+    assert closed == [True]
+    assert len(produced) == runner.MAX_OUTPUT_SIZE // 4096 + 1
+    assert result["status"] == "error"
+    assert "exit_code" not in result
+    assert result["output"].endswith(runner.TRUNCATED_MARKER)
+    assert len(result["stdout"]) == runner.MAX_OUTPUT_SIZE
+
+
+def test_timeout_reports_message(monkeypatch):
+    events = [("stdout", b"1\n"), ("exit", {"exit_code": 137, "timed_out": True})]
+    monkeypatch.setattr(runner, "_stream", fake_stream(events))
+
+    result = runner.execute_python_code("x", timeout=3)
+
+    assert result["status"] == "error"
+    assert "3" in result["output"] and "exit_code" not in result
+    assert result["stdout"] == "1\n"
+
+
+@pytest.mark.django_db
+def test_stream_view_sends_server_sent_events(monkeypatch):
+    events = [("stdout", b"hi\n"), ("exit", {"exit_code": 0, "timed_out": False})]
+    monkeypatch.setattr(runner, "_stream", fake_stream(events))
+    user = User.objects.create_user(username="streamer", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    resp = client.post(reverse("runner_stream"), {"code": "print('hi')"}, format="json")
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/event-stream")
+    body = b"".join(resp.streaming_content).decode("utf-8")
+    assert 'event: stdout\ndata: "hi\\n"\n\n' in body
+    assert "event: result\n" in body
+    assert '"exit_code": 0' in body
+
+
+@pytest.mark.django_db
+def test_stream_view_requires_code():
+    user = User.objects.create_user(username="streamer2", password="pass1234")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    resp = client.post(reverse("runner_stream"), {}, format="json")
+
+    assert resp.status_code == 400
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from django.core.cache import cache
+
+from game import runner, runner_zygote
+
+
+@pytest.fixture(autouse=True)
+def zygote_backend(settings):
+    cache.clear()
+    settings.RUNNER_BACKEND = "zygote"
+    settings.RUNNER_CACHE_ENABLED = False
+    # Проверяем саму песочницу, в том числе то, что отсекла бы предпроверка
+    settings.RUNNER_PRECHECK_ENABLED = False
+    # Тестовый интерпретатор может быть недоступен пользователю nobody
+    settings.RUNNER_LOCAL_UID = os.getuid()
+    settings.RUNNER_LOCAL_ISOLATE_NETWORK = False
+    settings.RUNNER_ZYGOTE_PRELOAD = "math,random"
+    return settings
+
+
+def run_both(settings, code, stdin=""):
+    results = {}
+    for backend in ("local", "zygote"):
+        settings.RUNNER_BACKEND = backend
+        result = runner.execute_python_code(code, stdin=stdin)
+        results[backend] = {
+            key: result.get(key) for key in ("status", "stdout", "stderr", "exit_code")
+        }
+    return results["local"], results["zygote"]
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "print(input()[::-1])",
+        "import sys\nprint('a')\nsys.exit(4)",
+        "exit('bye')",
+        "1 / 0",
+        "def f(:\n    pass",
+        "import sys\nprint(__name__, sys.argv)",
+    ],
+)
+def test_matches_plain_interpreter(settings, code):
+    local, zygote = run_both(settings, code, stdin="abc\n")
+    assert zygote == local
+
+
+def test_runs_in_preloaded_interpreter():
+    code = "import sys\nprint('math' in sys.modules)"
+    result = runner.execute_python_code(code)
+    assert result["stdout"] == "True\n"
+
+
+def test_children_do_not_share_random_state():
+    code = "import random\nprint(random.random())"
+    first = runner.execute_python_code(code)
+    second = runner.execute_python_code(code)
+    assert first["stdout"] != second["stdout"]
+
+
+def test_timeout_kills_child():
+    result = runner.execute_python_code("while True:\n    pass", timeout=1)
+
+    assert result["output"].startswith("Timeout")
+    assert "exit_code" not in result
+
+
+def test_output_of_forked_grandchild_is_kept():
+    code = "import os\nif os.fork() == 0:\n    print('child')\nelse:\n    os.wait()"
+    result = runner.execute_python_code(code)
+    assert result["stdout"] == "child\n"
+
+
+def test_dead_zygote_is_restarted(settings):
+    assert runner.execute_python_code("print(1)")["stdout"] == "1\n"
+    zygote = runner_zygote._zygote
+    zygote._proc.kill()
+    zygote._proc.wait()
+
+    assert runner.execute_python_code("print(2)")["stdout"] == "2\n"
@@ -12,6 +12,9 @@ from .views import (
     RankViewSet,
     TaskProgressViewSet,
     TrackViewSet,
+    CodeRunnerJobView,
+    CodeRunnerStatsView,
+    CodeRunnerStreamView,
     CodeRunnerView
 )
 
@@ -29,4 +32,7 @@ router.register(r"leaderboard", LeaderboardViewSet, basename="leaderboard")
 urlpatterns = [
     path("", include(router.urls)),
     path('runner/execute/', CodeRunnerView.as_view(), name='runner_execute'),
+    path('runner/stream/', CodeRunnerStreamView.as_view(), name='runner_stream'),
+    path('runner/jobs/<str:job_id>/', CodeRunnerJobView.as_view(), name='runner_job'),
+    path('runner/stats/', CodeRunnerStatsView.as_view(), name='runner_stats'),
 ]
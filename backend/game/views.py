@@ -1,14 +1,27 @@
 """API viewsets for game models with CodeCombat-like logic."""
 
+import json
+from contextlib import ExitStack
+
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from core.idempotency import idempotent
+from core.pagination import KeysetPagination
 from users.models import Profile
 from rest_framework.views import APIView
 
+from . import catalog, prerequisites
 from .models import (
     LeaderboardEntry,
     Location,
@@ -19,6 +32,8 @@ from .models import (
     TaskProgress,
     Track,
 )
+from .localization import resolve_language
+from .readers import LeaderboardReader, MissionReader, MissionTaskReader, RankReader
 from .serializers import (
     LeaderboardEntrySerializer,
     LocationSerializer,
@@ -26,18 +41,256 @@ from .serializers import (
     MissionTaskSerializer,
     ProgressSerializer,
     RankSerializer,
+    SparseFieldset,
     TaskProgressSerializer,
     TrackSerializer,
+    UserProgressState,
 )
 
 
-class TrackViewSet(viewsets.ModelViewSet):
+def _prerequisites_prefetch(lookup="prerequisites"):
+    # Стабильный порядок требований: так же их отдаёт values-ридер
+    return Prefetch(lookup, queryset=Mission.objects.order_by("id"))
+
+
+def _mission_tree_prefetches(prefix="", tasks=True):
+    """Ordered prefetches for missions under ``prefix`` with prerequisites and tasks.
+
+    Each level is one query regardless of catalog size; the serializers read
+    the prefetched ``.all()`` instead of re-querying.
+    """
+    prefetches = [
+        Prefetch(f"{prefix}missions", queryset=Mission.objects.order_by("order", "id")),
+        _prerequisites_prefetch(f"{prefix}missions__prerequisites"),
+    ]
+    if tasks:
+        prefetches.append(
+            Prefetch(
+                f"{prefix}missions__tasks",
+                queryset=MissionTask.objects.order_by("order", "id"),
+            )
+        )
+    return prefetches
+
+
+class ValuesReadMixin:
+    """Serve GET lists through ``values_reader`` instead of the serializer.
+
+    The reader builds serializer-identical dicts from ``.values()`` rows
+    (see ``game/readers.py``); other actions keep the serializer.
+    """
+
+    values_reader = None
+
+    def list(self, request, *args, **kwargs):
+        reader = self.values_reader
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        rows = reader.rows(self.filter_queryset(self.get_queryset()))
+        language = resolve_language(request)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page, language))
+        return Response(reader.render(list(rows), language))
+
+
+class CatalogSnapshotMixin:
+    """Serve GET list/retrieve from the in-memory catalog snapshot.
+
+    The snapshot is built once per language and content version with this
+    viewset's queryset and serializer, then only the requesting user's
+    progress is overlaid (see ``game/catalog.py``).
+
+    Responses carry a strong ETag of the content version, language, URL and
+    the user's progress version; a matching ``If-None-Match`` is answered
+    with 304 before anything is serialized.
+    """
+
+    catalog_kind = ""
+    # game.readers.ValuesReader rendering the list without the serializer
+    values_reader = None
+    _building_catalog = False
+
+    def sparse_related(self, sparse):
+        """``(select_related, prefetch_related)`` lookups for a sparse request."""
+        return (), ()
+
+    def _sparse(self):
+        """The request's ``?fields=``/``?expand=``, for catalog reads only."""
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = None
+            if self.action in ("list", "retrieve"):
+                self._sparse_fieldset = SparseFieldset.from_request(
+                    self.request, self.get_serializer_class().Meta.model
+                )
+        return self._sparse_fieldset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sparse = self._sparse()
+        if sparse is None or self._building_catalog:
+            return queryset
+        # Загружаем только то, что попадёт в ответ
+        select, prefetch = self.sparse_related(sparse)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        meta = self.get_serializer_class().Meta
+        only = sparse.only(getattr(meta, "sparse_requires", None))
+        if only is not None:
+            queryset = queryset.only(*only)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        sparse = self._sparse()
+        if sparse is not None:
+            context[SparseFieldset.context_key] = sparse
+        return context
+
+    def _catalog_etag(self):
+        user = self.request.user
+        return catalog.etag(
+            self.catalog_kind,
+            self.request.get_full_path(),
+            resolve_language(self.request),
+            self.request.accepted_media_type,
+            user_id=user.pk if user.is_authenticated else None,
+        )
+
+    def _conditional(self, response, etag):
+        if response.status_code not in (200, 304):
+            return response
+        response["ETag"] = etag
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            # Анонимный каталог одинаков для всех: его может кешировать прокси
+            patch_cache_control(
+                response, public=True, max_age=settings.CATALOG_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ("Accept-Language", "Authorization"))
+        return response
+
+    def _not_modified(self, etag):
+        header = self.request.headers.get("If-None-Match")
+        if not header:
+            return False
+        # If-None-Match сравнивается «слабо»: префикс W/ не учитываем
+        tags = {tag.removeprefix("W/") for tag in parse_etags(header)}
+        return etag in tags
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        etag = getattr(self, "_etag", None)
+        if etag is not None:
+            response = self._conditional(response, etag)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def _check_etag(self):
+        """Remember the ETag for the response; a 304 if the client has it."""
+        self._etag = self._catalog_etag()
+        if self._not_modified(self._etag):
+            return Response(status=304)
+        return None
+
+    def _build_catalog(self, language):
+        # The snapshot always holds the full rendering
+        self._building_catalog = True
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+        finally:
+            self._building_catalog = False
+        if self.values_reader is not None:
+            return self.values_reader.read(queryset, language)
+        serializer_class = self.get_serializer_class()
+        # No request in the context: the snapshot is the anonymous rendering
+        serializer = serializer_class(
+            queryset, many=True, context={"language": language}
+        )
+        return serializer.data
+
+    def _catalog_snapshot(self):
+        if not settings.CATALOG_SNAPSHOT_ENABLED:
+            return None
+        return catalog.get_snapshot(resolve_language(self.request))
+
+    def _user_state(self):
+        return UserProgressState.from_context(self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self._check_etag()
+        if not_modified is not None:
+            return not_modified
+        snapshot = self._catalog_snapshot()
+        kind = self.catalog_kind
+        sparse = self._sparse()
+        if snapshot is None:
+            if self.values_reader is None or sparse is not None:
+                return super().list(request, *args, **kwargs)
+            items = self._build_catalog(resolve_language(request))
+            state = self._user_state()
+            return Response([catalog.personalize(kind, item, state) for item in items])
+        state = self._user_state()
+        if (
+            state is None
+            and sparse is None
+            and request.accepted_media_type == JSONRenderer.media_type
+        ):
+            # Anonymous JSON responses are identical for everyone: send the
+            # bytes rendered when the snapshot was built
+            return HttpResponse(
+                snapshot.json(kind, self._build_catalog),
+                content_type=JSONRenderer.media_type,
+            )
+        items = snapshot.list(kind, self._build_catalog)
+        items = [catalog.personalize(kind, item, state) for item in items]
+        if sparse is not None:
+            items = [sparse.trim(item) for item in items]
+        return Response(items)
+
+    def retrieve(self, request, *args, **kwargs):
+        not_modified = self._check_etag()
+        if not_modified is not None:
+            return not_modified
+        snapshot = self._catalog_snapshot()
+        lookup = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if snapshot is None or not str(lookup).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        item = snapshot.get(self.catalog_kind, int(lookup), self._build_catalog)
+        if item is None:
+            # Not part of the public catalog: let the queryset decide (404)
+            return super().retrieve(request, *args, **kwargs)
+        item = catalog.personalize(self.catalog_kind, item, self._user_state())
+        sparse = self._sparse()
+        return Response(item if sparse is None else sparse.trim(item))
+
+
+class TrackViewSet(CatalogSnapshotMixin, viewsets.ModelViewSet):
     """ViewSet for learning tracks."""
 
-    # ОПТИМИЗАЦИЯ: prefetch_related вытягивает все локации трека заранее
-    queryset = Track.objects.prefetch_related('worlds').order_by("order", "id")
+    # ОПТИМИЗАЦИЯ: всё дерево трек → миры → миссии → требования/задания
+    # загружается фиксированным числом запросов
+    queryset = Track.objects.prefetch_related(
+        Prefetch("worlds", queryset=Location.objects.order_by("order", "id")),
+        *_mission_tree_prefetches("worlds__"),
+    ).order_by("order", "id")
     serializer_class = TrackSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_kind = "tracks"
+
+    def sparse_related(self, sparse):
+        if not sparse.wants("worlds"):
+            return (), ()
+        prefetch = [
+            Prefetch("worlds", queryset=Location.objects.order_by("order", "id"))
+        ]
+        if "missions" in sparse.expand:
+            prefetch += _mission_tree_prefetches(
+                "worlds__", tasks="tasks" in sparse.expand
+            )
+        return (), prefetch
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -51,13 +304,23 @@ class TrackViewSet(viewsets.ModelViewSet):
         return [permissions.IsAdminUser()]
 
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(CatalogSnapshotMixin, viewsets.ModelViewSet):
     """ViewSet for managing locations."""
 
     # ОПТИМИЗАЦИЯ: select_related для трека (ForeignKey), prefetch_related для миссий (Reverse FK)
-    queryset = Location.objects.select_related('track').prefetch_related('missions').order_by("order")
+    queryset = Location.objects.select_related('track').prefetch_related(
+        *_mission_tree_prefetches()
+    ).order_by("order")
     serializer_class = LocationSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_kind = "locations"
+
+    def sparse_related(self, sparse):
+        select = ("track",) if sparse.wants("track") else ()
+        prefetch = ()
+        if sparse.wants("missions"):
+            prefetch = _mission_tree_prefetches(tasks="tasks" in sparse.expand)
+        return select, prefetch
 
     def get_permissions(self):
         if self.request.method in ("GET", "HEAD", "OPTIONS"):
@@ -65,21 +328,100 @@ class LocationViewSet(viewsets.ModelViewSet):
         return [permissions.IsAdminUser()]
 
 
-class MissionViewSet(viewsets.ModelViewSet):
+class MissionViewSet(CatalogSnapshotMixin, viewsets.ModelViewSet):
     """ViewSet for managing missions."""
 
-    # ОПТИМИЗАЦИЯ: Вытягиваем локацию миссии и её требования одним запросом
-    queryset = Mission.objects.select_related('location').prefetch_related('prerequisites').order_by("order")
+    # ОПТИМИЗАЦИЯ: Вытягиваем локацию миссии, её требования и задания заранее
+    queryset = Mission.objects.select_related('location').prefetch_related(
+        _prerequisites_prefetch(), 'tasks'
+    ).order_by("order")
     serializer_class = MissionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    catalog_kind = "missions"
+    values_reader = MissionReader()
+
+    def sparse_related(self, sparse):
+        prefetch = []
+        if sparse.wants("prerequisites"):
+            prefetch.append(_prerequisites_prefetch())
+        if sparse.wants("tasks"):
+            prefetch.append("tasks")
+        return (), prefetch
+
+    @staticmethod
+    def _missing_prerequisites(mission, user):
+        # Требования берутся из графа; прогресс читаем только по ним
+        graph = prerequisites.get_graph()
+        required = graph.prerequisites(mission.id)
+        if not required:
+            return []
+        completed_ids = Progress.objects.filter(
+            user=user, completed=True, mission_id__in=required
+        ).values_list("mission_id", flat=True)
+        return graph.missing(mission.id, completed_ids)
 
     def get_permissions(self):
-        if self.action in ("start", "complete"):
+        if self.action in ("start", "complete", "next"):
             return [permissions.IsAuthenticated()]
         if self.request.method in ("GET", "HEAD", "OPTIONS"):
             return [permissions.AllowAny()]
         return [permissions.IsAdminUser()]
 
+    @swagger_auto_schema(
+        method="get",
+        operation_summary="Next missions",
+        operation_description=(
+            "Фронтир пользователя: активные миссии, открытые по уровню и "
+            "prerequisites, ещё не пройденные (или repeatable).\n"
+            "Порядок: трек, локация, миссия."
+        ),
+        responses={200: MissionSerializer(many=True)},
+    )
+    @action(
+        detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def next(self, request):
+        not_modified = self._check_etag()
+        if not_modified is not None:
+            return not_modified
+        state = self._user_state()
+        # Кандидаты — одним запросом id; требования проверяются по графу
+        candidates = (
+            Mission.objects.filter(is_active=True)
+            .exclude(location__track__is_active=False)
+            .order_by(
+                F("location__track__order").asc(nulls_last=True),
+                "location__track_id",
+                "location__order",
+                "location_id",
+                "order",
+                "id",
+            )
+            .values_list("id", "repeatable")
+        )
+        if state.profile:
+            candidates = candidates.filter(min_level__lte=state.profile.level)
+        ids = state.frontier(candidates)
+
+        snapshot = self._catalog_snapshot()
+        if snapshot is None:
+            items = self.values_reader.read(
+                Mission.objects.filter(id__in=ids), resolve_language(request)
+            )
+            items = {item["id"]: item for item in items}
+        else:
+            items = {
+                pk: snapshot.get(self.catalog_kind, pk, self._build_catalog)
+                for pk in ids
+            }
+        return Response(
+            [
+                catalog.personalize(self.catalog_kind, items[pk], state)
+                for pk in ids
+                if items.get(pk) is not None
+            ]
+        )
+
     @swagger_auto_schema(
         method="post",
         operation_summary="Start mission",
@@ -93,6 +435,7 @@ class MissionViewSet(viewsets.ModelViewSet):
     @action(
         detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
     )
+    @idempotent
     @transaction.atomic
     def start(self, request, pk=None):
         mission = self.get_object()
@@ -102,20 +445,12 @@ class MissionViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Mission is inactive"}, status=400)
         if profile.level < mission.min_level:
             return Response({"detail": "Level too low"}, status=403)
-        if mission.prerequisites.exists():
-            completed_ids = set(
-                Progress.objects.filter(user=request.user, completed=True).values_list(
-                    "mission_id", flat=True
-                )
-            )
-            missing = [
-                m.id for m in mission.prerequisites.all() if m.id not in completed_ids
-            ]
-            if missing:
-                return Response({"detail": "Prerequisites not completed"}, status=403)
+        if self._missing_prerequisites(mission, request.user):
+            return Response({"detail": "Prerequisites not completed"}, status=403)
 
         prog, _ = Progress.objects.get_or_create(user=request.user, mission=mission)
         prog.start()
+        catalog.bump_user_version(request.user.id)
         return Response(ProgressSerializer(prog).data)
 
     @swagger_auto_schema(
@@ -137,6 +472,7 @@ class MissionViewSet(viewsets.ModelViewSet):
     @action(
         detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
     )
+    @idempotent
     @transaction.atomic
     def complete(self, request, pk=None):
         mission = self.get_object()
@@ -146,37 +482,26 @@ class MissionViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Mission is inactive"}, status=400)
         if profile.level < mission.min_level:
             return Response({"detail": "Level too low"}, status=403)
-        if mission.prerequisites.exists():
-            completed_ids = set(
-                Progress.objects.filter(user=request.user, completed=True).values_list(
-                    "mission_id", flat=True
-                )
-            )
-            missing = [
-                m.id for m in mission.prerequisites.all() if m.id not in completed_ids
-            ]
-            if missing:
-                return Response({"detail": "Prerequisites not completed"}, status=403)
+        if self._missing_prerequisites(mission, request.user):
+            return Response({"detail": "Prerequisites not completed"}, status=403)
 
         prog, _ = Progress.objects.get_or_create(user=request.user, mission=mission)
 
+        # Первое завершение определяет compare-and-set, а не прочитанный
+        # prog.completed: из параллельных запросов полный reward получит один
         base_reward = mission.xp_reward
-        xp_gain = 0
-        if prog.completed and not mission.repeatable:
-            xp_gain = 0
-        elif prog.completed and mission.repeatable:
+        if prog.complete():
+            xp_gain = base_reward
+        elif mission.repeatable:
             xp_gain = max(0, (base_reward * mission.repeat_xp_rate) // 100)
         else:
-            xp_gain = base_reward
+            xp_gain = 0
 
-        prog.complete()
-        prog.xp_earned += xp_gain
         stars = int(request.data.get("stars", 0))
-        prog.stars = max(0, min(3, stars))
-        prog.save()
-
-        if xp_gain > 0:
-            profile.add_xp(xp_gain)
+        prog.record_result(xp_gain, max(0, min(3, stars)))
+        profile.add_xp(xp_gain)
+        # UPDATE не шлёт post_save: сбрасываем ETag каталога пользователя сами
+        catalog.bump_user_version(request.user.id)
 
         data = ProgressSerializer(prog).data
         data.update(
@@ -219,11 +544,10 @@ class MissionViewSet(viewsets.ModelViewSet):
             
         prog, _ = Progress.objects.get_or_create(user=target_user, mission=mission)
         
-        if not prog.completed:
-            prog.complete()
-            prog.xp_earned += mission.xp_reward
-            prog.save()
+        if prog.complete():
+            prog.record_result(mission.xp_reward, prog.stars)
             target_user.profile.add_xp(mission.xp_reward)
+            catalog.bump_user_version(target_user.id)
             return Response({"detail": f"Completed for {target_user.username}", "xp_added": mission.xp_reward})
             
         return Response({"detail": "Already completed"}, status=400)
@@ -235,12 +559,14 @@ class ProgressViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     queryset = Progress.objects.all()
     serializer_class = ProgressSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
 
     def get_queryset(self):
         return Progress.objects.filter(user=self.request.user).select_related("mission")
 
 
-class MissionTaskViewSet(viewsets.ReadOnlyModelViewSet):
+class MissionTaskViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
     """Expose mission tasks/steps for Story → Quiz → Code UX."""
 
     # Тут уже отлично сделана оптимизация:
@@ -249,6 +575,9 @@ class MissionTaskViewSet(viewsets.ReadOnlyModelViewSet):
     )
     serializer_class = MissionTaskSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("mission_id", "order", "id")
+    values_reader = MissionTaskReader()
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -260,6 +589,45 @@ class MissionTaskViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(task_type=task_type)
         return qs
 
+    @swagger_auto_schema(
+        method="post",
+        operation_summary="Submit code task solution",
+        operation_description=(
+            "Проверяет решение code-задачи на всех тест-кейсах из data.tests "
+            "за один запуск песочницы и записывает попытку в TaskProgress."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "code": openapi.Schema(type=openapi.TYPE_STRING, description="Python code"),
+            },
+            required=["code"],
+        ),
+    )
+    @action(
+        detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated]
+    )
+    def submit(self, request, pk=None):
+        task = self.get_object()
+        code = request.data.get("code", "")
+        if not isinstance(code, str):
+            return Response({"detail": "Поле code должно быть строкой."}, status=400)
+        if not code:
+            return Response({"detail": "Код не предоставлен."}, status=400)
+
+        from .grading import GradingError, grade_submission
+        from .runner_admission import RunnerRejected, user_slot
+
+        try:
+            with user_slot(request.user.id):
+                result = grade_submission(request.user, task, code)
+        except GradingError as e:
+            return Response({"detail": str(e)}, status=400)
+        except RunnerRejected as e:
+            return _rejected_response(e)
+        result["progress"] = TaskProgressSerializer(result["progress"]).data
+        return Response(result)
+
 
 class TaskProgressViewSet(viewsets.ModelViewSet):
     """Allow learners to persist their progress on mission tasks."""
@@ -267,6 +635,8 @@ class TaskProgressViewSet(viewsets.ModelViewSet):
     queryset = TaskProgress.objects.none()
     serializer_class = TaskProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
 
     def get_queryset(self):
         # Отличная оптимизация:
@@ -274,6 +644,19 @@ class TaskProgressViewSet(viewsets.ModelViewSet):
             "task", "task__mission"
         )
 
+    # Повторы с тем же Idempotency-Key получают сохранённый ответ
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @idempotent
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @idempotent
+    def partial_update(self, request, *args, **kwargs):
+        return super().partial_update(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -281,17 +664,20 @@ class TaskProgressViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class RankViewSet(viewsets.ReadOnlyModelViewSet):
+class RankViewSet(CatalogSnapshotMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Rank.objects.all().order_by("order", "min_level", "min_xp")
     serializer_class = RankSerializer
     permission_classes = [permissions.AllowAny]
+    catalog_kind = "ranks"
+    values_reader = RankReader()
 
 
-class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+class LeaderboardViewSet(ValuesReadMixin, viewsets.ReadOnlyModelViewSet):
     # Тут тоже всё было сделано шикарно:
     queryset = LeaderboardEntry.objects.select_related("track", "user", "user__profile")
     serializer_class = LeaderboardEntrySerializer
     permission_classes = [permissions.AllowAny]
+    values_reader = LeaderboardReader()
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -311,6 +697,9 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
 class CodeRunnerView(APIView):
     """
     API для безопасного запуска пользовательского кода в песочнице.
+
+    По умолчанию запуск синхронный; с ``"async": true`` код ставится в
+    очередь Celery, а ответ 202 содержит ``job_id`` для опроса.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -321,19 +710,237 @@ class CodeRunnerView(APIView):
             type=openapi.TYPE_OBJECT,
             properties={
                 "code": openapi.Schema(type=openapi.TYPE_STRING, description="Python code to run"),
+                "stdin": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Данные для stdin программы"
+                ),
+                "async": openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN,
+                    description="Поставить запуск в очередь и вернуть job_id",
+                ),
+                "cache": openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN,
+                    description="false — не брать результат из кеша и запустить заново",
+                ),
             },
             required=["code"],
         )
     )
     def post(self, request, *args, **kwargs):
-        code = request.data.get("code", "")
-        if not code:
-            return Response({"status": "error", "output": "Код не предоставлен."}, status=400)
-        
+        code, stdin, invalid = _runner_input(request.data)
+        if invalid is not None:
+            return invalid
+        use_cache = _is_truthy(request.data.get("cache", True))
+
+        from .runner_admission import (
+            RunnerRejected,
+            acquire_user_slot,
+            release_lease,
+            user_slot,
+        )
+
+        if _is_truthy(request.data.get("async")):
+            from .runner_jobs import STATUS_QUEUED, submit_job
+
+            # Заведомо негодный код отклоняем сразу, не ставя в очередь
+            rejected = _precheck(code, stdin)
+            if rejected is not None:
+                return Response(rejected, status=400)
+
+            try:
+                # Слот пользователя освобождает задание, когда закончит; аренда
+                # покрывает и ожидание в очереди Celery
+                lease = acquire_user_slot(
+                    request.user.id, ttl=settings.RUNNER_JOB_LEASE_TTL
+                )
+            except RunnerRejected as e:
+                return _rejected_response(e)
+            try:
+                job_id = submit_job(
+                    request.user.id,
+                    code,
+                    stdin=stdin,
+                    use_cache=use_cache,
+                    user_lease=lease,
+                )
+            except Exception:
+                # Брокер недоступен: задание не поставлено, слот возвращаем
+                release_lease(lease)
+                return _rejected_response(
+                    RunnerRejected(
+                        "Очередь заданий недоступна, попробуйте позже.",
+                        status_code=503,
+                        retry_after=settings.RUNNER_ADMISSION_RETRY_AFTER,
+                    )
+                )
+            return Response(
+                {
+                    "job_id": job_id,
+                    "status": STATUS_QUEUED,
+                    "url": reverse("runner_job", args=[job_id], request=request),
+                },
+                status=202,
+            )
+
         from .runner import execute_python_code
-        result = execute_python_code(code)
-        
+
+        try:
+            with user_slot(request.user.id):
+                result = execute_python_code(code, stdin=stdin, use_cache=use_cache)
+        except RunnerRejected as e:
+            return _rejected_response(e)
+
         if result["status"] == "error":
             return Response(result, status=400)
-            
-        return Response(result, status=200)
\ No newline at end of file
+
+        return Response(result, status=200)
+
+
+class CodeRunnerStreamView(APIView):
+    """
+    Запуск кода с потоковым выводом (Server-Sent Events).
+
+    События ``stdout``/``stderr`` приходят по мере появления вывода,
+    последнее событие ``result`` содержит итог в формате синхронного
+    эндпоинта. Потоковый режим всегда запускает код заново (без кеша).
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Execute Python Code (streaming)",
+        operation_description=(
+            "Запускает Python-код и стримит stdout/stderr как text/event-stream. "
+            "При превышении лимита вывода песочница останавливается."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "code": openapi.Schema(type=openapi.TYPE_STRING, description="Python code to run"),
+                "stdin": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Данные для stdin программы"
+                ),
+            },
+            required=["code"],
+        ),
+    )
+    def post(self, request, *args, **kwargs):
+        code, stdin, invalid = _runner_input(request.data)
+        if invalid is not None:
+            return invalid
+        rejected = _precheck(code, stdin)
+        if rejected is not None:
+            return Response(rejected, status=400)
+
+        from .runner import DEFAULT_TIMEOUT, stream_python_code
+        from .runner_admission import RunnerRejected, sandbox_slot, user_slot
+
+        timeout = DEFAULT_TIMEOUT
+        # Слоты берём до начала ответа, чтобы отказ был обычным 429/503,
+        # а освобождаем, когда поток закончится или клиент отключится
+        slots = ExitStack()
+        try:
+            slots.enter_context(user_slot(request.user.id))
+            slots.enter_context(sandbox_slot(ttl=timeout + 30))
+        except RunnerRejected as e:
+            slots.close()
+            return _rejected_response(e)
+
+        def events():
+            with slots:
+                for kind, payload in stream_python_code(code, timeout, stdin):
+                    data = json.dumps(payload, ensure_ascii=False)
+                    yield f"event: {kind}\ndata: {data}\n\n".encode("utf-8")
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Не даём nginx буферизовать поток
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class CodeRunnerJobView(APIView):
+    """Статус и результат асинхронного запуска кода."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Get code runner job",
+        operation_description=(
+            "Возвращает статус задания (queued, running, done) и, когда оно "
+            "завершено, результат запуска."
+        ),
+    )
+    def get(self, request, job_id, *args, **kwargs):
+        from .runner_jobs import get_job
+
+        job = get_job(job_id)
+        # Чужие задания не раскрываем — отвечаем так же, как на несуществующие
+        if job is None or job.get("user_id") != request.user.id:
+            return Response({"detail": "Not found."}, status=404)
+        return Response({"job_id": job_id, "status": job["status"], "result": job["result"]})
+
+
+class CodeRunnerStatsView(APIView):
+    """Счётчики код-раннера для администраторов."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(operation_summary="Code runner stats")
+    def get(self, request, *args, **kwargs):
+        from . import (
+            runner_admission,
+            runner_cache,
+            runner_metrics,
+            runner_precheck,
+            runner_singleflight,
+        )
+        from .runner_pool import pool_stats
+
+        return Response(
+            {
+                "backend": settings.RUNNER_BACKEND,
+                "admission": runner_admission.stats(),
+                "precheck": runner_precheck.stats(),
+                "cache": runner_cache.stats(),
+                "singleflight": runner_metrics.get_metrics(runner_singleflight.METRICS),
+                "pool": pool_stats(),
+            }
+        )
+
+
+def _runner_input(data):
+    """``(code, stdin, None)`` из тела запроса или ``(None, None, ответ 400)``."""
+    code = data.get("code", "")
+    stdin = data.get("stdin") or ""
+    # Прекек и песочница работают со строками: число или объект — ошибка клиента
+    if not isinstance(code, str) or not isinstance(stdin, str):
+        error = "Поля code и stdin должны быть строками."
+        return None, None, Response({"status": "error", "output": error}, status=400)
+    if not code:
+        error = "Код не предоставлен."
+        return None, None, Response({"status": "error", "output": error}, status=400)
+    return code, stdin, None
+
+
+def _precheck(code: str, stdin: str):
+    """Результат-отказ статической проверки или ``None``, если код можно запускать."""
+    if not settings.RUNNER_PRECHECK_ENABLED:
+        return None
+    from .runner_precheck import check_code, rejected_result
+
+    problem = check_code(code, stdin)
+    return rejected_result(problem) if problem is not None else None
+
+
+def _rejected_response(exc) -> Response:
+    return Response(
+        {"status": "error", "output": exc.detail},
+        status=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _is_truthy(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in {"1", "true", "yes", "on"}
+    return bool(value)
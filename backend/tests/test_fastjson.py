@@ -0,0 +1,68 @@
+"""Unit tests for the orjson-backed renderer and parser.
+
+The fast pair must produce and accept exactly what DRF's stock JSON
+renderer and parser do.
+"""
+
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from core.fastjson import FastJSONParser, FastJSONRenderer
+
+PAYLOADS = [
+    {"id": 1, "title": "Миссия", "nested": [{"a": None, "b": True, "c": 1.5}]},
+    {
+        "aware": datetime.datetime(2024, 5, 1, 12, 30, 1, 250000, tzinfo=timezone.utc),
+        "naive": datetime.datetime(2024, 5, 1, 12, 30),
+        "date": datetime.date(2024, 5, 1),
+        "time": datetime.time(8, 15),
+        "decimal": decimal.Decimal("12.50"),
+        "uuid": uuid.UUID(int=7),
+        "lazy": gettext_lazy("Lazy"),
+        "json_field": {"tests": [{"input": "1\n", "output": "2"}], "7": [1, 2]},
+    },
+    {1: "int key", "separator": "line\u2028para\u2029"},
+    [10**30],
+]
+
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_renderer_matches_drf(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_indent_falls_back_to_drf():
+    data = {"a": [1, 2]}
+    media_type = "application/json; indent=4"
+    assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(
+        data, media_type
+    )
+
+
+@pytest.mark.parametrize(
+    "body", [b'{"code": "print(1)", "lang": "\xd1\x80\xd1\x83"}', b"[1, 2.5, null]"]
+)
+def test_parser_matches_drf(body):
+    fast = FastJSONParser().parse(io.BytesIO(body))
+    assert fast == JSONParser().parse(io.BytesIO(body))
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[NaN]"])
+def test_parser_rejects_invalid_json(body):
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(body))
+
+
+def test_api_is_wired_to_fast_json():
+    assert FastJSONRenderer in api_settings.DEFAULT_RENDERER_CLASSES
+    assert FastJSONParser in api_settings.DEFAULT_PARSER_CLASSES
@@ -2,10 +2,16 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 
+# simple leveling rule: every 100 XP = level up
+XP_PER_LEVEL = 100
+
+
 class User(AbstractUser):
     """Custom user model with optional display name."""
 
@@ -31,13 +37,20 @@ class Profile(models.Model):
     )
 
     def add_xp(self, amount):
-        """Add XP to the profile and adjust level when thresholds are crossed."""
-        self.xp += amount
-        # simple leveling rule: every 100 XP = level up
-        new_level = self.xp // 100 + 1
-        if new_level > self.level:
-            self.level = new_level
-        self.save()
+        """Add XP to the profile and adjust level when thresholds are crossed.
+
+        A single ``UPDATE ... SET xp = xp + amount`` with the level derived in
+        SQL, so concurrent calls never lose each other's XP and other columns
+        are not rewritten. Sends no ``post_save``; the instance is refreshed
+        with the stored values.
+        """
+        if amount <= 0:
+            return
+        xp = F("xp") + amount
+        Profile.objects.filter(pk=self.pk).update(
+            xp=xp, level=Greatest(F("level"), xp / XP_PER_LEVEL + 1)
+        )
+        self.refresh_from_db(fields=["xp", "level"])
 
 
 @receiver(post_save, sender="users.User")
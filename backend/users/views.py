@@ -5,6 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.pagination import KeysetPagination
+
 from .models import User
 from .serializers import ProfileSerializer, UserSerializer
 
@@ -15,6 +17,8 @@ class UserViewSet(viewsets.ModelViewSet):
     # ОПТИМИЗАЦИЯ: подтягиваем связанный профиль сразу
     queryset = User.objects.select_related('profile').all()
     serializer_class = UserSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("id",)
 
 
 class ProfileMeView(APIView):
@@ -8,6 +8,8 @@ when running pytest from the repository root. Also ensures a sane default
 import os
 import sys
 
+import pytest
+
 ROOT = os.path.dirname(__file__)
 BACKEND_PATH = os.path.join(ROOT, "backend")
 
@@ -16,3 +18,15 @@ if BACKEND_PATH not in sys.path:
 
 # Ensure pytest-django finds test settings when running from repo root
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.test")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_catalog_version():
+    """Start every test from a new catalog version.
+
+    Rolled-back test data sends no signals, so snapshots built by an earlier
+    test would otherwise outlive its rows.
+    """
+    from game import catalog
+
+    catalog.bump_version()